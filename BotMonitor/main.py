@@ -5,13 +5,28 @@ import asyncio
 import json
 import logging
 import os
-import psutil
 import sys
 import traceback
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
 
+# Общие модули лежат в корне проекта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.config import BASE_SCHEMA, NUMBER, REQUIRED, ConfigStore, has_changed, merge_schema
+from common.crashes import CrashStore, bot_crash_path
+from common.logs import configure_logging, reload_logging, setup_logging
+from common.metrics import MetricsSampler
+from common.resources import ResourceTracker
+from common.render_cache import RenderCache
+from common.router import Router
+from common.sender import MessageSender, PRIORITY_ALERT
+from common.dashboards import DashboardRegistry
+from common.process_table import ProcessTable
+from common.control import SupervisorView
+from common.supervisor import bot_dir_name
+from common.webhook import run_webhook
+
 # Попробуем импортировать nest_asyncio для Windows/IDE
 try:
     import nest_asyncio
@@ -20,41 +35,63 @@ except ImportError:
     pass
 
 # Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler('bot_monitor.log'),
-        logging.StreamHandler()
-    ]
-)
+# Запись в файл и консоль идет в фоновом потоке, файл ротируется
+setup_logging('bot_monitor.log')
 logger = logging.getLogger(__name__)
 
-# Обработчик необработанных исключений
-ERROR_LOG = 'errors.txt'
-
-def log_uncaught_exception(exc_type, exc_value, exc_traceback):
-    with open(ERROR_LOG, 'a', encoding='utf-8') as f:
-        f.write(f"\n{'='*40}\n")
-        f.write(f"Время: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"Тип: {exc_type.__name__}\n")
-        f.write(f"Ошибка: {exc_value}\n")
-        traceback.print_tb(exc_traceback, file=f)
-        f.write(f"{'='*40}\n")
+# Проверка config.json при загрузке и горячей перезагрузке
+CONFIG_SCHEMA = merge_schema(BASE_SCHEMA, {
+    'bots': {'*': {REQUIRED: {'name', 'path'}, 'name': str, 'path': str, 'process_name': str}},
+    'monitoring': {
+        'update_interval': NUMBER,
+        'auto_update': bool,
+        'scan_interval': NUMBER,
+        'resource_interval': NUMBER,
+        'dashboards_file': str
+    }
+})
 
-sys.excepthook = log_uncaught_exception
+# Обработчик необработанных исключений
+# Необработанные исключения - в хранилище сбоев рядом с main.py:
+# одна запись на повторяющийся сбой вместо растущего errors.txt
+crash_store = CrashStore(bot_crash_path(__file__), bot='Bot Monitor')
+crash_store.install()
 
 class BotMonitor:
-    def __init__(self):
+    def __init__(self, config_path='config.json'):
+        self.config_path = config_path
         self.config = self.load_config()
-        self.status_message = None
+        self.config_store = ConfigStore(config_path, CONFIG_SCHEMA)
+        self.config_task = None
         self.monitoring_task = None
+        # Новые сообщения со статусом подписываются на автообновление
         self.auto_update_enabled = self.config.get('monitoring', {}).get('auto_update', True)
+        self.dashboards = DashboardRegistry()
+        # Обновления статуса по событиям супервизора: ссылки держим до завершения
+        self.refresh_tasks = set()
+        self.telegram_bot = None
+        self.metrics = MetricsSampler(interval=5)
+        # CPU, память, дескрипторы и потоки каждого бота
+        self.resources = ResourceTracker()
+        self.resource_task = None
+        # Правки сообщений без изменений не отправляются
+        self.render = RenderCache()
+        # Кнопки и команды - через таблицу маршрутов с замером задержек
+        self.router = Router()
+        # Исходящие сообщения - через общую очередь с лимитами Telegram
+        self.sender = MessageSender()
+        self.process_table = ProcessTable(
+            scan_interval=self.config.get('monitoring', {}).get('scan_interval', 10)
+        )
+        # Состояние ботов от демона-супервизора; без него - поиск по процессам
+        self.supervisor_view = SupervisorView()
+        self.supervisor_view.listeners.append(self.on_supervisor_event)
+        self.supervisor_task = None
         
     def load_config(self):
         """Загрузка конфигурации"""
         try:
-            with open('config.json', 'r', encoding='utf-8') as f:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except FileNotFoundError:
             # Создаем базовую конфигурацию
@@ -83,48 +120,68 @@ class BotMonitor:
                     "auto_update": True
                 }
             }
-            with open('config.json', 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            try:
+                with open(self.config_path, 'w', encoding='utf-8') as f:
+                    json.dump(config, f, indent=2, ensure_ascii=False)
+            except OSError as e:
+                logger.error(f"Ошибка сохранения базовой конфигурации: {e}")
             return config
     
+    def apply_config(self, config, changed):
+        """Новый снимок конфига: список ботов и интервалы действуют со следующего обновления"""
+        self.config = config
+        if has_changed(changed, 'monitoring.sample_interval'):
+            self.metrics.interval = config.get('monitoring', {}).get('sample_interval', 5)
+        if has_changed(changed, 'admin_ids'):
+            self.router.set_admins(config.get('admin_ids', []))
+    
+    def get_bot_script(self, bot_config):
+        """Абсолютный путь к main.py бота (пути в конфиге - относительно BotMonitor)"""
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        return os.path.abspath(os.path.join(current_dir, bot_config['path']))
+    
     def get_bot_status(self, bot_id, bot_config):
         """Получить статус конкретного бота"""
         try:
-            # Ищем процесс по имени файла main.py
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    cmdline = proc.info['cmdline']
-                    if cmdline and any('main.py' in arg for arg in cmdline):
-                        # Проверяем, что это нужный бот
-                        if bot_config['path'] in ' '.join(cmdline):
-                            if proc.poll() is None:
-                                return "🟢 Работает", proc.pid
-                            else:
-                                return "🔴 Упал", None
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
+            # Демон-супервизор присылает изменения состояния сам
+            state = self.supervisor_view.get(bot_dir_name(bot_config['path']))
+            if self.supervisor_view.connected and state:
+                if state['running']:
+                    return "🟢 Работает", state['pid']
+                return "🔴 Остановлен", None
             
+            # Индекс процессов перестраивается не чаще раза в scan_interval,
+            # живые PID проверяются точечно по create_time
+            pid = self.process_table.find(self.get_bot_script(bot_config))
+            if pid:
+                return "🟢 Работает", pid
             return "🔴 Остановлен", None
             
         except Exception as e:
             logger.error(f"Ошибка получения статуса бота {bot_id}: {e}")
             return "❓ Ошибка", None
     
+    def bot_pids(self):
+        """PID ботов из конфига: {bot_id: pid или None}"""
+        return {
+            bot_id: self.get_bot_status(bot_id, bot_config)[1]
+            for bot_id, bot_config in self.config.get('bots', {}).items()
+        }
+    
     def get_system_info(self):
-        """Получить информацию о системе"""
+        """Получить информацию о системе (последний снимок сборщика метрик)"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
-            
+            info = self.metrics.snapshot()
+            if not info:
+                return {}
             return {
-                'cpu_percent': cpu_percent,
-                'memory_percent': memory.percent,
-                'memory_used_gb': memory.used / (1024**3),
-                'memory_total_gb': memory.total / (1024**3),
-                'disk_percent': disk.percent,
-                'disk_used_gb': disk.used / (1024**3),
-                'disk_total_gb': disk.total / (1024**3)
+                'cpu_percent': info['cpu_percent'],
+                'memory_percent': info['memory_percent'],
+                'memory_used_gb': info['memory_used_gb'],
+                'memory_total_gb': info['memory_total_gb'],
+                'disk_percent': info['disk_percent'],
+                'disk_used_gb': info['disk_used_gb'],
+                'disk_total_gb': info['disk_total_gb']
             }
         except Exception as e:
             logger.error(f"Ошибка получения системной информации: {e}")
@@ -132,14 +189,10 @@ class BotMonitor:
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Команда /start"""
-        if update.effective_user.id not in self.config.get('admin_ids', []):
-            await update.message.reply_text("⛔ У вас нет доступа к этому боту!")
-            return
-        
         await self.show_status(update.message)
     
-    async def show_status(self, message_or_query):
-        """Показать статус всех ботов"""
+    def build_status(self):
+        """Текст статуса, данные для кэша отрисовок и кнопки"""
         # Получаем системную информацию
         system_info = self.get_system_info()
         
@@ -157,6 +210,9 @@ class BotMonitor:
             if pid:
                 status_text += f" (PID: {pid})"
             status_text += "\n"
+            # На главном экране - только предупреждения о росте, цифры - в подробном
+            for warning in self.resources.warnings(bot_id) if pid else []:
+                status_text += f"   {warning}\n"
             
             total_bots += 1
             if "Работает" in status:
@@ -164,8 +220,15 @@ class BotMonitor:
         
         status_text += f"\n📈 **Статистика:** {running_bots}/{total_bots} ботов работают\n\n"
         
+        # От чего зависит экран: колебания CPU и RAM в пределах 5% не считаются изменением
+        render_data = status_text
+        
         # Системная информация
         if system_info:
+            render_data += (
+                f"{round(system_info['cpu_percent'] / 5)}|{round(system_info['memory_percent'] / 5)}|"
+                f"{round(system_info['disk_percent'])}"
+            )
             status_text += "💻 **Система:**\n"
             status_text += f"🖥️ CPU: {system_info['cpu_percent']:.1f}%\n"
             status_text += f"💾 RAM: {system_info['memory_percent']:.1f}% ({system_info['memory_used_gb']:.1f}GB / {system_info['memory_total_gb']:.1f}GB)\n"
@@ -179,54 +242,50 @@ class BotMonitor:
             [InlineKeyboardButton("🔄 Автообновление", callback_data='toggle_auto')],
             [InlineKeyboardButton("📊 Подробно", callback_data='detailed')]
         ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        return status_text, render_data, InlineKeyboardMarkup(keyboard)
+    
+    async def show_status(self, message_or_query):
+        """Показать статус всех ботов"""
+        status_text, render_data, reply_markup = self.build_status()
         
         # Обновляем или отправляем сообщение
         if hasattr(message_or_query, 'edit_message_text'):
-            await message_or_query.edit_message_text(
+            await self.render.edit(
+                message_or_query,
                 status_text,
+                screen='status',
+                data=render_data,
                 reply_markup=reply_markup,
                 parse_mode='Markdown'
             )
         else:
-            self.status_message = await message_or_query.reply_text(
+            message = await message_or_query.reply_text(
                 status_text,
                 reply_markup=reply_markup,
                 parse_mode='Markdown'
             )
-    
-    async def button_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик inline кнопок"""
-        query = update.callback_query
-        await query.answer()
-        
-        if query.data == 'refresh':
-            await self.show_status(query)
-        elif query.data == 'toggle_auto':
-            await self.toggle_auto_update(query)
-        elif query.data == 'detailed':
-            await self.show_detailed_status(query)
+            # Новое сообщение со статусом сразу подписывается на автообновление
+            if self.auto_update_enabled:
+                self.dashboards.add(message.chat_id, message.message_id)
     
     async def toggle_auto_update(self, query):
-        """Переключить автообновление"""
-        self.auto_update_enabled = not self.auto_update_enabled
+        """Включить или выключить автообновление этого сообщения"""
+        chat_id, message_id = query.message.chat_id, query.message.message_id
         
-        if self.auto_update_enabled:
-            await query.edit_message_text(
-                "✅ Автообновление включено! Статус будет обновляться автоматически.",
+        if (chat_id, message_id) in self.dashboards:
+            self.dashboards.remove(chat_id, message_id)
+            await self.render.edit(
+                query,
+                "❌ Автообновление отключено!",
                 parse_mode='Markdown'
             )
-            # Запускаем автообновление
-            if not self.monitoring_task or self.monitoring_task.done():
-                self.monitoring_task = asyncio.create_task(self.auto_update_status())
         else:
-            await query.edit_message_text(
-                "❌ Автообновление отключено!",
+            self.dashboards.add(chat_id, message_id)
+            await self.render.edit(
+                query,
+                "✅ Автообновление включено! Статус будет обновляться автоматически.",
                 parse_mode='Markdown'
             )
-            # Останавливаем автообновление
-            if self.monitoring_task and not self.monitoring_task.done():
-                self.monitoring_task.cancel()
     
     async def show_detailed_status(self, query):
         """Показать подробный статус"""
@@ -239,6 +298,9 @@ class BotMonitor:
             detailed_text += f"Статус: {status}\n"
             if pid:
                 detailed_text += f"PID: {pid}\n"
+                resource_line = self.resources.format_line(bot_id)
+                if resource_line:
+                    detailed_text += resource_line + "\n"
             detailed_text += f"Путь: `{bot_config['path']}`\n\n"
         
         # Подробная системная информация
@@ -249,51 +311,126 @@ class BotMonitor:
             detailed_text += f"RAM: {system_info['memory_percent']:.1f}% ({system_info['memory_used_gb']:.1f}GB / {system_info['memory_total_gb']:.1f}GB)\n"
             detailed_text += f"Диск: {system_info['disk_percent']:.1f}% ({system_info['disk_used_gb']:.1f}GB / {system_info['disk_total_gb']:.1f}GB)\n"
         
+        render_stats = self.render.stats()
+        detailed_text += (
+            f"\n✏️ **Правки сообщений:** отправлено {render_stats['sent']}, "
+            f"пропущено {render_stats['skipped']}, объединено {render_stats['coalesced']}\n"
+        )
+        send_stats = self.sender.stats()
+        detailed_text += (
+            f"📤 **Отправка:** отправлено {send_stats['sent']}, в очереди {send_stats['queued']}, "
+            f"объединено {send_stats['batched']}, повторов {send_stats['retried']}\n"
+        )
+        detailed_text += self.router.format_stats()
+        
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data='refresh')]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             detailed_text,
             reply_markup=reply_markup,
             parse_mode='Markdown'
         )
     
+    def on_supervisor_event(self, message):
+        """Обновить статус сразу при запуске или падении бота"""
+        if message.get('event') in ('started', 'exited', 'stopped') and self.dashboards:
+            task = asyncio.create_task(self.refresh_status())
+            self.refresh_tasks.add(task)
+            task.add_done_callback(self.refresh_tasks.discard)
+    
+    async def refresh_status(self):
+        """Один расчет статуса на тик - и правка всех подписанных сообщений"""
+        if not self.dashboards or self.telegram_bot is None:
+            return
+        try:
+            # Поиск процессов и psutil не блокируют цикл событий
+            status_text, render_data, reply_markup = await asyncio.to_thread(self.build_status)
+            await self.dashboards.publish(
+                self.render, self.sender, self.telegram_bot, status_text,
+                screen='status', data=render_data, reply_markup=reply_markup, parse_mode='Markdown'
+            )
+        except Exception as e:
+            logger.error(f"Ошибка обновления статуса: {e}")
+    
     async def auto_update_status(self):
-        """Автоматическое обновление статуса"""
-        interval = self.config.get('monitoring', {}).get('update_interval', 30)
-        
-        while self.auto_update_enabled:
+        """Автоматическое обновление подписанных сообщений"""
+        while True:
             try:
-                await asyncio.sleep(interval)
-                if self.status_message and self.auto_update_enabled:
-                    await self.show_status(self.status_message)
+                # Интервал берется из текущего снимка конфига на каждом шаге
+                await asyncio.sleep(self.config.get('monitoring', {}).get('update_interval', 30))
+                await self.refresh_status()
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Ошибка автообновления: {e}")
                 await asyncio.sleep(5)
 
+def create_application(bot_monitor, builder=None):
+    """Приложение Telegram с обработчиками бота (builder задает хост-режим)"""
+    builder = builder or Application.builder()
+    application = builder.token(bot_monitor.config['bot_token']).build()
+    
+    # Добавляем обработчики
+    bot_monitor.router.set_admins(bot_monitor.config.get('admin_ids', []))
+    bot_monitor.router.add('refresh', bot_monitor.show_status)
+    bot_monitor.router.add('toggle_auto', bot_monitor.toggle_auto_update)
+    bot_monitor.router.add('detailed', bot_monitor.show_detailed_status)
+    application.add_handler(CommandHandler("start", bot_monitor.router.command('start', bot_monitor.start_command)))
+    application.add_handler(CallbackQueryHandler(bot_monitor.router.dispatch))
+    # Сбои в обработчиках - в хранилище сбоев бота
+    application.add_error_handler(crash_store.error_handler)
+    return application
+
+def start_background_tasks(bot_monitor, application):
+    """Фоновые задачи бота (вызывать внутри работающего цикла событий)"""
+    # Фоновый сбор метрик
+    bot_monitor.metrics.interval = bot_monitor.config.get('monitoring', {}).get('sample_interval', 5)
+    bot_monitor.metrics.start()
+    
+    # Подписка на состояние ботов в демоне-супервизоре
+    socket_path = bot_monitor.config.get('monitoring', {}).get('supervisor_socket')
+    if socket_path:
+        bot_monitor.supervisor_view.path = socket_path
+    bot_monitor.supervisor_task = asyncio.create_task(bot_monitor.supervisor_view.run())
+    
+    # Учет ресурсов ботов для подробного статуса
+    interval = bot_monitor.config.get('monitoring', {}).get('resource_interval', 30)
+    bot_monitor.resource_task = asyncio.create_task(bot_monitor.resources.run(bot_monitor.bot_pids, interval))
+    
+    # Подписанные сообщения продолжают обновляться после перезапуска без /start
+    bot_monitor.telegram_bot = application.bot
+    bot_monitor.dashboards.path = bot_monitor.config.get('monitoring', {}).get('dashboards_file', 'dashboards.json')
+    bot_monitor.dashboards.load()
+    bot_monitor.monitoring_task = asyncio.create_task(bot_monitor.auto_update_status())
+
+    # Горячая перезагрузка config.json: обработчики читают неизменяемый снимок
+    bot_monitor.config = bot_monitor.config_store.prime(bot_monitor.config)
+    bot_monitor.config_store.subscribe(bot_monitor.apply_config)
+    bot_monitor.config_task = asyncio.create_task(bot_monitor.config_store.watch())
+
 async def main():
     """Главная функция"""
     try:
         # Создаем экземпляр бота
         bot_monitor = BotMonitor()
+        # Ротация и сжатие лога из конфига (в хост-режиме лог общий)
+        configure_logging(bot_monitor.config.get('logging'))
+        bot_monitor.config_store.subscribe(reload_logging)
         
         # Создаем приложение
-        application = Application.builder().token(bot_monitor.config['bot_token']).build()
-        
-        # Добавляем обработчики
-        application.add_handler(CommandHandler("start", bot_monitor.start_command))
-        application.add_handler(CallbackQueryHandler(bot_monitor.button_handler))
-        
-        # Запускаем автообновление если включено
-        if bot_monitor.auto_update_enabled:
-            bot_monitor.monitoring_task = asyncio.create_task(bot_monitor.auto_update_status())
+        application = create_application(bot_monitor)
+        start_background_tasks(bot_monitor, application)
         
         logger.info("Bot Monitor запущен!")
         
         # Запускаем бота
-        await application.run_polling(allowed_updates=Update.ALL_TYPES)
+        # Вебхук вместо long polling, если он включен в конфиге
+        if bot_monitor.config.get('webhook', {}).get('enabled'):
+            await run_webhook(application, bot_monitor.config['webhook'])
+        else:
+            await application.run_polling(allowed_updates=Update.ALL_TYPES)
         
     except Exception as e:
         logger.error(f"Критическая ошибка: {e}")
@@ -302,15 +439,10 @@ async def main():
         # Отправляем уведомление администраторам
         try:
             error_text = f"❌ **Ошибка Bot Monitor:**\n{str(e)}"
-            for admin_id in bot_monitor.config.get('admin_ids', []):
-                try:
-                    await application.bot.send_message(
-                        chat_id=admin_id,
-                        text=error_text,
-                        parse_mode='Markdown'
-                    )
-                except Exception as send_error:
-                    logger.error(f"Не удалось отправить уведомление админу {admin_id}: {send_error}")
+            await bot_monitor.sender.send_many(
+                application.bot, bot_monitor.config.get('admin_ids', []), error_text,
+                PRIORITY_ALERT, parse_mode='Markdown'
+            )
         except Exception as notify_error:
             logger.error(f"Ошибка отправки уведомления: {notify_error}")
 
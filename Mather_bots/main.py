@@ -4,27 +4,35 @@
 import asyncio
 import json
 import logging
-import subprocess
-import psutil
+import os
+import time
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
 
 import sys
-import traceback
 
-ERROR_LOG = 'errors.txt'
+# Общие модули лежат в корне проекта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.config import BASE_SCHEMA, NUMBER, REQUIRED, ConfigStore, has_changed, merge_schema
+from common.crashes import CrashStore, bot_crash_path, format_crash, top_crashes
+from common.logs import configure_logging, reload_logging, setup_logging
+from common.metrics import MetricsSampler
+from common.limits import LimitEnforcer, parse_limits
+from common.log_index import LogIndexer
+from common.resources import ResourceTracker
+from common.render_cache import RenderCache
+from common.router import Router, pack
+from common.sender import MessageSender, PRIORITY_ALERT
+from common.child_process import OutputBuffer, spawn_process, terminate_process, wait_until_ready
+from common.control import SupervisorClient, SupervisorView
+from common.supervisor import bot_dir_name
+from common.webhook import run_webhook
 
-def log_uncaught_exception(exc_type, exc_value, exc_traceback):
-    with open(ERROR_LOG, 'a', encoding='utf-8') as f:
-        f.write(f"\n{'='*40}\n")
-        f.write(f"Время: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"Тип: {exc_type.__name__}\n")
-        f.write(f"Ошибка: {exc_value}\n")
-        traceback.print_tb(exc_traceback, file=f)
-        f.write(f"{'='*40}\n")
-
-sys.excepthook = log_uncaught_exception
+# Необработанные исключения - в хранилище сбоев рядом с main.py:
+# одна запись на повторяющийся сбой вместо растущего errors.txt
+crash_store = CrashStore(bot_crash_path(__file__), bot='Manager Bot')
+crash_store.install()
 
 # Попробуем импортировать nest_asyncio для Windows/IDE
 try:
@@ -34,37 +42,105 @@ except ImportError:
     pass
 
 # Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler('manager.log'),
-        logging.StreamHandler()
-    ]
-)
+# Запись в файл и консоль идет в фоновом потоке, файл ротируется
+setup_logging('manager.log')
 logger = logging.getLogger(__name__)
 
+# Имена логов по папке бота (у бота в конфиге можно задать свой log_file)
+LOG_FILES = {
+    'Telescan_bot': 'telescan.log',
+    'MineServ_bot': 'mineserv.log',
+    'Mather_bots': 'manager.log',
+    'BotMonitor': 'bot_monitor.log'
+}
+
+# Проверка config.json при загрузке и горячей перезагрузке
+CONFIG_SCHEMA = merge_schema(BASE_SCHEMA, {
+    REQUIRED: {'bots'},
+    'bots': {'*': {
+        REQUIRED: {'name', 'path'},
+        'name': str,
+        'path': str,
+        'enabled': bool,
+        'auto_restart': bool,
+        'ready_pattern': str,
+        'output_log': str,
+        'log_file': str,
+        'limits': dict
+    }},
+    'monitoring': {
+        'auto_restart_delay': NUMBER,
+        'max_parallel': int,
+        'ready_timeout': NUMBER,
+        'resource_interval': NUMBER,
+        'log_index_interval': NUMBER,
+        'log_index_lines': int
+    }
+})
+LOG_PAGE_SIZE = 10
+LOG_LINE_LIMIT = 300
+
 class BotManager:
-    def __init__(self):
+    def __init__(self, config_path='config.json'):
+        self.config_path = config_path
         self.config = self.load_config()
+        self.config_store = ConfigStore(config_path, CONFIG_SCHEMA)
+        self.config_task = None
         self.bot_processes = {}
+        self.bot_readers = {}
+        self.bot_output = {}
         self.restart_attempts = {}
+        self.bot_locks = {}
+        self.metrics = MetricsSampler(interval=5)
+        # CPU, память, дескрипторы и потоки каждого запущенного бота
+        self.resources = ResourceTracker()
+        self.resource_task = None
+        # Бот, превысивший ограничения из конфига, мягко перезапускается
+        self.limit_enforcer = LimitEnforcer()
+        # Фоновые перезапуски по ограничениям: ссылки держим до завершения
+        self.restart_tasks = set()
+        # Правки сообщений без изменений не отправляются
+        self.render = RenderCache()
+        # Кнопки и команды - через таблицу маршрутов с замером задержек
+        self.router = Router()
+        # Исходящие сообщения - через общую очередь с лимитами Telegram
+        self.sender = MessageSender()
+        # Если запущен демон-супервизор (start_bots.py), процессами владеет он
+        self.supervisor = SupervisorClient()
+        self.supervisor_view = SupervisorView()
+        self.supervisor_task = None
+        # Индекс логов всех ботов для /logs и /tail
+        self.logs = LogIndexer()
+        self.log_task = None
+        self.log_searches = {}
+        self.next_search_id = 0
         
     def load_config(self):
         """Загрузка конфигурации"""
         try:
-            with open('config.json', 'r', encoding='utf-8') as f:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except FileNotFoundError:
-            logger.error("Файл config.json не найден!")
+            logger.error(f"Файл {self.config_path} не найден!")
             return {}
     
+    def apply_config(self, config, changed):
+        """Новый снимок конфига: новые боты и админы доступны сразу"""
+        self.config = config
+        if has_changed(changed, 'monitoring.sample_interval'):
+            self.metrics.interval = config.get('monitoring', {}).get('sample_interval', 5)
+        if has_changed(changed, 'admin_ids'):
+            self.router.set_admins(config.get('admin_ids', []))
+        if has_changed(changed, 'bots'):
+            self.logs.set_sources(self.log_sources())
+    
+    def check_config(self, config):
+        """Нельзя убрать из конфига бота, процесс которого еще запущен менеджером"""
+        bots = config.get('bots', {})
+        return [f"bots.{bot_id}: бот запущен, сначала остановите его" for bot_id in self.bot_processes if bot_id not in bots]
+    
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Команда /start"""
-        if update.effective_user.id not in self.config.get('admin_ids', []):
-            await update.message.reply_text("⛔ У вас нет доступа к этому боту!")
-            return
-        
         await self.show_main_menu(update.message)
     
     async def show_main_menu(self, message_or_query):
@@ -74,13 +150,15 @@ class BotManager:
             [InlineKeyboardButton("▶️ Запустить всех", callback_data='start_all')],
             [InlineKeyboardButton("⏹️ Остановить всех", callback_data='stop_all')],
             [InlineKeyboardButton("🔄 Перезапустить всех", callback_data='restart_all')],
-            [InlineKeyboardButton("📱 Система", callback_data='system')]
+            [InlineKeyboardButton("📱 Система", callback_data='system')],
+            [InlineKeyboardButton("💥 Частые сбои", callback_data='crashes')]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         text = "🤖 **Менеджер ботов**\n\nВыберите действие:"
         # Корректно обновляем меню
         if hasattr(message_or_query, 'edit_message_text'):
-            await message_or_query.edit_message_text(
+            await self.render.edit(
+                message_or_query,
                 text,
                 reply_markup=reply_markup,
                 parse_mode='Markdown'
@@ -98,116 +176,248 @@ class BotManager:
                 parse_mode='Markdown'
             )
     
-    async def button_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик inline кнопок"""
-        query = update.callback_query
-        await query.answer()
-        
-        if query.data == 'status':
-            await self.show_status(query)
-        elif query.data == 'start_all':
-            await self.start_all_bots(query)
-        elif query.data == 'stop_all':
-            await self.stop_all_bots(query)
-        elif query.data == 'restart_all':
-            await self.restart_all_bots(query)
-        elif query.data == 'system':
-            await self.show_system_info(query)
-        elif query.data == 'back_to_main':
-            await self.show_main_menu(query)
-        elif query.data.startswith('bot_'):
-            await self.handle_bot_action(query, context)
-    
     async def show_status(self, query):
         """Показать статус всех ботов с кнопками управления под каждым ботом"""
         status_text = "📊 **Статус ботов:**\n\n"
         keyboard = []
         for bot_id, bot_config in self.config.get('bots', {}).items():
-            is_running = bot_id in self.bot_processes and self.bot_processes[bot_id].poll() is None
+            is_running = self.is_bot_running(bot_id)
             status = "🟢 Работает" if is_running else "🔴 Остановлен"
             status_text += f"**{bot_config['name']}:** {status}\n"
+            resource_line = self.resources.format_line(bot_id) if is_running else ""
+            if resource_line:
+                status_text += resource_line + "\n"
             row = []
             if is_running:
-                row.append(InlineKeyboardButton("⏹️ Остановить", callback_data=f'bot_stop_{bot_id}'))
-                row.append(InlineKeyboardButton("🔄 Перезапустить", callback_data=f'bot_restart_{bot_id}'))
+                row.append(InlineKeyboardButton("⏹️ Остановить", callback_data=pack('bot', 'stop', bot_id)))
+                row.append(InlineKeyboardButton("🔄 Перезапустить", callback_data=pack('bot', 'restart', bot_id)))
             else:
-                row.append(InlineKeyboardButton("▶️ Запустить", callback_data=f'bot_start_{bot_id}'))
+                row.append(InlineKeyboardButton("▶️ Запустить", callback_data=pack('bot', 'start', bot_id)))
             keyboard.append(row)
         keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')])
         reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             status_text,
             reply_markup=reply_markup,
             parse_mode='Markdown'
         )
     
-    async def start_all_bots(self, query):
-        """Запустить всех ботов"""
-        started_count = 0
-        failed_bots = []
+    async def run_fleet_action(self, action, bot_ids):
+        """Выполнить действие над ботами параллельно с ограничением одновременности.
         
-        for bot_id, bot_config in self.config.get('bots', {}).items():
-            if not bot_config.get('enabled', True):
-                continue
-                
-            success, error = await self.start_bot(bot_id)
-            if success:
-                started_count += 1
-            else:
-                failed_bots.append(f"{bot_config['name']}: {error}")
+        Возвращает список (bot_id, success, message, elapsed) в порядке bot_ids.
+        """
+        limit = max(1, self.config.get('monitoring', {}).get('max_parallel', 4))
+        semaphore = asyncio.Semaphore(limit)
         
-        message = f"✅ Запущено ботов: {started_count}"
-        if failed_bots:
-            message += f"\n❌ Ошибки:\n" + "\n".join(failed_bots)
+        async def run_one(bot_id):
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    success, message = await action(bot_id)
+                except Exception as e:
+                    logger.error(f"Ошибка операции с ботом {bot_id}: {e}")
+                    success, message = False, str(e)
+                return bot_id, success, message, time.monotonic() - started
         
-        await query.edit_message_text(
-            message,
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
-        )
+        return await asyncio.gather(*(run_one(bot_id) for bot_id in bot_ids))
+    
+    def format_fleet_report(self, title, results, elapsed):
+        """Отчет по групповой операции с временем по каждому боту"""
+        bots = self.config.get('bots', {})
+        ok_count = sum(1 for _, success, _, _ in results if success)
+        slowest = max(results, key=lambda item: item[3])[0] if results else None
+        
+        lines = [f"{title}: {ok_count}/{len(results)} за {elapsed:.1f}с", ""]
+        for bot_id, success, message, bot_elapsed in results:
+            name = bots.get(bot_id, {}).get('name', bot_id)
+            line = f"{'✅' if success else '❌'} {name} — {bot_elapsed:.1f}с"
+            if message:
+                line += f" ({message})"
+            if bot_id == slowest and len(results) > 1:
+                line += " 🐢"
+            lines.append(line)
+        return "\n".join(lines)
+    
+    async def _fleet_operation(self, query, title, action, bot_ids):
+        """Выполнить групповую операцию и показать отчет"""
+        back_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
+        await self.render.edit(query, f"⏳ {title}...", screen='progress')
+        
+        started = time.monotonic()
+        results = await self.run_fleet_action(action, bot_ids)
+        report = self.format_fleet_report(title, results, time.monotonic() - started)
+        logger.info(report)
+        
+        await self.render.edit(query, report, reply_markup=back_markup)
+    
+    def enabled_bot_ids(self):
+        """Идентификаторы включенных ботов"""
+        return [bot_id for bot_id, bot_config in self.config.get('bots', {}).items()
+                if bot_config.get('enabled', True)]
+    
+    async def start_all_bots(self, query):
+        """Запустить всех ботов"""
+        await self._fleet_operation(query, "▶️ Запуск", self.start_bot, self.enabled_bot_ids())
+    
+    def running_bot_ids(self):
+        """Идентификаторы работающих ботов"""
+        return [bot_id for bot_id in self.config.get('bots', {}) if self.is_bot_running(bot_id)]
     
     async def stop_all_bots(self, query):
         """Остановить всех ботов"""
-        stopped_count = 0
-        for bot_id in list(self.bot_processes.keys()):
-            success, _ = await self.stop_bot(bot_id)
-            if success:
-                stopped_count += 1
-        
-        await query.edit_message_text(
-            f"⏹️ Остановлено ботов: {stopped_count}",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
-        )
+        await self._fleet_operation(query, "⏹️ Остановка", self.stop_bot, self.running_bot_ids())
     
     async def restart_all_bots(self, query):
         """Перезапустить всех ботов"""
-        await self.stop_all_bots(query)
-        await asyncio.sleep(2)
-        await self.start_all_bots(query)
+        bot_ids = list(dict.fromkeys(self.enabled_bot_ids() + self.running_bot_ids()))
+        await self._fleet_operation(query, "🔄 Перезапуск", self.restart_bot, bot_ids)
     
     async def show_system_info(self, query):
         """Показать информацию о системе"""
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        info = self.metrics.snapshot()
+        if not info:
+            await self.render.edit(
+                query,
+                "❌ Ошибка получения данных",
+                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
+            )
+            return
         
         system_info = f"""
 📱 **Информация о системе:**
 
-🖥️ **CPU:** {cpu_percent}%
-💾 **RAM:** {memory.percent}% ({memory.used // 1024 // 1024}MB / {memory.total // 1024 // 1024}MB)
-💿 **Диск:** {disk.percent}% ({disk.used // 1024 // 1024 // 1024}GB / {disk.total // 1024 // 1024 // 1024}GB)
+🖥️ **CPU:** {info['cpu_percent']}%
+💾 **RAM:** {info['memory_percent']}% ({info['memory_used_gb'] * 1024:.0f}MB / {info['memory_total_gb'] * 1024:.0f}MB)
+💿 **Диск:** {info['disk_percent']}% ({info['disk_used_gb']:.0f}GB / {info['disk_total_gb']:.0f}GB)
 ⏰ **Время:** {datetime.now().strftime('%H:%M:%S')}
         """
+        system_info += self.router.format_stats()
         
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             system_info,
             reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]]),
             parse_mode='Markdown'
         )
     
-    async def handle_bot_action(self, query, context):
+    def log_sources(self):
+        """Логи ботов: {имя для /logs: путь}"""
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        sources = {
+            'manager': os.path.join(current_dir, LOG_FILES['Mather_bots']),
+            'monitor': os.path.join(os.path.dirname(current_dir), 'BotMonitor', LOG_FILES['BotMonitor'])
+        }
+        for bot_id, bot_config in self.config.get('bots', {}).items():
+            log_file = bot_config.get('log_file') or LOG_FILES.get(bot_dir_name(bot_config['path']))
+            if log_file:
+                bot_dir = os.path.dirname(os.path.abspath(os.path.join(current_dir, bot_config['path'])))
+                sources[bot_id] = os.path.join(bot_dir, log_file)
+        return sources
+    
+    async def logs_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Команда /logs <бот> <запрос> - поиск по логу бота"""
+        if len(context.args) < 2 or context.args[0] not in self.logs.indexes:
+            await update.message.reply_text(
+                f"Использование: /logs <бот> <слова>\nБоты: {', '.join(self.logs.indexes)}"
+            )
+            return
+        # Запрос хранится у менеджера: в callback_data помещается только номер
+        search_id = self.next_search_id
+        self.next_search_id += 1
+        self.log_searches[search_id] = (context.args[0], ' '.join(context.args[1:]))
+        if len(self.log_searches) > 100:
+            del self.log_searches[next(iter(self.log_searches))]
+        text, markup = await self.render_log_search(search_id, 0)
+        await update.message.reply_text(text, reply_markup=markup)
+    
+    async def tail_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Команда /tail <бот> [строк] - последние строки лога бота"""
+        if not context.args or context.args[0] not in self.logs.indexes:
+            await update.message.reply_text(
+                f"Использование: /tail <бот> [строк]\nБоты: {', '.join(self.logs.indexes)}"
+            )
+            return
+        count = int(context.args[1]) if len(context.args) > 1 and context.args[1].isdigit() else 20
+        text, markup = await self.render_log_tail(context.args[0], min(count, 100))
+        await update.message.reply_text(text, reply_markup=markup)
+    
+    async def render_log_search(self, search_id, page):
+        """Страница результатов поиска: (текст, кнопки)"""
+        if search_id not in self.log_searches:
+            return "⌛ Поиск устарел, повторите /logs", None
+        bot, query_text = self.log_searches[search_id]
+        index = self.logs.indexes[bot]
+        # Дочитываем новые строки, чтобы найти и только что записанное
+        await asyncio.to_thread(index.update)
+        started = time.perf_counter()
+        lines, total = index.search(query_text, page, LOG_PAGE_SIZE)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        pages = max(1, (total + LOG_PAGE_SIZE - 1) // LOG_PAGE_SIZE)
+        text = f"🔎 {bot}: «{query_text}» — найдено {total} (стр. {page + 1}/{pages}, {elapsed_ms:.1f} мс)"
+        if lines:
+            text += "\n\n" + "\n".join(line[:LOG_LINE_LIMIT] for line in lines)
+        buttons = []
+        if page > 0:
+            buttons.append(InlineKeyboardButton("◀️", callback_data=pack('logs', search_id, page - 1)))
+        if page + 1 < pages:
+            buttons.append(InlineKeyboardButton("▶️", callback_data=pack('logs', search_id, page + 1)))
+        return text, InlineKeyboardMarkup([buttons]) if buttons else None
+    
+    async def show_log_search(self, query, search_id, page):
+        """Кнопки листания результатов /logs"""
+        text, markup = await self.render_log_search(search_id, page)
+        await self.render.edit(query, text, reply_markup=markup)
+    
+    async def show_log_tail(self, query, count, bot):
+        """Кнопка обновления /tail"""
+        text, markup = await self.render_log_tail(bot, count)
+        await self.render.edit(query, text, reply_markup=markup)
+    
+    async def render_log_tail(self, bot, count):
+        """Последние строки лога: (текст, кнопки)"""
+        index = self.logs.indexes.get(bot)
+        if index is None:
+            return f"❌ Нет лога {bot}", None
+        await asyncio.to_thread(index.update)
+        lines = [line[:LOG_LINE_LIMIT] for line in index.tail(count)]
+        header = f"📜 {bot}: последние {len(lines)} строк\n\n"
+        # Сообщение Telegram не длиннее 4096 символов - отбрасываем старые строки
+        while lines and len(header) + sum(len(line) + 1 for line in lines) > 4096:
+            lines.pop(0)
+        text = header + ("\n".join(lines) if lines else "(лог пуст)")
+        markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔄 Обновить", callback_data=pack('tail', count, bot))]])
+        return text, markup
+    
+    def crash_sources(self):
+        """Файлы сбоев: {имя бота: путь} для менеджера и управляемых ботов"""
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        sources = {'Manager Bot': crash_store.path}
+        for bot_id, bot_config in self.config.get('bots', {}).items():
+            bot_path = os.path.join(current_dir, bot_config['path'])
+            sources[bot_config.get('name', bot_id)] = bot_crash_path(bot_path)
+        return sources
+    
+    async def show_crashes(self, query):
+        """Показать самые частые сбои всех ботов"""
+        crash_store.flush()
+        crashes = await asyncio.to_thread(top_crashes, self.crash_sources(), 10)
+        if crashes:
+            text = "💥 Частые сбои:\n\n" + "\n\n".join(format_crash(entry) for entry in crashes)
+        else:
+            text = "✅ Сбоев не зафиксировано"
+        await self.render.edit(
+            query,
+            text,
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("🔄 Обновить", callback_data='crashes')],
+                [InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]
+            ])
+        )
+    
+    async def handle_bot_action(self, query, context, action, bot_id):
         """Обработка действий с конкретным ботом"""
-        action, bot_id = query.data.split('_', 2)[1:]
         error_message = None
         if action == 'start':
             success, error_message = await self.start_bot(bot_id, context)
@@ -220,16 +430,110 @@ class BotManager:
         # Если была ошибка — отправляем админу
         if error_message:
             for admin_id in self.config.get('admin_ids', []):
-                await context.bot.send_message(admin_id, f"Ошибка: {error_message}")
+                self.sender.send(context.bot, admin_id, f"Ошибка: {error_message}", priority=PRIORITY_ALERT)
 
+    def daemon_bot_id(self, bot_id):
+        """Идентификатор бота в супервизоре, если демон запущен и знает этого бота"""
+        if not self.supervisor_view.connected:
+            return None
+        daemon_id = bot_dir_name(self.config['bots'][bot_id]['path'])
+        return daemon_id if daemon_id in self.supervisor_view.bots else None
+    
+    def is_bot_running(self, bot_id):
+        """Проверить, работает ли процесс бота"""
+        daemon_id = self.daemon_bot_id(bot_id)
+        if daemon_id:
+            return self.supervisor_view.get(daemon_id)['running']
+        process = self.bot_processes.get(bot_id)
+        return process is not None and process.returncode is None
+    
+    def bot_pids(self):
+        """PID запущенных ботов: {bot_id: pid или None}"""
+        pids = {}
+        for bot_id in self.config.get('bots', {}):
+            daemon_id = self.daemon_bot_id(bot_id)
+            if daemon_id:
+                pids[bot_id] = self.supervisor_view.get(daemon_id)['pid']
+            else:
+                process = self.bot_processes.get(bot_id)
+                pids[bot_id] = process.pid if process is not None and process.returncode is None else None
+        return pids
+    
+    def check_limits(self, samples):
+        """Перезапустить ботов, превысивших ограничения ресурсов.
+        
+        Ботами демона-супервизора занимается сам демон.
+        """
+        local = {bot_id: sample for bot_id, sample in samples.items() if not self.daemon_bot_id(bot_id)}
+        limits = {
+            bot_id: parse_limits(bot_config.get('limits'))
+            for bot_id, bot_config in self.config.get('bots', {}).items()
+        }
+        for bot_id, reason in self.limit_enforcer.check(local, limits):
+            logger.warning(f"Бот {bot_id} превысил ограничения ({reason}), перезапуск")
+            task = asyncio.create_task(self.restart_over_limit(bot_id))
+            self.restart_tasks.add(task)
+            task.add_done_callback(self.restart_tasks.discard)
+    
+    async def restart_over_limit(self, bot_id):
+        """Перезапуск бота, превысившего ограничения, с записью ошибки в лог"""
+        try:
+            success, message = await self.restart_bot(bot_id)
+        except Exception as e:
+            logger.error(f"Ошибка перезапуска бота {bot_id} по ограничениям: {e}")
+            return
+        if not success:
+            logger.error(f"Бот {bot_id} не перезапущен по ограничениям: {message}")
+    
+    async def supervisor_request(self, cmd, bot_id, daemon_id):
+        """Команда демону-супервизору. Возвращает (success, message)"""
+        params = {}
+        if cmd in ('start', 'restart'):
+            params['ready_pattern'] = self.config['bots'][bot_id].get('ready_pattern', 'запущен')
+            params['ready_timeout'] = self.config.get('monitoring', {}).get('ready_timeout', 15)
+        try:
+            response = await self.supervisor.request(cmd, bot=daemon_id, **params)
+        except (ConnectionError, OSError, asyncio.TimeoutError) as e:
+            logger.error(f"Ошибка запроса к супервизору ({cmd} {bot_id}): {e}")
+            return False, str(e)
+        if response.get('state'):
+            self.supervisor_view.bots[daemon_id] = response['state']
+        return response.get('ok', False), response.get('error')
+    
+    def get_output_buffer(self, bot_id):
+        """Буфер вывода бота (создается при первом запуске)"""
+        if bot_id not in self.bot_output:
+            bot_config = self.config['bots'][bot_id]
+            log_path = bot_config.get('output_log')
+            if log_path:
+                current_dir = os.path.dirname(os.path.abspath(__file__))
+                log_path = os.path.abspath(os.path.join(current_dir, log_path))
+            self.bot_output[bot_id] = OutputBuffer(
+                max_lines=self.config.get('monitoring', {}).get('output_lines', 200),
+                log_path=log_path
+            )
+        return self.bot_output[bot_id]
+    
+    def get_bot_lock(self, bot_id):
+        """Блокировка, не дающая параллельно запускать и останавливать одного бота"""
+        if bot_id not in self.bot_locks:
+            self.bot_locks[bot_id] = asyncio.Lock()
+        return self.bot_locks[bot_id]
+    
     async def start_bot(self, bot_id, context=None):
         """Запустить конкретного бота универсально"""
-        import os, sys
+        daemon_id = self.daemon_bot_id(bot_id)
+        if daemon_id:
+            return await self.supervisor_request('start', bot_id, daemon_id)
+        async with self.get_bot_lock(bot_id):
+            return await self._start_bot(bot_id)
+    
+    async def _start_bot(self, bot_id):
         try:
             bot_config = self.config['bots'][bot_id]
             
             # Проверяем, не запущен ли уже бот
-            if bot_id in self.bot_processes and self.bot_processes[bot_id].poll() is None:
+            if self.is_bot_running(bot_id):
                 logger.info(f"Бот {bot_id} уже запущен")
                 return True, "Уже запущен"
             
@@ -248,32 +552,40 @@ class BotManager:
                 logger.error(error)
                 return False, error
             
-            # Используем sys.executable для универсального запуска
-            python_exec = sys.executable
+            # Вывод бота постоянно вычитывается в ограниченный буфер,
+            # чтобы дочерний процесс не встал на переполненном pipe
+            output = self.get_output_buffer(bot_id)
+            process, reader_task = await spawn_process(
+                [sys.executable, bot_path],
+                output,
+                cwd=os.path.dirname(bot_path),
+                limits=parse_limits(bot_config.get('limits')),
+                name=bot_id
+            )
+            self.bot_processes[bot_id] = process
+            self.bot_readers[bot_id] = reader_task
             
-            # Запускаем процесс в зависимости от ОС
-            if os.name == 'nt':  # Windows
-                process = subprocess.Popen(
-                    [python_exec, bot_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    creationflags=subprocess.CREATE_NEW_CONSOLE
-                )
-            else:  # Linux/Android (Termux)
-                process = subprocess.Popen(
-                    [python_exec, bot_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE
-                )
+            # Ждем строку готовности вместо фиксированной паузы
+            readiness = await wait_until_ready(
+                process,
+                output,
+                bot_config.get('ready_pattern', 'запущен'),
+                timeout=self.config.get('monitoring', {}).get('ready_timeout', 15)
+            )
             
-            # Проверяем, что процесс запустился успешно
-            if process.poll() is not None:
-                error = f"Процесс завершился сразу после запуска"
+            if readiness == 'exited':
+                last_line = output.tail(1)
+                error = f"Процесс завершился сразу после запуска (код {process.returncode})"
+                if last_line:
+                    error += f": {last_line[0]}"
                 logger.error(f"Ошибка запуска бота {bot_id}: {error}")
+                del self.bot_processes[bot_id]
+                self.bot_readers.pop(bot_id, None)
                 return False, error
             
-            self.bot_processes[bot_id] = process
             logger.info(f"Бот {bot_id} запущен (PID: {process.pid})")
+            if readiness == 'timeout':
+                return True, "готовность не подтверждена"
             return True, None
             
         except Exception as e:
@@ -281,13 +593,26 @@ class BotManager:
             return False, str(e)
     
     async def stop_bot(self, bot_id, context=None):
+        daemon_id = self.daemon_bot_id(bot_id)
+        if daemon_id:
+            return await self.supervisor_request('stop', bot_id, daemon_id)
+        async with self.get_bot_lock(bot_id):
+            return await self._stop_bot(bot_id)
+    
+    async def _stop_bot(self, bot_id):
         try:
             if bot_id in self.bot_processes:
                 process = self.bot_processes[bot_id]
-                if process.poll() is None:
-                    process.terminate()
-                    process.wait(timeout=5)
+                if await terminate_process(process, timeout=5):
+                    logger.warning(f"Бот {bot_id} остановлен принудительно")
                 del self.bot_processes[bot_id]
+                reader_task = self.bot_readers.pop(bot_id, None)
+                if reader_task:
+                    # Внук процесса может держать pipe открытым - не ждем вечно
+                    try:
+                        await asyncio.wait_for(reader_task, timeout=2)
+                    except asyncio.TimeoutError:
+                        pass
                 logger.info(f"Бот {bot_id} остановлен")
                 return True, None
             return False, "Процесс не найден"
@@ -296,24 +621,90 @@ class BotManager:
             return False, str(e)
     
     async def restart_bot(self, bot_id, context=None):
-        await self.stop_bot(bot_id, context)
-        await asyncio.sleep(2)
-        return await self.start_bot(bot_id, context)
+        daemon_id = self.daemon_bot_id(bot_id)
+        if daemon_id:
+            return await self.supervisor_request('restart', bot_id, daemon_id)
+        # stop_bot дожидается завершения процесса, поэтому пауза не нужна
+        async with self.get_bot_lock(bot_id):
+            await self._stop_bot(bot_id)
+            return await self._start_bot(bot_id)
+
+def create_application(manager, builder=None):
+    """Приложение Telegram с обработчиками бота (builder задает хост-режим)"""
+    builder = builder or Application.builder()
+    # concurrent_updates: групповые операции не блокируют кнопки других админов
+    application = builder.token(manager.config['bot_token']).concurrent_updates(True).build()
+    
+    # Добавление обработчиков
+    manager.router.set_admins(manager.config.get('admin_ids', []))
+    manager.router.add('status', manager.show_status)
+    manager.router.add('start_all', manager.start_all_bots)
+    manager.router.add('stop_all', manager.stop_all_bots)
+    manager.router.add('restart_all', manager.restart_all_bots)
+    manager.router.add('system', manager.show_system_info)
+    manager.router.add('crashes', manager.show_crashes)
+    manager.router.add('back_to_main', manager.show_main_menu)
+    # Идентификатор бота - последний аргумент, он забирает остаток callback_data
+    manager.router.add('bot', manager.handle_bot_action, str, str, pass_context=True)
+    manager.router.add('logs', manager.show_log_search, int, int)
+    manager.router.add('tail', manager.show_log_tail, int, str)
+    application.add_handler(CommandHandler("start", manager.router.command('start', manager.start_command)))
+    application.add_handler(CommandHandler("logs", manager.router.command('logs', manager.logs_command)))
+    application.add_handler(CommandHandler("tail", manager.router.command('tail', manager.tail_command)))
+    application.add_handler(CallbackQueryHandler(manager.router.dispatch))
+    # Сбои в обработчиках - в хранилище сбоев бота
+    application.add_error_handler(crash_store.error_handler)
+    return application
+
+def start_background_tasks(manager, application):
+    """Фоновые задачи бота (вызывать внутри работающего цикла событий)"""
+    # Фоновый сбор метрик
+    manager.metrics.interval = manager.config.get('monitoring', {}).get('sample_interval', 5)
+    manager.metrics.start()
+    
+    # Подписка на состояние ботов в демоне-супервизоре
+    socket_path = manager.config.get('monitoring', {}).get('supervisor_socket')
+    if socket_path:
+        manager.supervisor.path = manager.supervisor_view.path = socket_path
+    manager.supervisor_task = asyncio.create_task(manager.supervisor_view.run())
+    
+    # Учет ресурсов ботов для экрана статуса
+    interval = manager.config.get('monitoring', {}).get('resource_interval', 30)
+    manager.resource_task = asyncio.create_task(
+        manager.resources.run(manager.bot_pids, interval, on_sample=manager.check_limits)
+    )
+    
+    # Инкрементальная индексация логов ботов для /logs и /tail
+    manager.logs.max_lines = manager.config.get('monitoring', {}).get('log_index_lines', 20000)
+    manager.logs.set_sources(manager.log_sources())
+    manager.log_task = asyncio.create_task(
+        manager.logs.run(manager.config.get('monitoring', {}).get('log_index_interval', 5))
+    )
+
+    # Горячая перезагрузка config.json: обработчики читают неизменяемый снимок
+    manager.config = manager.config_store.prime(manager.config)
+    manager.config_store.subscribe(manager.apply_config)
+    manager.config_store.add_check(manager.check_config)
+    manager.config_task = asyncio.create_task(manager.config_store.watch())
 
 async def main():
     """Основная функция"""
     manager = BotManager()
+    # Ротация и сжатие лога из конфига (в хост-режиме лог общий)
+    configure_logging(manager.config.get('logging'))
+    manager.config_store.subscribe(reload_logging)
     
     # Создание приложения
-    application = Application.builder().token(manager.config['bot_token']).build()
-    
-    # Добавление обработчиков
-    application.add_handler(CommandHandler("start", manager.start_command))
-    application.add_handler(CallbackQueryHandler(manager.button_handler))
+    application = create_application(manager)
+    start_background_tasks(manager, application)
     
     # Запуск бота
     logger.info("Менеджер ботов запущен")
-    await application.run_polling()
+    # Вебхук вместо long polling, если он включен в конфиге
+    if manager.config.get('webhook', {}).get('enabled'):
+        await run_webhook(application, manager.config['webhook'])
+    else:
+        await application.run_polling()
 
 if __name__ == '__main__':
     import sys
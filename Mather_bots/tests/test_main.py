@@ -6,12 +6,12 @@ import json
 import os
 import sys
 import tempfile
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 
 # Добавляем путь к родительской папке для импорта main
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-class TestBotManager(unittest.TestCase):
+class TestBotManager(unittest.IsolatedAsyncioTestCase):
     
     def setUp(self):
         """Настройка перед каждым тестом"""
@@ -114,14 +114,15 @@ class TestBotManager(unittest.TestCase):
         self.assertEqual(manager.restart_attempts, {})
     
     @patch('os.path.exists')
-    @patch('subprocess.Popen')
-    def test_start_bot_success(self, mock_popen, mock_exists):
+    @patch('main.wait_until_ready', new_callable=AsyncMock, return_value='ready')
+    @patch('main.spawn_process', new_callable=AsyncMock)
+    async def test_start_bot_success(self, mock_spawn, mock_ready, mock_exists):
         """Тест успешного запуска бота"""
         mock_exists.return_value = True
         mock_process = MagicMock()
-        mock_process.poll.return_value = None  # Процесс запущен
+        mock_process.returncode = None  # Процесс запущен
         mock_process.pid = 12345
-        mock_popen.return_value = mock_process
+        mock_spawn.return_value = (mock_process, None)
         
         from main import BotManager
         manager = BotManager()
@@ -134,7 +135,7 @@ class TestBotManager(unittest.TestCase):
         self.assertIn('telescan', manager.bot_processes)
     
     @patch('os.path.exists')
-    def test_start_bot_file_not_found(self, mock_exists):
+    async def test_start_bot_file_not_found(self, mock_exists):
         """Тест запуска бота с несуществующим файлом"""
         mock_exists.return_value = False
         
@@ -147,7 +148,7 @@ class TestBotManager(unittest.TestCase):
         self.assertFalse(success)
         self.assertIn('не найден', error)
     
-    def test_stop_bot_success(self):
+    async def test_stop_bot_success(self):
         """Тест успешной остановки бота"""
         from main import BotManager
         manager = BotManager()
@@ -155,7 +156,8 @@ class TestBotManager(unittest.TestCase):
         
         # Создаем мок процесса
         mock_process = MagicMock()
-        mock_process.poll.return_value = None  # Процесс запущен
+        mock_process.returncode = None  # Процесс запущен
+        mock_process.wait = AsyncMock(return_value=0)
         manager.bot_processes['telescan'] = mock_process
         
         success, error = await manager.stop_bot('telescan')
@@ -163,8 +165,9 @@ class TestBotManager(unittest.TestCase):
         self.assertTrue(success)
         self.assertIsNone(error)
         self.assertNotIn('telescan', manager.bot_processes)
+        mock_process.terminate.assert_called_once()
     
-    def test_stop_bot_not_found(self):
+    async def test_stop_bot_not_found(self):
         """Тест остановки несуществующего бота"""
         from main import BotManager
         manager = BotManager()
@@ -175,6 +178,93 @@ class TestBotManager(unittest.TestCase):
         self.assertFalse(success)
         self.assertIn('не найден', error)
     
+    @patch('os.path.exists', return_value=True)
+    @patch('main.wait_until_ready', new_callable=AsyncMock, return_value='exited')
+    @patch('main.spawn_process', new_callable=AsyncMock)
+    async def test_start_bot_exits_immediately(self, mock_spawn, mock_ready, mock_exists):
+        """Тест: бот, упавший до готовности, считается не запущенным"""
+        mock_process = MagicMock()
+        mock_process.returncode = 1
+        mock_spawn.return_value = (mock_process, None)
+        
+        from main import BotManager
+        manager = BotManager()
+        manager.config = self.test_config
+        
+        success, error = await manager.start_bot('telescan')
+        
+        self.assertFalse(success)
+        self.assertIn('завершился', error)
+        self.assertNotIn('telescan', manager.bot_processes)
+    
+    async def test_fleet_action_runs_in_parallel(self):
+        """Тест параллельного выполнения групповой операции"""
+        import asyncio
+        import time
+        from main import BotManager
+        manager = BotManager()
+        manager.config = self.test_config
+        
+        async def slow_action(bot_id):
+            await asyncio.sleep(0.2)
+            return True, None
+        
+        started = time.monotonic()
+        results = await manager.run_fleet_action(slow_action, ['telescan', 'mineserv'])
+        elapsed = time.monotonic() - started
+        
+        self.assertLess(elapsed, 0.35)
+        self.assertEqual([item[0] for item in results], ['telescan', 'mineserv'])
+        self.assertTrue(all(item[1] for item in results))
+        
+        report = manager.format_fleet_report("🔄 Перезапуск", results, elapsed)
+        self.assertIn("2/2", report)
+        self.assertIn("Telescan Bot", report)
+    
+    async def test_fleet_action_respects_limit(self):
+        """Тест ограничения одновременных операций"""
+        import asyncio
+        from main import BotManager
+        manager = BotManager()
+        manager.config = dict(self.test_config, monitoring={'max_parallel': 1})
+        active = []
+        peak = []
+        
+        async def action(bot_id):
+            active.append(bot_id)
+            peak.append(len(active))
+            await asyncio.sleep(0.01)
+            active.remove(bot_id)
+            return False, "ошибка"
+        
+        results = await manager.run_fleet_action(action, ['telescan', 'mineserv'])
+        
+        self.assertEqual(max(peak), 1)
+        self.assertFalse(any(item[1] for item in results))
+    
+    @patch('main.spawn_process', new_callable=AsyncMock)
+    async def test_daemon_owns_processes(self, mock_spawn):
+        """Тест: при запущенном супервизоре менеджер не создает процессы сам"""
+        from main import BotManager
+        manager = BotManager()
+        manager.config = self.test_config
+        manager.supervisor_view.connected = True
+        manager.supervisor_view.bots = {'Telescan_bot': {'running': False, 'pid': None}}
+        manager.supervisor.request = AsyncMock(return_value={
+            'ok': True, 'error': None, 'state': {'running': True, 'pid': 4242}
+        })
+        
+        success, message = await manager.start_bot('telescan')
+        
+        self.assertTrue(success)
+        mock_spawn.assert_not_called()
+        manager.supervisor.request.assert_awaited_once_with(
+            'start', bot='Telescan_bot', ready_pattern='запущен', ready_timeout=15
+        )
+        self.assertTrue(manager.is_bot_running('telescan'))
+        # Бот, которого демон не знает, по-прежнему управляется менеджером
+        self.assertIsNone(manager.daemon_bot_id('mineserv'))
+    
     def test_monitoring_config_validation(self):
         """Тест валидации конфигурации мониторинга"""
         from main import BotManager
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+SECTOR = 4096
+REGION_HEADER = 2 * SECTOR
+BLOCK_SIZE = 1024 * 1024
+SKIP_FILES = {'session.lock'}
+
+
+def region_ranges(data):
+    """Диапазоны байт region-файла (.mca): заголовок, чанки и промежутки между ними.
+
+    Каждый чанк мира становится отдельным куском, поэтому при изменении
+    одного чанка в хранилище попадает только он.
+    """
+    if len(data) < REGION_HEADER:
+        return [(0, len(data))] if data else []
+    extents = []
+    for index in range(1024):
+        entry = struct.unpack_from('>I', data, index * 4)[0]
+        offset, count = (entry >> 8) * SECTOR, (entry & 0xFF) * SECTOR
+        if count and offset >= REGION_HEADER and offset < len(data):
+            extents.append((offset, min(offset + count, len(data))))
+    extents.sort()
+
+    ranges = [(0, REGION_HEADER)]
+    position = REGION_HEADER
+    for start, end in extents:
+        if start < position:
+            continue  # поврежденная таблица: пересекающиеся чанки
+        if start > position:
+            ranges.append((position, start))
+        ranges.append((start, end))
+        position = end
+    if position < len(data):
+        ranges.append((position, len(data)))
+    return ranges
+
+
+def split_file(name, data):
+    """Разбить содержимое файла на куски для дедупликации"""
+    if name.endswith('.mca'):
+        return region_ranges(data)
+    return [(start, min(start + BLOCK_SIZE, len(data))) for start in range(0, len(data), BLOCK_SIZE)]
+
+
+def object_path(store_dir, digest):
+    return os.path.join(store_dir, 'objects', digest[:2], digest)
+
+
+def pack_file(path, store_dir, level=6):
+    """Сохранить недостающие куски файла в хранилище.
+
+    Выполняется в рабочем процессе: чтение, хеширование и сжатие не
+    занимают цикл событий бота. Возвращает (список хешей, записано байт).
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    chunks = []
+    written = 0
+    for start, end in split_file(path, data):
+        piece = data[start:end]
+        digest = hashlib.sha256(piece).hexdigest()
+        chunks.append(digest)
+        target = object_path(store_dir, digest)
+        if os.path.exists(target):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        packed = zlib.compress(piece, level)
+        temp = f"{target}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(packed)
+        os.replace(temp, target)
+        written += len(packed)
+    return chunks, written
+
+
+def unpack_file(chunks, target, store_dir):
+    """Собрать файл из кусков хранилища"""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as f:
+        for digest in chunks:
+            with open(object_path(store_dir, digest), 'rb') as obj:
+                f.write(zlib.decompress(obj.read()))
+
+
+def restore_files(files, target_dir, store_dir):
+    """Собрать все файлы снимка в target_dir (для рабочего процесса)"""
+    for relpath, entry in files.items():
+        target = os.path.join(target_dir, relpath)
+        unpack_file(entry['chunks'], target, store_dir)
+        os.utime(target, ns=(entry['mtime_ns'], entry['mtime_ns']))
+    return len(files)
+
+
+class WorldBackup:
+    """Инкрементальные бэкапы мира с дедупликацией по содержимому.
+
+    Хранилище ``store_dir`` содержит objects/ (сжатые куски, имя - sha256
+    содержимого) и snapshots/ (манифесты: файл -> список кусков). Region-файлы
+    режутся по чанкам, остальные - блоками по 1 МБ. Файлы с прежними размером
+    и mtime не читаются вовсе, их куски берутся из прошлого снимка.
+    """
+
+    def __init__(self, store_dir, server_dir, worlds=('world',), executor=None, compression_level=6):
+        self.store_dir = os.path.abspath(store_dir)
+        self.server_dir = os.path.abspath(server_dir)
+        self.worlds = tuple(worlds)
+        self.compression_level = compression_level
+        self._executor = executor
+        self._lock = asyncio.Lock()
+
+    def get_executor(self):
+        """Пул из одного рабочего процесса для сжатия"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1)
+        return self._executor
+
+    def close(self):
+        """Остановить рабочий процесс"""
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def list_snapshots(self):
+        """Идентификаторы снимков от старых к новым"""
+        snapshots_dir = os.path.join(self.store_dir, 'snapshots')
+        if not os.path.isdir(snapshots_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(snapshots_dir) if name.endswith('.json'))
+
+    def load_snapshot(self, snapshot_id):
+        """Манифест снимка"""
+        with open(os.path.join(self.store_dir, 'snapshots', f"{snapshot_id}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    async def create(self, send_command=None):
+        """Создать снимок.
+
+        ``send_command`` - асинхронная функция для консоли сервера. Если она
+        задана, на время копирования запись мира отключается (save-off),
+        перед копированием данные сбрасываются на диск (save-all flush), а в
+        конце запись включается обратно (save-on).
+        """
+        async with self._lock:
+            started = time.time()
+            if send_command:
+                await send_command('save-off')
+            try:
+                if send_command:
+                    await send_command('save-all flush')
+                manifest = await self._collect()
+            finally:
+                if send_command:
+                    try:
+                        await send_command('save-on')
+                    except Exception as e:
+                        logger.error(f"Не удалось включить сохранение мира: {e}")
+
+            snapshot_id = time.strftime('%Y%m%d-%H%M%S', time.localtime(started))
+            existing = self.list_snapshots()
+            if existing and existing[-1] >= snapshot_id:
+                snapshot_id = f"{existing[-1]}-1"
+            manifest['id'] = snapshot_id
+            manifest['created'] = started
+            manifest['duration'] = time.time() - started
+            self._write_manifest(snapshot_id, manifest)
+            logger.info(
+                f"Бэкап {snapshot_id}: {len(manifest['files'])} файлов, "
+                f"изменено {manifest['changed_files']}, записано {manifest['written_bytes']} байт"
+            )
+            return manifest
+
+    async def _collect(self):
+        previous = {}
+        snapshots = self.list_snapshots()
+        if snapshots:
+            previous = self.load_snapshot(snapshots[-1])['files']
+
+        loop = asyncio.get_running_loop()
+        files = {}
+        changed = 0
+        written = 0
+        for relpath, path, stat in self._walk():
+            old = previous.get(relpath)
+            if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+                files[relpath] = old
+                continue
+            chunks, size = await loop.run_in_executor(
+                self.get_executor(), pack_file, path, self.store_dir, self.compression_level
+            )
+            files[relpath] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'chunks': chunks}
+            changed += 1
+            written += size
+        return {'files': files, 'changed_files': changed, 'written_bytes': written}
+
+    def _walk(self):
+        for world in self.worlds:
+            root = os.path.join(self.server_dir, world)
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    if filename in SKIP_FILES:
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield os.path.relpath(path, self.server_dir).replace(os.sep, '/'), path, stat
+
+    def _write_manifest(self, snapshot_id, manifest):
+        snapshots_dir = os.path.join(self.store_dir, 'snapshots')
+        os.makedirs(snapshots_dir, exist_ok=True)
+        path = os.path.join(snapshots_dir, f"{snapshot_id}.json")
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(path + '.tmp', path)
+
+    async def restore(self, snapshot_id):
+        """Восстановить миры из снимка (сервер должен быть остановлен).
+
+        Файлы собираются во временную папку, затем текущий мир
+        переименовывается в <мир>.before-restore, а собранный занимает его место.
+        """
+        async with self._lock:
+            manifest = self.load_snapshot(snapshot_id)
+            staging = os.path.join(self.server_dir, '.restore-tmp')
+            shutil.rmtree(staging, ignore_errors=True)
+            loop = asyncio.get_running_loop()
+            count = await loop.run_in_executor(
+                self.get_executor(), restore_files, manifest['files'], staging, self.store_dir
+            )
+            for world in self.worlds:
+                current = os.path.join(self.server_dir, world)
+                previous = current + '.before-restore'
+                shutil.rmtree(previous, ignore_errors=True)
+                if os.path.exists(current):
+                    os.replace(current, previous)
+                restored = os.path.join(staging, world)
+                if os.path.exists(restored):
+                    os.replace(restored, current)
+            shutil.rmtree(staging, ignore_errors=True)
+            logger.info(f"Восстановлен бэкап {snapshot_id}: {count} файлов")
+            return count
+
+    def store_size(self):
+        """Размер хранилища кусков в байтах"""
+        return sum(size for _, size in self._objects().values())
+
+    async def summary(self, count=5):
+        """Сводка для экрана бэкапов: (все id, манифесты последних count, размер хранилища).
+
+        Чтение манифестов и обход objects/ идут в потоке, не в цикле событий.
+        """
+        return await asyncio.to_thread(self._summary, count)
+
+    def _summary(self, count):
+        snapshots = self.list_snapshots()
+        recent = [self.load_snapshot(snapshot_id) for snapshot_id in snapshots[-count:]] if count > 0 else []
+        return snapshots, recent, self.store_size()
+
+    async def prune(self, max_age_days=None, max_size_mb=None, now=None):
+        """Удалить старые снимки по возрасту и общему размеру и лишние куски.
+
+        Последний снимок не удаляется никогда. Возвращает список удаленных снимков.
+        """
+        async with self._lock:
+            return await asyncio.to_thread(self._prune, max_age_days, max_size_mb, now)
+
+    def _prune(self, max_age_days, max_size_mb, now):
+        # Манифесты читаются и objects/ обходится один раз; дальше размер
+        # хранилища уменьшается на куски, на которые больше никто не ссылается
+        now = time.time() if now is None else now
+        snapshots = self.list_snapshots()
+        manifests = {snapshot_id: self.load_snapshot(snapshot_id) for snapshot_id in snapshots}
+        chunks = {
+            snapshot_id: {digest for entry in manifest['files'].values() for digest in entry['chunks']}
+            for snapshot_id, manifest in manifests.items()
+        }
+        refs = {}
+        for used in chunks.values():
+            for digest in used:
+                refs[digest] = refs.get(digest, 0) + 1
+        objects = self._objects()
+        for name in [name for name in objects if name not in refs]:
+            self._remove_object(objects.pop(name))
+        total = sum(size for _, size in objects.values())
+        removed = []
+
+        if max_age_days is not None:
+            for snapshot_id in snapshots[:-1]:
+                if now - manifests[snapshot_id]['created'] > max_age_days * 86400:
+                    total -= self._drop_snapshot(snapshot_id, chunks, refs, objects)
+                    removed.append(snapshot_id)
+        snapshots = [s for s in snapshots if s not in removed]
+
+        if max_size_mb is not None:
+            while len(snapshots) > 1 and total > max_size_mb * 1024 * 1024:
+                snapshot_id = snapshots.pop(0)
+                total -= self._drop_snapshot(snapshot_id, chunks, refs, objects)
+                removed.append(snapshot_id)
+        return removed
+
+    def _objects(self):
+        """Файлы objects/: имя -> (путь, размер)"""
+        objects = {}
+        for dirpath, _, filenames in os.walk(os.path.join(self.store_dir, 'objects')):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                objects[filename] = (path, os.path.getsize(path))
+        return objects
+
+    def _drop_snapshot(self, snapshot_id, chunks, refs, objects):
+        """Удалить снимок и куски, оставшиеся без ссылок. Возвращает освобожденные байты"""
+        os.remove(os.path.join(self.store_dir, 'snapshots', f"{snapshot_id}.json"))
+        logger.info(f"Удален старый бэкап {snapshot_id}")
+        freed = 0
+        for digest in chunks.pop(snapshot_id):
+            refs[digest] -= 1
+            if refs[digest] == 0 and digest in objects:
+                freed += self._remove_object(objects.pop(digest))
+        return freed
+
+    def _remove_object(self, entry):
+        path, size = entry
+        os.remove(path)
+        return size
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+JOIN_RE = re.compile(r': (\w{1,16}) joined the game')
+LEAVE_RE = re.compile(r': (\w{1,16}) left the game')
+LAG_RE = re.compile(r"Can't keep up! .*?Running (\d+)ms or (\d+) ticks behind")
+DONE_RE = re.compile(r'Done \((\d+[.,]?\d*)s\)!')
+LIST_RE = re.compile(r'There are (\d+) of a max(?: of)? (\d+) players online:?(.*)')
+STOPPING_RE = re.compile(r'Stopping (?:the )?server')
+
+
+class ServerLogParser:
+    """Потоковый разбор строк лога сервера Minecraft.
+
+    Каждая строка разбирается один раз, счетчики обновляются на месте:
+    игроки онлайн, входы и выходы, предупреждения "Can't keep up" и
+    длительность запуска из строки "Done (...)!".
+    """
+
+    def __init__(self):
+        self.players = set()
+        self.max_players = None
+        self.peak_players = 0
+        self.joins = 0
+        self.leaves = 0
+        self.lag_warnings = 0
+        self.ticks_behind = 0
+        self.last_lag_ms = None
+        self.last_lag_at = None
+        self.startup_seconds = None
+        self.lines_parsed = 0
+
+    def reset(self):
+        """Сбросить состояние (новый запуск сервера)"""
+        self.__init__()
+
+    def feed(self, line):
+        """Разобрать одну строку"""
+        self.lines_parsed += 1
+
+        # Быстрый отсев: большинство строк не содержит ни одного маркера
+        if 'the game' in line:
+            match = JOIN_RE.search(line)
+            if match:
+                self.players.add(match.group(1))
+                self.joins += 1
+                self.peak_players = max(self.peak_players, len(self.players))
+                return
+            match = LEAVE_RE.search(line)
+            if match:
+                self.players.discard(match.group(1))
+                self.leaves += 1
+                return
+        elif "Can't keep up" in line:
+            match = LAG_RE.search(line)
+            self.lag_warnings += 1
+            self.last_lag_at = time.time()
+            if match:
+                self.last_lag_ms = int(match.group(1))
+                self.ticks_behind += int(match.group(2))
+        elif 'Done (' in line:
+            match = DONE_RE.search(line)
+            if match:
+                self.startup_seconds = float(match.group(1).replace(',', '.'))
+        elif 'players online' in line:
+            match = LIST_RE.search(line)
+            if match:
+                self.max_players = int(match.group(2))
+                names = [name.strip() for name in match.group(3).split(',') if name.strip()]
+                self.players = set(names)
+                self.peak_players = max(self.peak_players, int(match.group(1)))
+        elif STOPPING_RE.search(line):
+            self.players.clear()
+
+
+class LogTail:
+    """Инкрементальное чтение дописываемого файла (logs/latest.log).
+
+    Запоминает смещение и читает только новые байты. Если файл заменили
+    (другой inode) или укоротили, чтение начинается заново с начала, а
+    счетчик ``rotations`` увеличивается.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.rotations = 0
+        self._inode = None
+        self._pending = b''
+
+    def read_new(self):
+        """Новые полные строки с прошлого вызова"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return []
+
+        if stat.st_ino != self._inode or stat.st_size < self.offset:
+            if self._inode is not None:
+                self.rotations += 1
+            self._inode = stat.st_ino
+            self.offset = 0
+            self._pending = b''
+        if stat.st_size == self.offset:
+            return []
+
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read(stat.st_size - self.offset)
+        except OSError as e:
+            logger.error(f"Ошибка чтения {self.path}: {e}")
+            return []
+        self.offset += len(data)
+
+        *lines, self._pending = (self._pending + data).split(b'\n')
+        return [line.decode('utf-8', 'replace').rstrip('\r') for line in lines]
+
+
+def format_duration(seconds):
+    """Длительность в виде ЧЧ:ММ:СС (с днями, если больше суток)"""
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    text = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{days}д {text}" if days else text
@@ -6,13 +6,28 @@ import json
 import logging
 import os
 import subprocess
-import psutil
 import sys
-import traceback
+import time
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.helpers import escape_markdown
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
 
+# Общие модули лежат в корне проекта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.config import BASE_SCHEMA, NUMBER, REQUIRED, ConfigStore, has_changed, merge_schema
+from common.crashes import CrashStore, bot_crash_path
+from common.logs import configure_logging, reload_logging, setup_logging
+from common.metrics import MetricsSampler
+from common.render_cache import RenderCache
+from common.router import Router, pack
+from common.sender import MessageSender
+from common.webhook import run_webhook
+from server_process import MinecraftServer
+from log_parser import ServerLogParser, LogTail, format_duration
+from rcon import RconClient, RconAuthError
+from backup import WorldBackup
+
 # Попробуем импортировать nest_asyncio для Windows/IDE
 try:
     import nest_asyncio
@@ -21,39 +36,74 @@ except ImportError:
     pass
 
 # Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler('mineserv.log'),
-        logging.StreamHandler()
-    ]
-)
+# Запись в файл и консоль идет в фоновом потоке, файл ротируется
+setup_logging('mineserv.log')
 logger = logging.getLogger(__name__)
 
-ERROR_LOG = 'errors.txt'
-
-def log_uncaught_exception(exc_type, exc_value, exc_traceback):
-    with open(ERROR_LOG, 'a', encoding='utf-8') as f:
-        f.write(f"\n{'='*40}\n")
-        f.write(f"Время: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"Тип: {exc_type.__name__}\n")
-        f.write(f"Ошибка: {exc_value}\n")
-        traceback.print_tb(exc_traceback, file=f)
-        f.write(f"{'='*40}\n")
+# Проверка config.json при загрузке и горячей перезагрузке
+CONFIG_SCHEMA = merge_schema(BASE_SCHEMA, {
+    REQUIRED: {'server'},
+    'server': {
+        REQUIRED: {'jar_path'},
+        'jar_path': str,
+        'max_ram': str,
+        'min_ram': str,
+        'port': int,
+        'world_name': str,
+        'auto_restart': bool,
+        'stop_timeout': NUMBER,
+        'backup_enabled': bool,
+        'backup_interval': NUMBER
+    }
+})
 
-sys.excepthook = log_uncaught_exception
+# Необработанные исключения - в хранилище сбоев рядом с main.py:
+# одна запись на повторяющийся сбой вместо растущего errors.txt
+crash_store = CrashStore(bot_crash_path(__file__), bot='MineServ Bot')
+crash_store.install()
 
 class MineServBot:
-    def __init__(self):
+    def __init__(self, config_path='config.json'):
+        self.config_path = config_path
         self.config = self.load_config()
-        self.server_process = None
-        self.server_status = "stopped"  # stopped, starting, running, stopping
+        self.config_store = ConfigStore(config_path, CONFIG_SCHEMA)
+        self.config_task = None
+        self.server = MinecraftServer()
+        self.metrics = MetricsSampler(interval=5)
+        # Правки сообщений без изменений не отправляются
+        self.render = RenderCache()
+        # Кнопки и команды - через таблицу маршрутов с замером задержек
+        self.router = Router()
+        # Исходящие сообщения - через общую очередь с лимитами Telegram
+        self.sender = MessageSender()
+        # Консоль запущенного ботом сервера разбирается построчно по мере чтения
+        self.log_parser = ServerLogParser()
+        self.server.output.listeners.append(self.log_parser.feed)
+        self.log_tail = None
+        self.rcon = None
+        self.backup = None
+        self.backup_task = None
+        # Фоновый запуск/остановка сервера (одна операция за раз)
+        self.server_task = None
+    
+    @property
+    def server_process(self):
+        """Процесс сервера Minecraft или None"""
+        return self.server.process
+    
+    @property
+    def server_status(self):
+        """Статус сервера: stopped, starting, running, stopping"""
+        return self.server.status
+    
+    @server_status.setter
+    def server_status(self, value):
+        self.server.status = value
         
     def load_config(self):
         """Загрузка конфигурации"""
         try:
-            with open('config.json', 'r', encoding='utf-8') as f:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except FileNotFoundError:
             # Создаем базовую конфигурацию
@@ -73,16 +123,23 @@ class MineServBot:
                     "max_restart_attempts": 3
                 }
             }
-            with open('config.json', 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            try:
+                with open(self.config_path, 'w', encoding='utf-8') as f:
+                    json.dump(config, f, indent=2, ensure_ascii=False)
+            except OSError as e:
+                logger.error(f"Ошибка сохранения базовой конфигурации: {e}")
             return config
     
+    def apply_config(self, config, changed):
+        """Новый снимок конфига: параметры сервера применятся при следующем запуске, бэкапы - со следующего цикла"""
+        self.config = config
+        if has_changed(changed, 'monitoring.sample_interval'):
+            self.metrics.interval = config.get('monitoring', {}).get('sample_interval', 5)
+        if has_changed(changed, 'admin_ids'):
+            self.router.set_admins(config.get('admin_ids', []))
+    
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Команда /start"""
-        if update.effective_user.id not in self.config.get('admin_ids', []):
-            await update.message.reply_text("⛔ У вас нет доступа к этому боту!")
-            return
-        
         await self.show_main_menu(update.message)
     
     async def show_main_menu(self, message_or_query):
@@ -93,13 +150,17 @@ class MineServBot:
             [InlineKeyboardButton("⏹️ Остановить сервер", callback_data='stop_server')],
             [InlineKeyboardButton("🔄 Перезапустить сервер", callback_data='restart_server')],
             [InlineKeyboardButton("📊 Мониторинг", callback_data='monitoring')],
+            [InlineKeyboardButton("📜 Консоль", callback_data='console')],
+            [InlineKeyboardButton("🎮 Команды RCON", callback_data='rcon')],
+            [InlineKeyboardButton("💾 Бэкапы", callback_data='backups')],
             [InlineKeyboardButton("⚙️ Настройки", callback_data='settings')]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         text = "⛏️ **MineServ Bot**\n\nУправление сервером Minecraft"
         
         if hasattr(message_or_query, 'edit_message_text'):
-            await message_or_query.edit_message_text(
+            await self.render.edit(
+                message_or_query,
                 text,
                 reply_markup=reply_markup,
                 parse_mode='Markdown'
@@ -117,26 +178,6 @@ class MineServBot:
                 parse_mode='Markdown'
             )
     
-    async def button_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик inline кнопок"""
-        query = update.callback_query
-        await query.answer()
-        
-        if query.data == 'server_status':
-            await self.show_server_status(query)
-        elif query.data == 'start_server':
-            await self.start_server(query)
-        elif query.data == 'stop_server':
-            await self.stop_server(query)
-        elif query.data == 'restart_server':
-            await self.restart_server(query)
-        elif query.data == 'monitoring':
-            await self.show_monitoring(query)
-        elif query.data == 'settings':
-            await self.show_settings(query)
-        elif query.data == 'back_to_main':
-            await self.show_main_menu(query)
-    
     async def show_server_status(self, query):
         """Показать статус сервера"""
         status_emoji = {
@@ -153,120 +194,389 @@ class MineServBot:
 
 """
         
-        if self.server_process and self.server_process.poll() is None:
+        if self.server.is_running():
             status_text += f"🆔 **PID:** {self.server_process.pid}\n"
             status_text += f"⏰ **Время работы:** {self.get_uptime()}\n"
         
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             status_text,
             reply_markup=reply_markup,
             parse_mode='Markdown'
         )
     
+    def back_markup(self):
+        """Кнопка возврата в главное меню"""
+        return InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
+    
+    def server_busy(self):
+        """Идет ли запуск или остановка сервера в фоне"""
+        return self.server_task is not None and not self.server_task.done()
+    
+    def run_server_task(self, query, action):
+        """Запустить/остановить сервер в фоне, итог показать в сообщении прогресса.
+        
+        Запуск JVM ждет строку готовности до start_timeout, поэтому обработчик
+        кнопки не ждет его и бот продолжает отвечать остальным админам.
+        """
+        self.server_task = asyncio.create_task(self._server_task(query, action))
+    
+    async def _server_task(self, query, action):
+        try:
+            text = await action(query)
+        except asyncio.CancelledError:
+            return
+        try:
+            await self.render.edit(query, text, reply_markup=self.back_markup())
+        except Exception as e:
+            logger.error(f"Ошибка отправки итога операции с сервером: {e}")
+    
+    async def do_start(self, query):
+        """Запуск сервера с ожиданием готовности. Возвращает текст итога"""
+        try:
+            self.log_parser.reset()
+            result = await self.server.start(self.config['server'])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.server_status = "stopped"
+            logger.error(f"Ошибка запуска сервера: {e}")
+            return f"❌ Ошибка запуска сервера: {e}"
+        if result in ('ready', 'running'):
+            return "✅ Сервер Minecraft запущен!"
+        if result == 'exited':
+            tail = "\n".join(self.server.output.tail(5))
+            return f"❌ Сервер завершился при запуске:\n{tail}"
+        return "❌ Сервер не запустился за отведенное время и был остановлен"
+    
+    async def do_stop(self, query):
+        """Остановка сервера. Возвращает текст итога"""
+        try:
+            forced = await self.server.stop(timeout=self.config['server'].get('stop_timeout', 60))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка остановки сервера: {e}")
+            return f"❌ Ошибка остановки сервера: {e}"
+        return "🔪 Сервер остановлен принудительно" if forced else "⏹️ Сервер остановлен!"
+    
+    async def do_restart(self, query):
+        """Остановка и запуск сервера. Возвращает текст итога"""
+        text = await self.do_stop(query)
+        if self.server_status != "stopped":
+            return text
+        self.server_status = "starting"
+        await self.render.edit(query, "🟡 Запускаю сервер Minecraft...", reply_markup=self.back_markup(), screen='progress')
+        return await self.do_start(query)
+    
     async def start_server(self, query):
         """Запустить сервер"""
-        if self.server_status == "running":
-            await query.edit_message_text(
-                "⚠️ Сервер уже запущен!",
-                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
-            )
+        # Проверка и смена статуса без await между ними: два запуска не пересекутся
+        if self.server_status != "stopped" or self.server_busy():
+            await self.render.edit(query, "⚠️ Сервер уже запущен!", reply_markup=self.back_markup())
             return
         
         self.server_status = "starting"
-        await query.edit_message_text(
-            "🟡 Запускаю сервер Minecraft...",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
-        )
-        
-        # Имитация запуска сервера (болванка)
-        await asyncio.sleep(3)
-        
         try:
-            # Здесь будет реальный запуск сервера
-            # self.server_process = subprocess.Popen([...])
-            self.server_status = "running"
-            await query.edit_message_text(
-                "✅ Сервер Minecraft запущен!",
-                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
-            )
-        except Exception as e:
-            self.server_status = "stopped"
-            logger.error(f"Ошибка запуска сервера: {e}")
-            await query.edit_message_text(
-                f"❌ Ошибка запуска сервера: {e}",
-                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
+            await self.render.edit(
+                query,
+                "🟡 Запускаю сервер Minecraft...",
+                reply_markup=self.back_markup(),
+                screen='progress'
             )
+        finally:
+            # Итог заменит сообщение прогресса, поэтому задача стартует после него
+            self.run_server_task(query, self.do_start)
     
     async def stop_server(self, query):
-        """Остановить сервер"""
-        if self.server_status != "running":
-            await query.edit_message_text(
-                "⚠️ Сервер не запущен!",
-                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
-            )
+        """Остановить сервер (или прервать зависший запуск)"""
+        if self.server_status == "starting" and self.server_busy():
+            # Прерываем ожидание готовности, дальше - обычная остановка
+            self.server_task.cancel()
+            try:
+                await self.server_task
+            except asyncio.CancelledError:
+                pass
+        elif self.server_status != "running" or self.server_busy():
+            await self.render.edit(query, "⚠️ Сервер не запущен!", reply_markup=self.back_markup())
             return
         
         self.server_status = "stopping"
-        await query.edit_message_text(
-            "🟠 Останавливаю сервер...",
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
-        )
-        
-        # Имитация остановки сервера (болванка)
-        await asyncio.sleep(2)
-        
         try:
-            # Здесь будет реальная остановка сервера
-            # if self.server_process:
-            #     self.server_process.terminate()
-            #     self.server_process.wait(timeout=10)
-            self.server_status = "stopped"
-            self.server_process = None
-            await query.edit_message_text(
-                "⏹️ Сервер остановлен!",
-                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
-            )
-        except Exception as e:
-            self.server_status = "running"
-            logger.error(f"Ошибка остановки сервера: {e}")
-            await query.edit_message_text(
-                f"❌ Ошибка остановки сервера: {e}",
-                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
+            await self.render.edit(
+                query,
+                "🟠 Останавливаю сервер...",
+                reply_markup=self.back_markup(),
+                screen='progress'
             )
+        finally:
+            self.run_server_task(query, self.do_stop)
     
     async def restart_server(self, query):
         """Перезапустить сервер"""
-        await self.stop_server(query)
-        await asyncio.sleep(2)
-        await self.start_server(query)
+        if self.server_status != "running" or self.server_busy():
+            await self.render.edit(query, "⚠️ Сервер не запущен!", reply_markup=self.back_markup())
+            return
+        
+        self.server_status = "stopping"
+        try:
+            await self.render.edit(
+                query,
+                "🟠 Останавливаю сервер...",
+                reply_markup=self.back_markup(),
+                screen='progress'
+            )
+        finally:
+            self.run_server_task(query, self.do_restart)
     
     async def show_monitoring(self, query):
         """Показать мониторинг системы"""
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        info = self.metrics.snapshot()
+        self.refresh_log_stats()
+        if not info:
+            await self.render.edit(
+                query,
+                "❌ Ошибка получения данных",
+                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]])
+            )
+            return
         
         monitoring_text = f"""
 📊 **Мониторинг системы**
 
-🖥️ **CPU:** {cpu_percent}%
-💾 **RAM:** {memory.percent}% ({memory.used // 1024 // 1024}MB / {memory.total // 1024 // 1024}MB)
-💿 **Диск:** {disk.percent}% ({disk.used // 1024 // 1024 // 1024}GB / {disk.total // 1024 // 1024 // 1024}GB)
+🖥️ **CPU:** {info['cpu_percent']}%
+💾 **RAM:** {info['memory_percent']}% ({info['memory_used_gb'] * 1024:.0f}MB / {info['memory_total_gb'] * 1024:.0f}MB)
+💿 **Диск:** {info['disk_percent']}% ({info['disk_used_gb']:.0f}GB / {info['disk_total_gb']:.0f}GB)
 ⏰ **Время:** {datetime.now().strftime('%H:%M:%S')}
 
 🎮 **Сервер Minecraft:**
 {self.get_server_info()}
         """
         
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             monitoring_text,
             reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]]),
             parse_mode='Markdown'
         )
     
+    async def show_console(self, query):
+        """Показать последние строки консоли сервера"""
+        lines = self.server.output.tail(15)
+        text = "📜 Консоль сервера\n\n" + ("\n".join(lines) if lines else "Вывода пока нет")
+        
+        await self.render.edit(
+            query,
+            text[-4000:],
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("🔄 Обновить", callback_data='console')],
+                [InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]
+            ])
+        )
+    
+    def get_rcon(self):
+        """Клиент RCON из секции server.rcon или None, если RCON не включен"""
+        rcon_config = self.config['server'].get('rcon', {})
+        if not rcon_config.get('enabled'):
+            return None
+        if self.rcon is None:
+            self.rcon = RconClient(
+                host=rcon_config.get('host', '127.0.0.1'),
+                port=rcon_config.get('port', 25575),
+                password=rcon_config.get('password', ''),
+                timeout=rcon_config.get('timeout', 5)
+            )
+        return self.rcon
+    
+    async def run_rcon(self, command):
+        """Выполнить команду через RCON. Возвращает (ответ, время в мс)"""
+        rcon = self.get_rcon()
+        if rcon is None:
+            raise RuntimeError("RCON не включен в настройках (server.rcon.enabled)")
+        started = time.perf_counter()
+        reply = await rcon.command(command)
+        return reply, (time.perf_counter() - started) * 1000
+    
+    async def show_rcon_menu(self, query):
+        """Меню команд RCON"""
+        keyboard = [
+            [InlineKeyboardButton("👥 Игроки", callback_data=pack('rcon_run', 'list'))],
+            [InlineKeyboardButton("⚡ TPS", callback_data=pack('rcon_run', 'tps'))],
+            [InlineKeyboardButton("💾 Сохранить мир", callback_data=pack('rcon_run', 'save'))],
+            [InlineKeyboardButton("📋 Вайтлист", callback_data=pack('rcon_run', 'whitelist'))],
+            [InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]
+        ]
+        await self.render.edit(
+            query,
+            "🎮 Команды RCON\n\nДобавить в вайтлист: /whitelist add <ник>",
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+    
+    async def rcon_action(self, query, action):
+        """Выполнить команду из меню RCON"""
+        commands = {'list': 'list', 'tps': 'tps', 'save': 'save-all', 'whitelist': 'whitelist list'}
+        command = commands.get(action)
+        if command is None:
+            return
+        
+        try:
+            reply, elapsed = await self.run_rcon(command)
+            # Ванильный сервер не знает tps, начиная с 1.20.3 есть tick query
+            if action == 'tps' and 'Unknown' in reply:
+                reply, elapsed = await self.run_rcon('tick query')
+            if action == 'list':
+                self.log_parser.feed(reply)
+            text = f"🎮 {command}\n\n{reply or 'Выполнено'}\n\n⏱️ {elapsed:.0f} мс"
+        except (RuntimeError, ConnectionError, RconAuthError, asyncio.TimeoutError) as e:
+            logger.error(f"Ошибка команды RCON {command}: {e}")
+            text = f"❌ Ошибка RCON: {str(e) or 'таймаут'}"
+        
+        await self.render.edit(
+            query,
+            text[-4000:],
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("🔄 Повторить", callback_data=pack('rcon_run', action))],
+                [InlineKeyboardButton("🔙 Назад", callback_data='rcon')]
+            ])
+        )
+    
+    async def whitelist_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Команда /whitelist add|remove|list [ник]"""
+        args = context.args or ['list']
+        if args[0] not in ('add', 'remove', 'list') or (args[0] != 'list' and len(args) != 2):
+            await update.message.reply_text("Использование: /whitelist add|remove <ник> или /whitelist list")
+            return
+        
+        try:
+            reply, elapsed = await self.run_rcon('whitelist ' + ' '.join(args))
+            await update.message.reply_text(f"📋 {reply or 'Выполнено'}\n⏱️ {elapsed:.0f} мс")
+        except (RuntimeError, ConnectionError, RconAuthError, asyncio.TimeoutError) as e:
+            logger.error(f"Ошибка команды whitelist: {e}")
+            await update.message.reply_text(f"❌ Ошибка RCON: {str(e) or 'таймаут'}")
+    
+    def get_server_dir(self):
+        """Папка сервера: server_dir или папка с jar_path"""
+        server_config = self.config['server']
+        return server_config.get('server_dir') or os.path.dirname(os.path.abspath(server_config['jar_path']))
+    
+    def get_backup(self):
+        """Движок бэкапов мира"""
+        if self.backup is None:
+            server_config = self.config['server']
+            worlds = server_config.get('backup_worlds') or [server_config.get('world_name', 'world')]
+            self.backup = WorldBackup(
+                server_config.get('backup_path', 'backups'),
+                self.get_server_dir(),
+                worlds=worlds
+            )
+        return self.backup
+    
+    async def send_console_command(self, command):
+        """Команда серверу через RCON, а без него - через stdin процесса.
+        
+        Для save-all без RCON ждем строку "Saved the game" в консоли.
+        """
+        if self.get_rcon():
+            await self.rcon.command(command)
+            return
+        saved = None
+        if command.startswith('save-all'):
+            saved = self.server.output.wait_for_line(r'Saved the game')
+        await self.server.send_command(command)
+        if saved:
+            await asyncio.wait_for(saved, timeout=60)
+    
+    async def run_backup(self):
+        """Создать бэкап и удалить старые по настройкам хранения"""
+        server_config = self.config['server']
+        # Остановленный сервер не пишет в мир - координация не нужна
+        send_command = self.send_console_command if self.server_status == "running" else None
+        backup = self.get_backup()
+        manifest = await backup.create(send_command)
+        removed = await backup.prune(
+            max_age_days=server_config.get('backup_keep_days'),
+            max_size_mb=server_config.get('backup_max_size_mb')
+        )
+        return manifest, removed
+    
+    async def backup_loop(self):
+        """Периодические бэкапы каждые backup_interval секунд, пока сервер работает"""
+        while True:
+            try:
+                await asyncio.sleep(self.config['server'].get('backup_interval', 3600))
+                if self.config['server'].get('backup_enabled') and self.server_status == "running":
+                    await self.run_backup()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Ошибка автобэкапа: {e}")
+    
+    async def show_backups(self, query):
+        """Список последних бэкапов"""
+        snapshots, recent, store_size = await self.get_backup().summary(5)
+        lines = ["💾 Бэкапы мира", ""]
+        for manifest in recent[::-1]:
+            lines.append(
+                f"📦 {manifest['id']}: {len(manifest['files'])} файлов, "
+                f"изменено {manifest['changed_files']} ({manifest['written_bytes'] / 1024:.0f} КБ)"
+            )
+        if not snapshots:
+            lines.append("Бэкапов пока нет")
+        else:
+            lines.append("")
+            lines.append(f"Всего: {len(snapshots)}, хранилище {store_size / 1024 / 1024:.1f} МБ")
+            lines.append("Восстановить: /restore <id> (сервер должен быть остановлен)")
+        
+        await self.render.edit(
+            query,
+            "\n".join(lines),
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("➕ Создать бэкап", callback_data='backup_create')],
+                [InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]
+            ])
+        )
+    
+    async def create_backup(self, query):
+        """Создать бэкап по кнопке"""
+        await self.render.edit(query, "💾 Создаю бэкап...", screen='progress')
+        try:
+            manifest, removed = await self.run_backup()
+            text = (
+                f"✅ Бэкап {manifest['id']} создан за {manifest['duration']:.1f} сек\n"
+                f"Изменено файлов: {manifest['changed_files']}, записано {manifest['written_bytes'] / 1024:.0f} КБ"
+            )
+            if removed:
+                text += f"\nУдалено старых бэкапов: {len(removed)}"
+        except Exception as e:
+            logger.error(f"Ошибка создания бэкапа: {e}")
+            text = f"❌ Ошибка создания бэкапа: {e}"
+        
+        await self.render.edit(
+            query,
+            text,
+            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='backups')]])
+        )
+    
+    async def restore_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Команда /restore <id> - восстановить мир из бэкапа"""
+        backup = self.get_backup()
+        if not context.args or context.args[0] not in backup.list_snapshots():
+            await update.message.reply_text("Использование: /restore <id> (список в меню 💾 Бэкапы)")
+            return
+        if self.server_status != "stopped":
+            await update.message.reply_text("⚠️ Сначала остановите сервер!")
+            return
+        
+        try:
+            count = await backup.restore(context.args[0])
+            await update.message.reply_text(f"✅ Восстановлено файлов: {count}")
+        except Exception as e:
+            logger.error(f"Ошибка восстановления бэкапа: {e}")
+            await update.message.reply_text(f"❌ Ошибка восстановления: {e}")
+    
     async def show_settings(self, query):
         """Показать настройки"""
         settings_text = f"""
@@ -278,47 +588,144 @@ class MineServBot:
 🗺️ **Мир:** {self.config['server']['world_name']}
 🔄 **Автоперезапуск:** {'✅' if self.config['server']['auto_restart'] else '❌'}
         """
+        settings_text += self.router.format_stats()
         
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             settings_text,
             reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]]),
             parse_mode='Markdown'
         )
     
+    def get_log_tail(self):
+        """Инкрементальный читатель logs/latest.log сервера"""
+        server_config = self.config['server']
+        path = server_config.get('log_path')
+        if not path:
+            server_dir = server_config.get('server_dir') or os.path.dirname(os.path.abspath(server_config['jar_path']))
+            path = os.path.join(server_dir, 'logs', 'latest.log')
+        if self.log_tail is None or self.log_tail.path != path:
+            self.log_tail = LogTail(path)
+        return self.log_tail
+    
+    def refresh_log_stats(self):
+        """Дочитать новые строки latest.log.
+        
+        Если сервер запущен ботом, те же строки уже разобраны из консоли,
+        поэтому файл только пролистывается до конца. Иначе (сервер запущен
+        вручную) счетчики строятся по latest.log, а при замене файла
+        (перезапуск сервера) начинаются заново.
+        """
+        try:
+            tail = self.get_log_tail()
+            rotations = tail.rotations
+            lines = tail.read_new()
+        except Exception as e:
+            logger.error(f"Ошибка чтения лога сервера: {e}")
+            return
+        if self.server.is_running():
+            return
+        if tail.rotations != rotations:
+            self.log_parser.reset()
+        for line in lines:
+            self.log_parser.feed(line)
+    
     def get_uptime(self):
         """Получить время работы сервера"""
-        if not self.server_process:
+        if not self.server.is_running() or not self.server.started_at:
             return "Не запущен"
-        # Здесь будет расчет времени работы
-        return "00:00:00"
+        return format_duration(time.time() - self.server.started_at)
     
     def get_server_info(self):
         """Получить информацию о сервере"""
         if self.server_status == "running":
-            return f"🟢 Работает (PID: {self.server_process.pid if self.server_process else 'N/A'})"
+            lines = [f"🟢 Работает (PID: {self.server_process.pid if self.server_process else 'N/A'})"]
+            lines.append(f"⏰ Время работы: {self.get_uptime()}")
         elif self.server_status == "starting":
-            return "🟡 Запускается..."
+            lines = ["🟡 Запускается..."]
         elif self.server_status == "stopping":
-            return "🟠 Останавливается..."
+            lines = ["🟠 Останавливается..."]
         else:
-            return "🔴 Остановлен"
+            lines = ["🔴 Остановлен"]
+        
+        stats = self.log_parser
+        if stats.lines_parsed:
+            online = f"{len(stats.players)}/{stats.max_players}" if stats.max_players else f"{len(stats.players)}"
+            lines.append(f"👥 Игроков онлайн: {online} (пик {stats.peak_players})")
+            if stats.players:
+                names = ", ".join(sorted(stats.players)[:10])
+                lines.append(f"   {escape_markdown(names)}")
+            lines.append(f"🚪 Входов/выходов: {stats.joins}/{stats.leaves}")
+            if stats.startup_seconds is not None:
+                lines.append(f"🚀 Запуск занял: {stats.startup_seconds:.1f} сек")
+            if stats.lag_warnings:
+                ago = format_duration(time.time() - stats.last_lag_at)
+                lag = f" ({stats.last_lag_ms} мс)" if stats.last_lag_ms is not None else ""
+                lines.append(f"🐢 Can't keep up: {stats.lag_warnings} раз, последний {ago} назад{lag}")
+        return "\n".join(lines)
+
+def create_application(bot, builder=None):
+    """Приложение Telegram с обработчиками бота (builder задает хост-режим)"""
+    builder = builder or Application.builder()
+    application = builder.token(bot.config['bot_token']).build()
+    
+    # Добавление обработчиков
+    bot.router.set_admins(bot.config.get('admin_ids', []))
+    bot.router.add('server_status', bot.show_server_status)
+    bot.router.add('start_server', bot.start_server)
+    bot.router.add('stop_server', bot.stop_server)
+    bot.router.add('restart_server', bot.restart_server)
+    bot.router.add('monitoring', bot.show_monitoring)
+    bot.router.add('console', bot.show_console)
+    bot.router.add('backups', bot.show_backups)
+    bot.router.add('backup_create', bot.create_backup)
+    bot.router.add('rcon', bot.show_rcon_menu)
+    bot.router.add('rcon_run', bot.rcon_action, str)
+    bot.router.add('settings', bot.show_settings)
+    bot.router.add('back_to_main', bot.show_main_menu)
+    application.add_handler(CommandHandler("start", bot.router.command('start', bot.start_command)))
+    application.add_handler(CommandHandler("whitelist", bot.router.command('whitelist', bot.whitelist_command)))
+    application.add_handler(CommandHandler("restore", bot.router.command('restore', bot.restore_command)))
+    application.add_handler(CallbackQueryHandler(bot.router.dispatch))
+    # Сбои в обработчиках - в хранилище сбоев бота
+    application.add_error_handler(crash_store.error_handler)
+    return application
+
+def start_background_tasks(bot, application):
+    """Фоновые задачи бота (вызывать внутри работающего цикла событий)"""
+    # Фоновый сбор метрик
+    bot.metrics.interval = bot.config.get('monitoring', {}).get('sample_interval', 5)
+    bot.metrics.start()
+    
+    # Периодические бэкапы мира
+    if bot.config['server'].get('backup_enabled'):
+        bot.backup_task = asyncio.create_task(bot.backup_loop())
+
+    # Горячая перезагрузка config.json: обработчики читают неизменяемый снимок
+    bot.config = bot.config_store.prime(bot.config)
+    bot.config_store.subscribe(bot.apply_config)
+    bot.config_task = asyncio.create_task(bot.config_store.watch())
 
 async def main():
     """Основная функция"""
     try:
         bot = MineServBot()
+        # Ротация и сжатие лога из конфига (в хост-режиме лог общий)
+        configure_logging(bot.config.get('logging'))
+        bot.config_store.subscribe(reload_logging)
         
         # Создание приложения
-        application = Application.builder().token(bot.config['bot_token']).build()
-        
-        # Добавление обработчиков
-        application.add_handler(CommandHandler("start", bot.start_command))
-        application.add_handler(CallbackQueryHandler(bot.button_handler))
+        application = create_application(bot)
+        start_background_tasks(bot, application)
         
         # Запуск бота
         logger.info("MineServ Bot запущен")
         logger.info(f"Токен: {bot.config['bot_token'][:10]}...")
-        await application.run_polling()
+        # Вебхук вместо long polling, если он включен в конфиге
+        if bot.config.get('webhook', {}).get('enabled'):
+            await run_webhook(application, bot.config['webhook'])
+        else:
+            await application.run_polling()
         
     except Exception as e:
         logger.error(f"Критическая ошибка в main(): {e}")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import itertools
+import logging
+import re
+import struct
+import time
+
+logger = logging.getLogger(__name__)
+
+# Типы пакетов RCON
+TYPE_RESPONSE = 0
+TYPE_COMMAND = 2
+TYPE_LOGIN = 3
+
+COLOR_CODE_RE = re.compile(r'§.')
+
+
+class RconAuthError(Exception):
+    """Неверный пароль RCON"""
+
+
+def encode_packet(request_id, packet_type, body):
+    """Пакет RCON: длина, id, тип, тело и два нулевых байта (little-endian)"""
+    payload = struct.pack('<ii', request_id, packet_type) + body.encode('utf-8') + b'\x00\x00'
+    return struct.pack('<i', len(payload)) + payload
+
+
+async def read_packet(reader):
+    """Прочитать один пакет: (id, тип, тело)"""
+    header = await reader.readexactly(4)
+    (length,) = struct.unpack('<i', header)
+    payload = await reader.readexactly(length)
+    request_id, packet_type = struct.unpack('<ii', payload[:8])
+    return request_id, packet_type, payload[8:-2].decode('utf-8', 'replace')
+
+
+class RconClient:
+    """Асинхронный клиент RCON с постоянным соединением.
+
+    Команды можно вызывать параллельно: каждая получает свой id, ответы
+    разбирает одна фоновая задача чтения и раздает их по id. Длинный ответ
+    сервер режет на несколько пакетов, а признака последнего в протоколе
+    нет, поэтому за командой отправляется пустой пакет-маркер: сервер
+    отвечает по порядку, и ответ на маркер означает, что ответ на команду
+    пришел целиком. Ванильный сервер разбирает только первый пакет из
+    каждого чтения сокета, поэтому в сокет одновременно уходит один пакет:
+    маркер - после первого фрагмента ответа, следующая команда - после
+    ответа на маркер. При
+    обрыве соединение восстанавливается при следующей команде; неудачные
+    попытки подключения повторяются не чаще, чем позволяет экспоненциальная
+    задержка.
+    """
+
+    def __init__(self, host='127.0.0.1', port=25575, password='', timeout=5, max_backoff=30):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.connects = 0
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+        self._pending = {}
+        self._markers = {}
+        self._send_lock = asyncio.Lock()
+        self._ids = itertools.count(1)
+        self._connect_lock = asyncio.Lock()
+        self._failures = 0
+        self._retry_at = 0
+
+    def is_connected(self):
+        """Открыто ли соединение"""
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def command(self, command, retry=True):
+        """Выполнить команду и вернуть текст ответа (без цветовых кодов)"""
+        try:
+            async with self._send_lock:
+                await self._ensure_connected()
+                response = await self._exchange(command)
+        except ConnectionError:
+            if not retry:
+                raise
+            # Соединение могло устареть - одна попытка через новое
+            return await self.command(command, retry=False)
+        return COLOR_CODE_RE.sub('', response)
+
+    async def _exchange(self, command):
+        request_id = next(self._ids)
+        marker_id = next(self._ids)
+        loop = asyncio.get_running_loop()
+        # [ответ целиком, фрагменты, первый фрагмент получен]
+        entry = [loop.create_future(), [], loop.create_future()]
+        self._pending[request_id] = entry
+        self._markers[marker_id] = entry
+        try:
+            await self._send(encode_packet(request_id, TYPE_COMMAND, command))
+            await asyncio.wait_for(entry[2], timeout=self.timeout)
+            await self._send(encode_packet(marker_id, TYPE_RESPONSE, ''))
+            return await asyncio.wait_for(entry[0], timeout=self.timeout)
+        finally:
+            self._pending.pop(request_id, None)
+            self._markers.pop(marker_id, None)
+            if entry[2].done() and not entry[2].cancelled():
+                entry[2].exception()  # ошибка уже передана через ответ
+
+    async def _send(self, packet):
+        if not self.is_connected():
+            raise ConnectionError("RCON соединение потеряно")
+        self._writer.write(packet)
+        await self._writer.drain()
+
+    async def close(self):
+        """Закрыть соединение"""
+        self._disconnect(ConnectionError("RCON закрыт"))
+        if self._reader_task:
+            self._reader_task.cancel()
+            self._reader_task = None
+
+    async def _ensure_connected(self):
+        if self.is_connected():
+            return
+        async with self._connect_lock:
+            if self.is_connected():
+                return
+            wait = self._retry_at - time.monotonic()
+            if wait > 0:
+                raise ConnectionError(f"RCON недоступен, повтор через {wait:.0f} сек")
+            try:
+                await self._connect()
+                self._failures = 0
+            except RconAuthError:
+                self._schedule_retry()
+                raise
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                self._schedule_retry()
+                raise ConnectionError(f"Не удалось подключиться к RCON {self.host}:{self.port}: {e}") from e
+
+    def _schedule_retry(self):
+        self._failures += 1
+        delay = min(self.max_backoff, 0.5 * 2 ** (self._failures - 1))
+        self._retry_at = time.monotonic() + delay
+
+    async def _connect(self):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout=self.timeout
+        )
+        try:
+            login_id = next(self._ids)
+            writer.write(encode_packet(login_id, TYPE_LOGIN, self.password))
+            await writer.drain()
+            while True:
+                request_id, packet_type, _ = await asyncio.wait_for(read_packet(reader), timeout=self.timeout)
+                if request_id == -1:
+                    raise RconAuthError("Неверный пароль RCON")
+                if request_id == login_id and packet_type == TYPE_COMMAND:
+                    break
+        except BaseException:
+            writer.close()
+            raise
+
+        self._reader, self._writer = reader, writer
+        self._reader_task = asyncio.create_task(self._read_loop(reader, writer))
+        self.connects += 1
+        logger.info(f"RCON подключен к {self.host}:{self.port}")
+
+    async def _read_loop(self, reader, writer):
+        try:
+            while True:
+                request_id, _, body = await read_packet(reader)
+                # Ответ на маркер: все фрагменты команды уже получены
+                marker = self._markers.pop(request_id, None)
+                if marker is not None:
+                    future, parts, _ = marker
+                    if not future.done():
+                        future.set_result(''.join(parts))
+                    continue
+                entry = self._pending.get(request_id)
+                if entry is not None:
+                    entry[1].append(body)
+                    if not entry[2].done():
+                        entry[2].set_result(None)
+        except (asyncio.IncompleteReadError, OSError) as e:
+            if self._writer is writer:
+                logger.warning(f"RCON соединение потеряно: {e}")
+                self._disconnect(ConnectionError("RCON соединение потеряно"))
+        except asyncio.CancelledError:
+            pass
+
+    def _disconnect(self, error):
+        if self._writer:
+            self._writer.close()
+        self._reader = self._writer = None
+        for future, _, first in self._pending.values():
+            for waiter in (future, first):
+                if not waiter.done():
+                    waiter.set_exception(error)
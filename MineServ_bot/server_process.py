@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+import os
+import time
+
+from common.child_process import OutputBuffer, spawn_process, terminate_process, wait_until_ready
+
+logger = logging.getLogger(__name__)
+
+# Строка готовности: [Server thread/INFO]: Done (5.123s)! For help, type "help"
+READY_PATTERN = r'Done \([\d.,]+s\)!'
+
+
+def build_command(server_config):
+    """Команда запуска сервера из секции server конфига.
+
+    Если задан ``command`` (список аргументов), он используется как есть,
+    например для start-скрипта сборки. Иначе запускается JVM с jar_path.
+    """
+    if server_config.get('command'):
+        return list(server_config['command'])
+    return [
+        server_config.get('java_path', 'java'),
+        f"-Xms{server_config.get('min_ram', '1G')}",
+        f"-Xmx{server_config.get('max_ram', '2G')}",
+        *server_config.get('jvm_args', []),
+        '-jar', os.path.abspath(server_config['jar_path']),
+        'nogui'
+    ]
+
+
+class MinecraftServer:
+    """Процесс сервера Minecraft с асинхронным чтением консоли.
+
+    Консоль (stdout и stderr) откачивается в ограниченный ``OutputBuffer``.
+    Готовность определяется по строке "Done (...)!" в выводе, остановка -
+    командой ``stop`` в stdin, а по таймауту процесс завершается принудительно.
+    """
+
+    def __init__(self, console_lines=500):
+        self.output = OutputBuffer(max_lines=console_lines)
+        self.process = None
+        self.status = "stopped"  # stopped, starting, running, stopping
+        self.started_at = None
+        self.ready_at = None
+        self._reader_task = None
+        self._watch_task = None
+
+    def is_running(self):
+        """Работает ли процесс сервера"""
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self, server_config):
+        """Запустить сервер и дождаться готовности.
+
+        Возвращает 'ready', 'exited' (процесс завершился при запуске),
+        'timeout' (сервер не стал готов за start_timeout и остановлен)
+        или 'running' (уже запущен).
+        """
+        if self.is_running():
+            return 'running'
+
+        args = build_command(server_config)
+        cwd = server_config.get('server_dir') or os.path.dirname(os.path.abspath(server_config.get('jar_path', '.')))
+        self.status = "starting"
+        self.ready_at = None
+        try:
+            self.process, self._reader_task = await spawn_process(args, self.output, cwd=cwd, stdin_pipe=True)
+        except Exception:
+            self.status = "stopped"
+            raise
+        self.started_at = time.time()
+        logger.info(f"Сервер Minecraft запускается (PID: {self.process.pid})")
+
+        result = await wait_until_ready(
+            self.process, self.output, server_config.get('ready_pattern', READY_PATTERN),
+            timeout=server_config.get('start_timeout', 300)
+        )
+        if result == 'ready':
+            self.status = "running"
+            self.ready_at = time.time()
+            self._watch_task = asyncio.create_task(self._watch())
+            logger.info(f"Сервер Minecraft готов за {self.ready_at - self.started_at:.1f} сек")
+        elif result == 'exited':
+            await self._finish_reader()
+            self.status = "stopped"
+            logger.error(f"Сервер Minecraft завершился при запуске (код {self.process.returncode})")
+        else:
+            logger.error("Сервер Minecraft не стал готов вовремя, останавливаю")
+            await self.stop(timeout=server_config.get('stop_timeout', 60))
+        return result
+
+    async def send_command(self, command):
+        """Отправить команду в консоль сервера"""
+        if not self.is_running() or self.process.stdin is None:
+            raise RuntimeError("Сервер не запущен")
+        self.process.stdin.write((command + '\n').encode('utf-8'))
+        await self.process.stdin.drain()
+
+    async def stop(self, timeout=60):
+        """Остановить сервер командой stop, по таймауту - принудительно.
+
+        Возвращает True, если процесс пришлось завершать принудительно.
+        """
+        if not self.is_running():
+            self.status = "stopped"
+            return False
+
+        self.status = "stopping"
+        if self._watch_task:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+        forced = False
+        try:
+            await self.send_command('stop')
+            await asyncio.wait_for(self.process.wait(), timeout=timeout)
+        except (asyncio.TimeoutError, RuntimeError, ConnectionError) as e:
+            logger.warning(f"Сервер не остановился командой stop: {str(e) or 'таймаут'}")
+            await terminate_process(self.process, timeout=10)
+            forced = True
+
+        await self._finish_reader()
+        self.status = "stopped"
+        logger.info(f"Сервер Minecraft остановлен (код {self.process.returncode})")
+        return forced
+
+    async def _watch(self):
+        """Отследить неожиданное завершение работающего сервера"""
+        try:
+            returncode = await self.process.wait()
+        except asyncio.CancelledError:
+            return
+        await self._finish_reader()
+        self.status = "stopped"
+        logger.error(f"Сервер Minecraft неожиданно завершился (код {returncode})")
+
+    async def _finish_reader(self):
+        if self._reader_task:
+            try:
+                await asyncio.wait_for(self._reader_task, timeout=2)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+            self._reader_task = None
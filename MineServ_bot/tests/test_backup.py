@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+import struct
+import sys
+import tempfile
+
+# Добавляем путь к папке бота
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup import WorldBackup, region_ranges, SECTOR
+
+def make_region(chunks):
+    """Region-файл: чанк i лежит в секторе 2 + i"""
+    header = bytearray(2 * SECTOR)
+    body = b''
+    for index, payload in enumerate(chunks):
+        struct.pack_into('>I', header, index * 4, ((2 + index) << 8) | 1)
+        body += payload.ljust(SECTOR, b'\0')
+    return bytes(header) + body
+
+class TestWorldBackup(unittest.IsolatedAsyncioTestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server_dir = os.path.join(self.tmp.name, 'server')
+        self.region = os.path.join(self.server_dir, 'world', 'region', 'r.0.0.mca')
+        os.makedirs(os.path.dirname(self.region))
+        self.write(self.region, make_region([b'chunk-a', b'chunk-b', b'chunk-c']))
+        self.write(os.path.join(self.server_dir, 'world', 'level.dat'), b'level v1')
+        self.write(os.path.join(self.server_dir, 'world', 'session.lock'), b'lock')
+        self.backup = WorldBackup(os.path.join(self.tmp.name, 'backups'), self.server_dir)
+    
+    def tearDown(self):
+        self.backup.close()
+        self.tmp.cleanup()
+    
+    def write(self, path, data):
+        with open(path, 'wb') as f:
+            f.write(data)
+    
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def test_region_split_by_chunks(self):
+        """Тест разбиения region-файла на заголовок и чанки"""
+        ranges = region_ranges(make_region([b'a', b'b']))
+        
+        self.assertEqual(ranges, [(0, 2 * SECTOR), (2 * SECTOR, 3 * SECTOR), (3 * SECTOR, 4 * SECTOR)])
+    
+    async def test_incremental_snapshot_stores_only_changed_chunk(self):
+        """Тест: второй бэкап записывает только измененный чанк"""
+        commands = []
+        async def send_command(command):
+            commands.append(command)
+        
+        first = await self.backup.create(send_command)
+        self.assertEqual(commands, ['save-off', 'save-all flush', 'save-on'])
+        self.assertNotIn('world/session.lock', first['files'])
+        self.assertEqual(first['changed_files'], 2)
+        objects_before = self.backup.store_size()
+        
+        self.write(self.region, make_region([b'chunk-a', b'chunk-B', b'chunk-c']))
+        second = await self.backup.create()
+        
+        self.assertEqual(second['changed_files'], 1)
+        old_chunks = first['files']['world/region/r.0.0.mca']['chunks']
+        new_chunks = second['files']['world/region/r.0.0.mca']['chunks']
+        self.assertEqual(sum(a != b for a, b in zip(old_chunks, new_chunks)), 1)
+        self.assertGreater(self.backup.store_size(), objects_before)
+        self.assertEqual(len(self.backup.list_snapshots()), 2)
+    
+    async def test_point_in_time_restore(self):
+        """Тест восстановления мира из старого снимка"""
+        original = self.read(self.region)
+        first = await self.backup.create()
+        self.write(self.region, make_region([b'griefed']))
+        os.remove(os.path.join(self.server_dir, 'world', 'level.dat'))
+        await self.backup.create()
+        
+        await self.backup.restore(first['id'])
+        
+        self.assertEqual(self.read(self.region), original)
+        self.assertEqual(self.read(os.path.join(self.server_dir, 'world', 'level.dat')), b'level v1')
+        self.assertTrue(os.path.exists(os.path.join(self.server_dir, 'world.before-restore')))
+    
+    async def test_prune_by_age_keeps_latest(self):
+        """Тест удаления старых снимков и неиспользуемых кусков"""
+        await self.backup.create()
+        self.write(self.region, make_region([b'other']))
+        await self.backup.create()
+        snapshots = self.backup.list_snapshots()
+        
+        removed = await self.backup.prune(max_age_days=1, now=self.backup.load_snapshot(snapshots[-1])['created'] + 2 * 86400)
+        
+        self.assertEqual(removed, snapshots[:1])
+        self.assertEqual(self.backup.list_snapshots(), snapshots[1:])
+        # Остались только куски последнего снимка
+        latest = self.backup.load_snapshot(snapshots[1])
+        used = {c for entry in latest['files'].values() for c in entry['chunks']}
+        stored = set()
+        for _, _, filenames in os.walk(os.path.join(self.backup.store_dir, 'objects')):
+            stored.update(filenames)
+        self.assertEqual(stored, used)
+
+    async def test_prune_by_size_removes_oldest(self):
+        """Тест удаления старых снимков, пока хранилище больше лимита"""
+        for payload in (b'first' * 500, b'second' * 500, b'third' * 500):
+            self.write(self.region, make_region([os.urandom(3000) + payload]))
+            await self.backup.create()
+        snapshots = self.backup.list_snapshots()
+        latest = self.backup.load_snapshot(snapshots[-1])
+        used = {c for entry in latest['files'].values() for c in entry['chunks']}
+        latest_size = sum(
+            os.path.getsize(os.path.join(self.backup.store_dir, 'objects', c[:2], c)) for c in used
+        )
+        
+        removed = await self.backup.prune(max_size_mb=(latest_size + 1) / 1024 / 1024)
+        
+        self.assertEqual(removed, snapshots[:2])
+        self.assertEqual(self.backup.list_snapshots(), snapshots[2:])
+        self.assertEqual(self.backup.store_size(), latest_size)
+        # Лимит меньше последнего снимка: он все равно остается
+        self.assertEqual(await self.backup.prune(max_size_mb=0), [])
+        
+        ids, recent, size = await self.backup.summary()
+        self.assertEqual(ids, snapshots[2:])
+        self.assertEqual([m['id'] for m in recent], snapshots[2:])
+        self.assertEqual(size, latest_size)
+
+if __name__ == '__main__':
+    unittest.main()
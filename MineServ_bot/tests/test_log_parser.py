@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+import sys
+import tempfile
+
+# Добавляем путь к папке бота
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_parser import ServerLogParser, LogTail, format_duration
+
+SESSION = [
+    '[12:00:00] [Server thread/INFO]: Starting minecraft server version 1.20.4',
+    '[12:00:05] [Server thread/INFO]: Done (5.123s)! For help, type "help"',
+    '[12:01:00] [Server thread/INFO]: Steve joined the game',
+    '[12:01:10] [Server thread/INFO]: Alex_99 joined the game',
+    "[12:02:00] [Server thread/WARN]: Can't keep up! Is the server overloaded? Running 2034ms or 40 ticks behind",
+    '[12:03:00] [Server thread/INFO]: Steve left the game',
+    '[12:04:00] [Server thread/INFO]: <Alex_99> hello',
+]
+
+class TestServerLogParser(unittest.TestCase):
+    
+    def test_session_counters(self):
+        """Тест счетчиков по строкам сессии"""
+        parser = ServerLogParser()
+        for line in SESSION:
+            parser.feed(line)
+        
+        self.assertEqual(parser.players, {'Alex_99'})
+        self.assertEqual(parser.peak_players, 2)
+        self.assertEqual((parser.joins, parser.leaves), (2, 1))
+        self.assertEqual(parser.lag_warnings, 1)
+        self.assertEqual(parser.last_lag_ms, 2034)
+        self.assertEqual(parser.ticks_behind, 40)
+        self.assertAlmostEqual(parser.startup_seconds, 5.123)
+        self.assertEqual(parser.lines_parsed, len(SESSION))
+    
+    def test_list_output_syncs_players(self):
+        """Тест: вывод команды list задает точный список игроков"""
+        parser = ServerLogParser()
+        parser.feed('[Server thread/INFO]: Ghost joined the game')
+        parser.feed('[Server thread/INFO]: There are 2 of a max of 20 players online: Steve, Alex')
+        
+        self.assertEqual(parser.players, {'Steve', 'Alex'})
+        self.assertEqual(parser.max_players, 20)
+    
+    def test_format_duration(self):
+        """Тест форматирования времени работы"""
+        self.assertEqual(format_duration(3725), "01:02:05")
+        self.assertEqual(format_duration(90061), "1д 01:01:01")
+
+class TestLogTail(unittest.TestCase):
+    
+    def test_reads_only_new_lines(self):
+        """Тест: читаются только дописанные полные строки"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'latest.log')
+            tail = LogTail(path)
+            self.assertEqual(tail.read_new(), [])
+            
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('line 1\nline 2\npart')
+            self.assertEqual(tail.read_new(), ['line 1', 'line 2'])
+            self.assertEqual(tail.read_new(), [])
+            
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write('ial\nline 4\n')
+            self.assertEqual(tail.read_new(), ['partial', 'line 4'])
+    
+    def test_restart_after_rotation(self):
+        """Тест: замененный файл читается с начала"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'latest.log')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('old session line\n' * 10)
+            tail = LogTail(path)
+            tail.read_new()
+            
+            os.replace(path, os.path.join(tmp, '2024-01-01-1.log'))
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('new session\n')
+            
+            self.assertEqual(tail.read_new(), ['new session'])
+            self.assertEqual(tail.rotations, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -170,6 +170,85 @@ class TestMineServBot(unittest.TestCase):
             bot.server_status = status
             # Здесь можно добавить проверку, если есть метод получения эмодзи
     
+    def test_server_info_from_log_counters(self):
+        """Тест: информация о сервере строится по счетчикам лога"""
+        from main import MineServBot
+        bot = MineServBot()
+        bot.config = self.test_config
+        
+        bot.server.output.append('[Server thread/INFO]: Done (4.5s)! For help, type "help"')
+        bot.server.output.append('[Server thread/INFO]: Steve_1 joined the game')
+        info = bot.get_server_info()
+        
+        self.assertIn('🔴 Остановлен', info)
+        self.assertIn('Игроков онлайн: 1', info)
+        self.assertIn('Steve\\_1', info)
+        self.assertIn('4.5 сек', info)
+        self.assertEqual(bot.get_uptime(), "Не запущен")
+    
+    def test_log_stats_reset_on_rotation(self):
+        """Тест: после замены latest.log счетчики внешнего сервера строятся заново"""
+        from main import MineServBot
+        bot = MineServBot()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'latest.log')
+            bot.config = {**self.test_config, 'server': {**self.test_config['server'], 'log_path': path}}
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('[Server thread/INFO]: Steve joined the game\n[Server thread/INFO]: Alex joined the game\n')
+            bot.refresh_log_stats()
+            self.assertEqual(bot.log_parser.joins, 2)
+            
+            os.replace(path, os.path.join(tmp, 'old.log'))
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('[Server thread/INFO]: Steve joined the game\n')
+            bot.refresh_log_stats()
+            
+            self.assertEqual(bot.log_parser.joins, 1)
+            self.assertEqual(bot.log_parser.players, {'Steve'})
+    
+    def test_rcon_disabled_by_default(self):
+        """Тест: без server.rcon.enabled клиент RCON не создается"""
+        import asyncio
+        from main import MineServBot
+        bot = MineServBot()
+        bot.config = self.test_config
+        
+        self.assertIsNone(bot.get_rcon())
+        with self.assertRaises(RuntimeError):
+            asyncio.run(bot.run_rcon('list'))
+    
+    def test_start_server_runs_in_background(self):
+        """Тест: запуск сервера не держит обработчик, второй запуск отклоняется"""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from main import MineServBot
+        bot = MineServBot()
+        bot.config = self.test_config
+        bot.render.edit = AsyncMock()
+        
+        async def scenario():
+            release = asyncio.Event()
+            
+            async def slow_start(server_config):
+                await release.wait()
+                bot.server.status = "running"
+                return 'ready'
+            
+            bot.server.start = slow_start
+            query = Mock()
+            await asyncio.wait_for(bot.start_server(query), timeout=1)
+            self.assertEqual(bot.server_status, "starting")
+            self.assertTrue(bot.server_busy())
+            
+            await bot.start_server(query)
+            self.assertIn("уже запущен", bot.render.edit.await_args.args[1])
+            
+            release.set()
+            await bot.server_task
+            self.assertEqual(bot.render.edit.await_args.args[1], "✅ Сервер Minecraft запущен!")
+        
+        asyncio.run(scenario())
+    
     def test_config_structure_completeness(self):
         """Тест полноты структуры конфигурации"""
         from main import MineServBot
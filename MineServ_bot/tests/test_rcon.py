@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import asyncio
+import os
+import sys
+
+# Добавляем путь к папке бота
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rcon import RconClient, RconAuthError, encode_packet, read_packet, TYPE_COMMAND, TYPE_LOGIN
+
+class FakeRconServer:
+    """Поддельный RCON-сервер на loopback"""
+    
+    def __init__(self, password='secret'):
+        self.password = password
+        self.connections = 0
+        self.writers = []
+        self.server = None
+        self.port = None
+    
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        self.drop_clients()
+        self.server.close()
+        await self.server.wait_closed()
+    
+    def drop_clients(self):
+        for writer in self.writers:
+            writer.close()
+        self.writers = []
+    
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.writers.append(writer)
+        try:
+            while True:
+                request_id, packet_type, body = await read_packet(reader)
+                if packet_type == TYPE_LOGIN:
+                    ok = body == self.password
+                    writer.write(encode_packet(request_id if ok else -1, TYPE_COMMAND, ''))
+                elif packet_type != TYPE_COMMAND:
+                    # Как ванильный сервер: ответ на пакет неизвестного типа
+                    writer.write(encode_packet(request_id, 0, f'Unknown request {packet_type:x}'))
+                elif body == 'long':
+                    # Длинный ответ приходит фрагментами по 4096 символов
+                    writer.write(encode_packet(request_id, 0, 'a' * 4096))
+                    writer.write(encode_packet(request_id, 0, 'b' * 10))
+                elif body == 'exact':
+                    writer.write(encode_packet(request_id, 0, 'a' * 4096))
+                    writer.write(encode_packet(request_id, 0, 'b' * 4096))
+                elif body == 'cyrillic':
+                    # Короткий по символам, но длиннее 4096 байт фрагмент
+                    writer.write(encode_packet(request_id, 0, 'я' * 4096))
+                    writer.write(encode_packet(request_id, 0, 'ж' * 3000))
+                elif body == 'list':
+                    writer.write(encode_packet(request_id, 0, 'There are 1 of a max of 20 players online: §aSteve'))
+                else:
+                    writer.write(encode_packet(request_id, 0, f'echo {body}'))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+class VanillaRconServer(FakeRconServer):
+    """Как RconClient ванильного сервера: одно чтение до 1460 байт - один пакет.
+
+    Если в чтение попало больше одного пакета, длина не сходится и сервер
+    закрывает соединение.
+    """
+    
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self.writers.append(writer)
+        try:
+            while True:
+                data = await reader.read(1460)
+                if len(data) < 14 or int.from_bytes(data[:4], 'little', signed=True) != len(data) - 4:
+                    break
+                request_id, packet_type, body = await read_packet(_Bytes(data))
+                if packet_type == TYPE_LOGIN:
+                    ok = body == self.password
+                    writer.write(encode_packet(request_id if ok else -1, TYPE_COMMAND, ''))
+                elif packet_type == TYPE_COMMAND:
+                    writer.write(encode_packet(request_id, 0, f'echo {body}'))
+                else:
+                    writer.write(encode_packet(request_id, 0, f'Unknown request {packet_type:x}'))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+class _Bytes:
+    """Поток из готовых байт для read_packet"""
+    
+    def __init__(self, data):
+        self.data = data
+    
+    async def readexactly(self, count):
+        chunk, self.data = self.data[:count], self.data[count:]
+        return chunk
+
+class TestRconClient(unittest.IsolatedAsyncioTestCase):
+    
+    async def asyncSetUp(self):
+        self.server = FakeRconServer()
+        await self.server.start()
+        self.client = RconClient(port=self.server.port, password='secret', timeout=2)
+    
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.server.stop()
+    
+    async def test_command_reuses_connection(self):
+        """Тест: команды идут через одно соединение, цветовые коды убираются"""
+        self.assertEqual(await self.client.command('list'), 'There are 1 of a max of 20 players online: Steve')
+        self.assertEqual(await self.client.command('save-all'), 'echo save-all')
+        
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.client.connects, 1)
+    
+    async def test_pipelined_commands(self):
+        """Тест: параллельные команды получают свои ответы"""
+        commands = [f'say {i}' for i in range(50)]
+        replies = await asyncio.gather(*(self.client.command(command) for command in commands))
+        
+        self.assertEqual(replies, [f'echo {command}' for command in commands])
+        self.assertEqual(self.server.connections, 1)
+    
+    async def test_fragmented_response(self):
+        """Тест сборки ответа из нескольких пакетов"""
+        reply = await self.client.command('long')
+        
+        self.assertEqual(reply, 'a' * 4096 + 'b' * 10)
+        # Длина ответа кратна 4096, последний фрагмент длиннее 4096 байт
+        self.assertEqual(await self.client.command('exact'), 'a' * 4096 + 'b' * 4096)
+        self.assertEqual(await self.client.command('cyrillic'), 'я' * 4096 + 'ж' * 3000)
+    
+    async def test_wrong_password(self):
+        """Тест неверного пароля и задержки перед повтором"""
+        client = RconClient(port=self.server.port, password='wrong', timeout=2)
+        with self.assertRaises(RconAuthError):
+            await client.command('list')
+        
+        # Повторная попытка сразу не делается
+        with self.assertRaises(ConnectionError):
+            await client.command('list')
+        self.assertEqual(self.server.connections, 1)
+    
+    async def test_reconnect_after_drop(self):
+        """Тест переподключения после обрыва соединения"""
+        await self.client.command('list')
+        self.server.drop_clients()
+        await asyncio.sleep(0.05)
+        
+        self.assertEqual(await self.client.command('save-all'), 'echo save-all')
+        self.assertEqual(self.client.connects, 2)
+
+class TestVanillaServer(unittest.IsolatedAsyncioTestCase):
+    
+    async def test_one_packet_per_read(self):
+        """Тест: маркер и параллельные команды не склеиваются в одно чтение сервера"""
+        server = VanillaRconServer()
+        await server.start()
+        client = RconClient(port=server.port, password='secret', timeout=2)
+        try:
+            self.assertEqual(await client.command('list'), 'echo list')
+            commands = [f'say {i}' for i in range(10)]
+            replies = await asyncio.gather(*(client.command(command) for command in commands))
+            self.assertEqual(replies, [f'echo {command}' for command in commands])
+            self.assertEqual(server.connections, 1)
+        finally:
+            await client.close()
+            await server.stop()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+import sys
+
+# Добавляем путь к папке бота и к корню проекта
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, os.path.dirname(BOT_DIR))
+
+from server_process import MinecraftServer, build_command
+
+# Поддельный сервер: печатает строку готовности и ждет команду stop в stdin
+FAKE_SERVER = """
+import sys, time
+print('[Server thread/INFO]: Starting minecraft server version 1.20.4', flush=True)
+time.sleep(0.2)
+print('[Server thread/INFO]: Done (0.215s)! For help, type "help"', flush=True)
+for line in sys.stdin:
+    if line.strip() == 'stop':
+        print('[Server thread/INFO]: Stopping server', flush=True)
+        break
+    print('[Server thread/INFO]: Unknown command ' + line.strip(), flush=True)
+"""
+
+# Сервер, который игнорирует stop
+STUBBORN_SERVER = """
+import sys, time
+print('Done (0.1s)! For help, type "help"', flush=True)
+for line in sys.stdin:
+    pass
+time.sleep(60)
+"""
+
+def fake_config(script, **extra):
+    config = {
+        'command': [sys.executable, '-u', '-c', script],
+        'server_dir': BOT_DIR,
+        'start_timeout': 10,
+        'stop_timeout': 10
+    }
+    config.update(extra)
+    return config
+
+class TestBuildCommand(unittest.TestCase):
+    
+    def test_jvm_command(self):
+        """Тест команды запуска JVM с настройками памяти"""
+        command = build_command({'jar_path': 'server.jar', 'min_ram': '1G', 'max_ram': '4G'})
+        
+        self.assertEqual(command[:3], ['java', '-Xms1G', '-Xmx4G'])
+        self.assertEqual(command[-3], '-jar')
+        self.assertTrue(command[-2].endswith('server.jar'))
+        self.assertEqual(command[-1], 'nogui')
+
+class TestMinecraftServer(unittest.IsolatedAsyncioTestCase):
+    
+    async def test_start_detects_ready_and_stops_cleanly(self):
+        """Тест: готовность по строке Done, остановка командой stop"""
+        server = MinecraftServer(console_lines=50)
+        
+        result = await server.start(fake_config(FAKE_SERVER))
+        self.assertEqual(result, 'ready')
+        self.assertEqual(server.status, 'running')
+        self.assertTrue(server.is_running())
+        self.assertIn('Done (', server.output.tail(1)[0])
+        
+        await server.send_command('list')
+        forced = await server.stop(timeout=10)
+        
+        self.assertFalse(forced)
+        self.assertEqual(server.status, 'stopped')
+        self.assertEqual(server.process.returncode, 0)
+        self.assertIn('Unknown command list', "\n".join(server.output.tail(5)))
+        self.assertIn('Stopping server', server.output.tail(1)[0])
+    
+    async def test_exit_during_startup(self):
+        """Тест: процесс завершился до строки готовности"""
+        server = MinecraftServer()
+        
+        result = await server.start(fake_config("print('Error: Unable to access jarfile')"))
+        
+        self.assertEqual(result, 'exited')
+        self.assertEqual(server.status, 'stopped')
+        self.assertEqual(server.output.tail(1), ['Error: Unable to access jarfile'])
+    
+    async def test_stop_timeout_forces_exit(self):
+        """Тест: сервер, не реагирующий на stop, завершается по таймауту"""
+        server = MinecraftServer()
+        self.assertEqual(await server.start(fake_config(STUBBORN_SERVER)), 'ready')
+        
+        forced = await server.stop(timeout=0.5)
+        
+        self.assertTrue(forced)
+        self.assertEqual(server.status, 'stopped')
+        self.assertFalse(server.is_running())
+    
+    async def test_unexpected_exit_is_tracked(self):
+        """Тест: падение работающего сервера переводит статус в stopped"""
+        server = MinecraftServer()
+        script = "import time\nprint('Done (0.1s)!', flush=True)\ntime.sleep(0.3)"
+        self.assertEqual(await server.start(fake_config(script)), 'ready')
+        
+        await server.process.wait()
+        await server._watch_task
+        
+        self.assertEqual(server.status, 'stopped')
+
+if __name__ == '__main__':
+    unittest.main()
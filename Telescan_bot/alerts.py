@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+
+# (метрика снимка, ключ порога в monitoring, подпись, единица)
+ALERT_METRICS = (
+    ('cpu_percent', 'cpu_threshold', '🖥️ CPU', '%'),
+    ('memory_percent', 'memory_threshold', '💾 RAM', '%'),
+    ('disk_percent', 'disk_threshold', '💿 Диск', '%'),
+    ('temperature', 'temperature_threshold', '🌡️ Температура', '°C'),
+)
+
+
+class AlertEngine:
+    """Проверка порогов с гистерезисом и кулдауном по каждой метрике.
+
+    Метрика переходит в тревогу, когда значение выше порога, и выходит из
+    нее, только опустившись ниже ``порог - hysteresis``. Повторное
+    уведомление по той же метрике - не раньше чем через ``cooldown`` секунд
+    (время последнего уведомления хранится в ``last_alert_time``).
+    """
+
+    def __init__(self, last_alert_time, hysteresis=5):
+        self.last_alert_time = last_alert_time
+        self.hysteresis = hysteresis
+        self.active = set()
+
+    def evaluate(self, snapshot, thresholds, cooldown, now=None):
+        """Проверить снимок метрик.
+
+        Возвращает (alerts, recovered): списки (подпись, значение, порог, единица)
+        для новых уведомлений и для метрик, вернувшихся в норму.
+        """
+        now = time.time() if now is None else now
+        alerts = []
+        recovered = []
+
+        for metric, threshold_key, title, unit in ALERT_METRICS:
+            value = snapshot.get(metric)
+            threshold = thresholds.get(threshold_key)
+            if value is None or threshold is None:
+                continue
+
+            if metric in self.active:
+                if value < threshold - self.hysteresis:
+                    self.active.discard(metric)
+                    recovered.append((title, value, threshold, unit))
+                    continue
+            elif value > threshold:
+                self.active.add(metric)
+
+            if metric in self.active and value > threshold:
+                if now - self.last_alert_time.get(metric, 0) >= cooldown:
+                    self.last_alert_time[metric] = now
+                    alerts.append((title, value, threshold, unit))
+
+        return alerts, recovered
+
+
+def format_alert_message(alerts, recovered):
+    """Одно сообщение со всеми одновременными превышениями"""
+    lines = []
+    if alerts:
+        lines.append("🚨 **Превышение порогов**\n")
+        for title, value, threshold, unit in alerts:
+            lines.append(f"{title}: {value:.1f}{unit} (порог {threshold}{unit})")
+    if recovered:
+        if lines:
+            lines.append("")
+        lines.append("✅ **Вернулось в норму**\n")
+        for title, value, threshold, unit in recovered:
+            lines.append(f"{title}: {value:.1f}{unit}")
+    return "\n".join(lines)
@@ -4,14 +4,26 @@
 import asyncio
 import json
 import logging
-import psutil
+import os
 import schedule
 import sys
 import time
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
-import traceback
+
+# Общие модули лежат в корне проекта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.config import BASE_SCHEMA, NUMBER, REQUIRED, ConfigStore, has_changed, merge_schema
+from common.crashes import CrashStore, bot_crash_path
+from common.logs import configure_logging, reload_logging, setup_logging
+from common.metrics import MetricsSampler
+from common.render_cache import RenderCache
+from common.router import Router
+from common.sender import MessageSender, PRIORITY_ALERT
+from common.timeseries import TimeSeriesStore, sparkline
+from common.webhook import run_webhook
+from alerts import AlertEngine, format_alert_message
 
 # Попробуем импортировать nest_asyncio для Windows/IDE
 try:
@@ -21,100 +33,126 @@ except ImportError:
     pass
 
 # Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler('telescan.log'),
-        logging.StreamHandler()
-    ]
-)
+# Запись в файл и консоль идет в фоновом потоке, файл ротируется
+setup_logging('telescan.log')
 logger = logging.getLogger(__name__)
 
-ERROR_LOG = 'errors.txt'
-
-def log_uncaught_exception(exc_type, exc_value, exc_traceback):
-    with open(ERROR_LOG, 'a', encoding='utf-8') as f:
-        f.write(f"\n{'='*40}\n")
-        f.write(f"Время: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"Тип: {exc_type.__name__}\n")
-        f.write(f"Ошибка: {exc_value}\n")
-        traceback.print_tb(exc_traceback, file=f)
-        f.write(f"{'='*40}\n")
+# Проверка config.json при загрузке и горячей перезагрузке
+CONFIG_SCHEMA = merge_schema(BASE_SCHEMA, {
+    REQUIRED: {'monitoring'},
+    'monitoring': {
+        REQUIRED: {'check_interval', 'cpu_threshold', 'memory_threshold', 'disk_threshold', 'temperature_threshold'},
+        'cpu_threshold': NUMBER,
+        'memory_threshold': NUMBER,
+        'disk_threshold': NUMBER,
+        'temperature_threshold': NUMBER,
+        'hysteresis': NUMBER,
+        'history_db': str
+    },
+    'alerts': {'enable_notifications': bool, 'notification_interval': NUMBER},
+    'notifications': {'enabled': bool, 'cooldown': NUMBER}
+})
 
-sys.excepthook = log_uncaught_exception
+# Необработанные исключения - в хранилище сбоев рядом с main.py:
+# одна запись на повторяющийся сбой вместо растущего errors.txt
+crash_store = CrashStore(bot_crash_path(__file__), bot='Telescan Bot')
+crash_store.install()
 
 class TelescanBot:
-    def __init__(self):
+    def __init__(self, config_path='config.json'):
+        self.config_path = config_path
         self.config = self.load_config()
+        self.config_store = ConfigStore(config_path, CONFIG_SCHEMA)
+        self.config_task = None
         self.last_alert_time = {}
         self.monitoring_task = None
+        self.metrics = MetricsSampler(interval=1)
+        # Правки сообщений без изменений не отправляются
+        self.render = RenderCache()
+        # Кнопки и команды - через таблицу маршрутов с замером задержек
+        self.router = Router()
+        # Исходящие сообщения - через общую очередь с лимитами Telegram
+        self.sender = MessageSender()
+        # История метрик пополняется из потока сборщика, без чтения /proc в обработчиках
+        self.history = TimeSeriesStore()
+        self.metrics.add_listener(self.history.add_snapshot)
+        self.alerts = AlertEngine(self.last_alert_time)
         
     def load_config(self):
         """Загрузка конфигурации"""
         try:
-            with open('config.json', 'r', encoding='utf-8') as f:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except FileNotFoundError:
-            logger.error("Файл config.json не найден!")
+            logger.error(f"Файл {self.config_path} не найден!")
             return {}
     
+    def apply_config(self, config, changed):
+        """Новый снимок конфига: пороги и интервалы читаются из него при следующей проверке"""
+        self.config = config
+        if has_changed(changed, 'monitoring.sample_interval'):
+            self.metrics.interval = config.get('monitoring', {}).get('sample_interval', 1)
+        if has_changed(changed, 'admin_ids'):
+            self.router.set_admins(config.get('admin_ids', []))
+    
     def get_system_info(self):
-        """Получение информации о системе"""
+        """Получение информации о системе (последний снимок сборщика метрик)"""
         try:
-            # CPU
-            cpu_percent = psutil.cpu_percent(interval=1)
-            cpu_count = psutil.cpu_count()
-            
-            # Память
-            memory = psutil.virtual_memory()
-            memory_used_gb = memory.used / (1024**3)
-            memory_total_gb = memory.total / (1024**3)
-            
-            # Диск
-            disk = psutil.disk_usage('/')
-            disk_used_gb = disk.used / (1024**3)
-            disk_total_gb = disk.total / (1024**3)
-            
-            # Температура (если доступно)
-            try:
-                with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                    temp = float(f.read()) / 1000
-            except:
-                temp = None
-            
-            # Сеть
-            network = psutil.net_io_counters()
-            
-            return {
-                'cpu_percent': cpu_percent,
-                'cpu_count': cpu_count,
-                'memory_percent': memory.percent,
-                'memory_used_gb': memory_used_gb,
-                'memory_total_gb': memory_total_gb,
-                'disk_percent': disk.percent,
-                'disk_used_gb': disk_used_gb,
-                'disk_total_gb': disk_total_gb,
-                'temperature': temp,
-                'network_bytes_sent': network.bytes_sent,
-                'network_bytes_recv': network.bytes_recv
-            }
+            return dict(self.metrics.snapshot())
         except Exception as e:
             logger.error(f"Ошибка получения системной информации: {e}")
             return {}
     
+    def get_alert_settings(self):
+        """Включены ли уведомления и кулдаун в секундах.
+        
+        Поддерживаются обе схемы конфига: alerts.enable_notifications/
+        notification_interval и notifications.enabled/cooldown.
+        """
+        alerts = self.config.get('alerts', {})
+        notifications = self.config.get('notifications', {})
+        enabled = alerts.get('enable_notifications', notifications.get('enabled', True))
+        cooldown = alerts.get('notification_interval', notifications.get('cooldown', 300))
+        return enabled, cooldown
+    
+    async def check_alerts(self, bot):
+        """Одна проверка порогов по последнему снимку метрик"""
+        enabled, cooldown = self.get_alert_settings()
+        snapshot = self.metrics.latest()
+        if not enabled or not snapshot:
+            return
+        
+        self.alerts.hysteresis = self.config['monitoring'].get('hysteresis', 5)
+        alerts, recovered = self.alerts.evaluate(snapshot, self.config['monitoring'], cooldown)
+        if not alerts and not recovered:
+            return
+        
+        # Все одновременные превышения уходят одним сообщением
+        text = format_alert_message(alerts, recovered)
+        await self.sender.send_many(
+            bot, self.config.get('admin_ids', []), text, PRIORITY_ALERT, parse_mode='Markdown'
+        )
+    
+    async def monitoring_loop(self, bot):
+        """Фоновая проверка порогов каждые check_interval секунд"""
+        while True:
+            try:
+                await asyncio.sleep(self.config['monitoring'].get('check_interval', 60))
+                await self.check_alerts(bot)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Ошибка проверки порогов: {e}")
+    
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Команда /start"""
-        if update.effective_user.id not in self.config.get('admin_ids', []):
-            await update.message.reply_text("⛔ У вас нет доступа к этому боту!")
-            return
-            
         keyboard = [
             [InlineKeyboardButton("📊 Системная информация", callback_data='system_info')],
             [InlineKeyboardButton("🌡️ Температура", callback_data='temperature')],
             [InlineKeyboardButton("💾 Память", callback_data='memory')],
             [InlineKeyboardButton("💿 Диск", callback_data='disk')],
             [InlineKeyboardButton("🌐 Сеть", callback_data='network')],
+            [InlineKeyboardButton("📈 Тренды", callback_data='trends')],
             [InlineKeyboardButton("⚙️ Настройки мониторинга", callback_data='settings')]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -126,32 +164,12 @@ class TelescanBot:
             parse_mode='Markdown'
         )
     
-    async def button_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик inline кнопок"""
-        query = update.callback_query
-        await query.answer()
-        
-        if query.data == 'system_info':
-            await self.show_system_info(query)
-        elif query.data == 'temperature':
-            await self.show_temperature(query)
-        elif query.data == 'memory':
-            await self.show_memory_info(query)
-        elif query.data == 'disk':
-            await self.show_disk_info(query)
-        elif query.data == 'network':
-            await self.show_network_info(query)
-        elif query.data == 'settings':
-            await self.show_settings(query)
-        elif query.data == 'back_to_main':
-            await self.show_main_menu(query)
-    
     async def show_system_info(self, query):
         """Показать общую системную информацию"""
         info = self.get_system_info()
         
         if not info:
-            await query.edit_message_text("❌ Ошибка получения данных")
+            await self.render.edit(query, "❌ Ошибка получения данных")
             return
         
         # Определение статуса системы
@@ -176,7 +194,8 @@ class TelescanBot:
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             system_text,
             reply_markup=reply_markup,
             parse_mode='Markdown'
@@ -205,7 +224,8 @@ class TelescanBot:
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             temp_text,
             reply_markup=reply_markup,
             parse_mode='Markdown'
@@ -230,7 +250,8 @@ class TelescanBot:
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             memory_text,
             reply_markup=reply_markup,
             parse_mode='Markdown'
@@ -255,7 +276,8 @@ class TelescanBot:
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             disk_text,
             reply_markup=reply_markup,
             parse_mode='Markdown'
@@ -269,12 +291,27 @@ class TelescanBot:
         sent_mb = info['network_bytes_sent'] / (1024**2)
         recv_mb = info['network_bytes_recv'] / (1024**2)
         
+        # Текущая скорость и средняя за час (KB/s)
+        sent_rate = info.get('network_sent_rate', 0) / 1024
+        recv_rate = info.get('network_recv_rate', 0) / 1024
+        sent_hour = self.history.summary('network_sent_rate', 3600)
+        recv_hour = self.history.summary('network_recv_rate', 3600)
+        
         network_text = f"""
 🌐 **Информация о сети**
 
-**Отправлено:** {sent_mb:.1f}MB
-**Получено:** {recv_mb:.1f}MB
-**Всего:** {sent_mb + recv_mb:.1f}MB
+**Скорость:** ⬆️ {sent_rate:.1f}KB/s ⬇️ {recv_rate:.1f}KB/s
+"""
+        if sent_hour and recv_hour:
+            network_text += (
+                f"**Среднее за час:** ⬆️ {sent_hour['avg'] / 1024:.1f}KB/s ⬇️ {recv_hour['avg'] / 1024:.1f}KB/s\n"
+                f"**Пик за час:** ⬆️ {sent_hour['max'] / 1024:.1f}KB/s ⬇️ {recv_hour['max'] / 1024:.1f}KB/s\n"
+            )
+        network_text += f"""
+**С момента загрузки:**
+Отправлено: {sent_mb:.1f}MB
+Получено: {recv_mb:.1f}MB
+Всего: {sent_mb + recv_mb:.1f}MB
 
 ⏰ **Время:** {datetime.now().strftime('%H:%M:%S')}
         """
@@ -282,12 +319,49 @@ class TelescanBot:
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             network_text,
             reply_markup=reply_markup,
             parse_mode='Markdown'
         )
     
+    def format_trend(self, title, metric, unit):
+        """Строка тренда метрики: 1ч и 24ч min/avg/max, p95 за час и мини-график за сутки"""
+        hour = self.history.summary(metric, 3600)
+        if not hour:
+            return f"**{title}:** нет данных\n"
+        text = f"**{title}**\n"
+        text += f"1ч: {hour['min']:.1f} / {hour['avg']:.1f} / {hour['max']:.1f}{unit}"
+        p95 = self.history.percentile(metric, 95, 3600)
+        if p95 is not None:
+            text += f", p95 {p95:.1f}{unit}"
+        text += "\n"
+        day = self.history.summary(metric, 86400)
+        if day:
+            text += f"24ч: {day['min']:.1f} / {day['avg']:.1f} / {day['max']:.1f}{unit}\n"
+            text += f"`{sparkline(self.history.series(metric, 86400, 24))}`\n"
+        return text
+    
+    async def show_trends(self, query):
+        """Показать тренды метрик за час и сутки"""
+        trends_text = "📈 **Тренды** (мин / сред / макс)\n\n"
+        trends_text += self.format_trend("🖥️ CPU", 'cpu_percent', '%') + "\n"
+        trends_text += self.format_trend("💾 RAM", 'memory_percent', '%') + "\n"
+        trends_text += self.format_trend("🌡️ Температура", 'temperature', '°C') + "\n"
+        trends_text += self.format_trend("💿 Диск", 'disk_percent', '%')
+        trends_text += f"\n⏰ **Время:** {datetime.now().strftime('%H:%M:%S')}"
+        
+        keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        await self.render.edit(
+            query,
+            trends_text,
+            reply_markup=reply_markup,
+            parse_mode='Markdown'
+        )
+    
     async def show_settings(self, query):
         """Показать настройки мониторинга"""
         settings_text = f"""
@@ -301,11 +375,13 @@ class TelescanBot:
 
 **Уведомления:** {'✅ Включены' if self.config['alerts']['enable_notifications'] else '❌ Выключены'}
         """
+        settings_text += self.router.format_stats()
         
         keyboard = [[InlineKeyboardButton("🔙 Назад", callback_data='back_to_main')]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             settings_text,
             reply_markup=reply_markup,
             parse_mode='Markdown'
@@ -319,33 +395,75 @@ class TelescanBot:
             [InlineKeyboardButton("💾 Память", callback_data='memory')],
             [InlineKeyboardButton("💿 Диск", callback_data='disk')],
             [InlineKeyboardButton("🌐 Сеть", callback_data='network')],
+            [InlineKeyboardButton("📈 Тренды", callback_data='trends')],
             [InlineKeyboardButton("⚙️ Настройки мониторинга", callback_data='settings')]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        await query.edit_message_text(
+        await self.render.edit(
+            query,
             "📱 **Telescan Bot - Мониторинг телефона**\n\n"
             "Выберите что хотите проверить:",
             reply_markup=reply_markup,
             parse_mode='Markdown'
         )
 
+def create_application(bot, builder=None):
+    """Приложение Telegram с обработчиками бота (builder задает хост-режим)"""
+    builder = builder or Application.builder()
+    application = builder.token(bot.config['bot_token']).build()
+    
+    # Добавление обработчиков
+    bot.router.set_admins(bot.config.get('admin_ids', []))
+    bot.router.add('system_info', bot.show_system_info)
+    bot.router.add('temperature', bot.show_temperature)
+    bot.router.add('memory', bot.show_memory_info)
+    bot.router.add('disk', bot.show_disk_info)
+    bot.router.add('network', bot.show_network_info)
+    bot.router.add('trends', bot.show_trends)
+    bot.router.add('settings', bot.show_settings)
+    bot.router.add('back_to_main', bot.show_main_menu)
+    application.add_handler(CommandHandler("start", bot.router.command('start', bot.start_command)))
+    application.add_handler(CallbackQueryHandler(bot.router.dispatch))
+    # Сбои в обработчиках - в хранилище сбоев бота
+    application.add_error_handler(crash_store.error_handler)
+    return application
+
+def start_background_tasks(bot, application):
+    """Фоновые задачи бота (вызывать внутри работающего цикла событий)"""
+    # Фоновый сбор метрик
+    bot.history.open_database(bot.config.get('monitoring', {}).get('history_db', 'metrics.db'))
+    bot.metrics.interval = bot.config.get('monitoring', {}).get('sample_interval', 1)
+    bot.metrics.start()
+    
+    # Фоновая проверка порогов и уведомления
+    bot.monitoring_task = asyncio.create_task(bot.monitoring_loop(application.bot))
+
+    # Горячая перезагрузка config.json: обработчики читают неизменяемый снимок
+    bot.config = bot.config_store.prime(bot.config)
+    bot.config_store.subscribe(bot.apply_config)
+    bot.config_task = asyncio.create_task(bot.config_store.watch())
+
 async def main():
     """Основная функция"""
     try:
         bot = TelescanBot()
+        # Ротация и сжатие лога из конфига (в хост-режиме лог общий)
+        configure_logging(bot.config.get('logging'))
+        bot.config_store.subscribe(reload_logging)
         
         # Создание приложения
-        application = Application.builder().token(bot.config['bot_token']).build()
-        
-        # Добавление обработчиков
-        application.add_handler(CommandHandler("start", bot.start_command))
-        application.add_handler(CallbackQueryHandler(bot.button_handler))
+        application = create_application(bot)
+        start_background_tasks(bot, application)
         
         # Запуск бота
         logger.info("Telescan Bot запущен")
         logger.info(f"Токен: {bot.config['bot_token'][:10]}...")
-        await application.run_polling()
+        # Вебхук вместо long polling, если он включен в конфиге
+        if bot.config.get('webhook', {}).get('enabled'):
+            await run_webhook(application, bot.config['webhook'])
+        else:
+            await application.run_polling()
         
     except Exception as e:
         logger.error(f"Критическая ошибка в main(): {e}")
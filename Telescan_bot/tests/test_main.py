@@ -130,6 +130,69 @@ class TestTelescanBot(unittest.TestCase):
         if 'temperature' in info and info['temperature'] is not None:
             self.assertEqual(info['temperature'], 45.0)
     
+    @patch('psutil.cpu_percent', return_value=30.0)
+    def test_history_fed_by_sampler(self, mock_cpu):
+        """Тест: снимки сборщика попадают в историю метрик"""
+        from main import TelescanBot
+        bot = TelescanBot()
+        bot.config = self.test_config
+        
+        bot.metrics.sample_now()
+        bot.metrics.sample_now()
+        
+        summary = bot.history.summary('cpu_percent', 3600)
+        self.assertEqual(summary['count'], 2)
+        self.assertEqual(summary['avg'], 30.0)
+        self.assertIn('CPU', bot.format_trend("🖥️ CPU", 'cpu_percent', '%'))
+    
+    def test_alert_engine_hysteresis_and_cooldown(self):
+        """Тест гистерезиса и кулдауна уведомлений"""
+        from alerts import AlertEngine
+        last_alert_time = {}
+        engine = AlertEngine(last_alert_time, hysteresis=5)
+        thresholds = self.test_config['monitoring']
+        
+        alerts, _ = engine.evaluate({'cpu_percent': 90}, thresholds, cooldown=300, now=1000)
+        self.assertEqual(len(alerts), 1)
+        self.assertEqual(last_alert_time['cpu_percent'], 1000)
+        
+        # В пределах кулдауна повторного уведомления нет
+        alerts, _ = engine.evaluate({'cpu_percent': 95}, thresholds, cooldown=300, now=1100)
+        self.assertEqual(alerts, [])
+        
+        # Ниже порога, но в полосе гистерезиса - тревога не снимается
+        alerts, recovered = engine.evaluate({'cpu_percent': 78}, thresholds, cooldown=300, now=1200)
+        self.assertEqual((alerts, recovered), ([], []))
+        
+        _, recovered = engine.evaluate({'cpu_percent': 70}, thresholds, cooldown=300, now=1300)
+        self.assertEqual(len(recovered), 1)
+        
+        # После кулдауна новое превышение снова уведомляет
+        alerts, _ = engine.evaluate({'cpu_percent': 90}, thresholds, cooldown=300, now=1400)
+        self.assertEqual(len(alerts), 1)
+    
+    def test_check_alerts_batches_breaches(self):
+        """Тест: одновременные превышения уходят одним сообщением"""
+        import asyncio
+        from unittest.mock import AsyncMock
+        from main import TelescanBot
+        bot = TelescanBot()
+        bot.config = self.test_config
+        bot.metrics.latest = Mock(return_value={
+            'cpu_percent': 95.0, 'memory_percent': 90.0, 'disk_percent': 10.0, 'temperature': None
+        })
+        telegram_bot = Mock()
+        telegram_bot.send_message = AsyncMock()
+        
+        asyncio.run(bot.check_alerts(telegram_bot))
+        asyncio.run(bot.check_alerts(telegram_bot))
+        
+        telegram_bot.send_message.assert_called_once()
+        text = telegram_bot.send_message.call_args.kwargs['text']
+        self.assertIn('CPU', text)
+        self.assertIn('RAM', text)
+        self.assertNotIn('Диск', text)
+    
     def test_config_validation(self):
         """Тест валидации конфигурации"""
         from main import TelescanBot
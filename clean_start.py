@@ -1,238 +1,116 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import subprocess
-import sys
+import asyncio
 import os
 import time
 import psutil
-import signal
 
-def kill_python_processes():
-    """Убить все процессы Python, связанные с ботами"""
-    killed_count = 0
+from common.logs import rotate_log
+from common.process_table import script_path
+from start_bots import create_supervisor, run_bots
+
+# Файлы ботов, процессы которых нужно убить (и прежний супервизор,
+# иначе он сразу перезапустит убитых ботов)
+BOT_FILES = [
+    "Telescan_bot/main.py",
+    "MineServ_bot/main.py", 
+    "Mather_bots/main.py",
+    "start_bots.py",
+    "clean_start.py"
+]
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_SCRIPTS = {os.path.normcase(os.path.normpath(os.path.join(ROOT_DIR, path))) for path in BOT_FILES}
+
+def find_bot_processes():
+    """Найти процессы ботов за один проход по таблице процессов"""
+    own_pids = {os.getpid(), os.getppid()}
+    targets = []
     
     for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
         try:
-            # Проверяем, что это Python процесс
-            if proc.info['name'] and 'python' in proc.info['name'].lower():
-                cmdline = proc.info['cmdline']
-                if cmdline and any('main.py' in arg for arg in cmdline):
-                    print(f"🔪 Убиваю процесс {proc.info['pid']}: {' '.join(cmdline)}")
-                    try:
-                        proc.kill()  # Принудительно убиваем
-                        killed_count += 1
-                    except psutil.NoSuchProcess:
-                        pass
+            cmdline = proc.info['cmdline']
+            if not cmdline or proc.info['pid'] in own_pids:
+                continue
+            # Только интерпретаторы Python: nano start_bots.py или less
+            # clean_start.py не трогаем
+            if not (proc.info['name'] and 'python' in proc.info['name'].lower()):
+                continue
+            # Скрипт должен быть одним из BOT_FILES этого проекта: чужие main.py не трогаем
+            if script_path(cmdline, proc.cwd) in BOT_SCRIPTS:
+                targets.append(proc)
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
             pass
     
-    return killed_count
+    return targets
 
-def kill_telegram_bot_processes():
-    """Убить процессы по имени файлов ботов"""
-    bot_files = [
-        "Telescan_bot/main.py",
-        "MineServ_bot/main.py", 
-        "Mather_bots/main.py"
-    ]
-    
-    killed_count = 0
-    
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+def kill_processes(procs, timeout=10):
+    """Убить процессы и дождаться их завершения через psutil.wait_procs"""
+    for proc in procs:
         try:
-            cmdline = proc.info['cmdline']
-            if cmdline:
-                cmdline_str = ' '.join(cmdline)
-                for bot_file in bot_files:
-                    if bot_file in cmdline_str:
-                        print(f"🔪 Убиваю процесс бота {proc.info['pid']}: {cmdline_str}")
-                        try:
-                            proc.kill()
-                            killed_count += 1
-                        except psutil.NoSuchProcess:
-                            pass
-                        break
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            print(f"🔪 Убиваю процесс {proc.pid}: {' '.join(proc.info['cmdline'])}")
+            proc.kill()  # Принудительно убиваем
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
             pass
     
-    return killed_count
+    gone, alive = psutil.wait_procs(procs, timeout=timeout)
+    for proc in alive:
+        print(f"⚠️ Процесс {proc.pid} не завершился за {timeout} секунд")
+    return gone, alive
 
-def clear_logs():
-    """Очистить все лог-файлы"""
+def rotate_logs():
+    """Закрыть логи ботов в старые сегменты.
+    
+    Вместо очистки текущий лог становится сегментом .1, а самый старый
+    удаляется: история последних запусков сохраняется, но объем логов
+    ограничен числом сегментов.
+    """
     log_files = [
         "Telescan_bot/telescan.log",
         "MineServ_bot/mineserv.log",
         "Mather_bots/manager.log"
     ]
     
-    cleared_count = 0
+    rotated_count = 0
     
     for log_file in log_files:
-        if os.path.exists(log_file):
-            try:
-                # Очищаем файл, оставляя только заголовок
-                with open(log_file, 'w', encoding='utf-8') as f:
-                    f.write(f"# Лог очищен {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                print(f"🧹 Очищен лог: {log_file}")
-                cleared_count += 1
-            except Exception as e:
-                print(f"❌ Ошибка очистки {log_file}: {e}")
-    
-    return cleared_count
-
-def wait_for_processes_to_die():
-    """Ждать, пока процессы полностью завершатся"""
-    print("⏳ Ждем завершения процессов...")
-    
-    for _ in range(10):  # Ждем максимум 10 секунд
-        active_processes = 0
-        
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if proc.info['name'] and 'python' in proc.info['name'].lower():
-                    cmdline = proc.info['cmdline']
-                    if cmdline and any('main.py' in arg for arg in cmdline):
-                        active_processes += 1
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                pass
-        
-        if active_processes == 0:
-            print("✅ Все процессы завершены")
-            return True
-        
-        print(f"⏳ Осталось процессов: {active_processes}")
-        time.sleep(1)
-    
-    print("⚠️ Некоторые процессы не завершились за 10 секунд")
-    return False
-
-def start_bot(bot_name, bot_path):
-    """Запустить бота в отдельном процессе"""
-    try:
-        # Проверяем, что папка существует
-        if not os.path.exists(bot_path):
-            print(f"❌ Папка {bot_path} не найдена")
-            return None
-            
-        # Проверяем, что main.py существует
-        main_file = os.path.join(bot_path, 'main.py')
-        if not os.path.exists(main_file):
-            print(f"❌ Файл main.py не найден в {bot_path}")
-            return None
-        
-        # Запускаем бота
-        if os.name == 'nt':  # Windows
-            process = subprocess.Popen(
-                [sys.executable, main_file],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                creationflags=subprocess.CREATE_NEW_CONSOLE,
-                cwd=bot_path  # Устанавливаем рабочую директорию
-            )
-        else:  # Linux/Android
-            process = subprocess.Popen(
-                [sys.executable, main_file],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                cwd=bot_path  # Устанавливаем рабочую директорию
-            )
-        
-        print(f"✅ {bot_name} запущен (PID: {process.pid})")
-        return process
-        
-    except Exception as e:
-        print(f"❌ Ошибка запуска {bot_name}: {e}")
-        return None
-
-def stop_bot(process, bot_name):
-    """Остановить бота"""
-    if process and process.poll() is None:
         try:
-            process.terminate()
-            process.wait(timeout=5)
-            print(f"⏹️ {bot_name} остановлен")
-        except subprocess.TimeoutExpired:
-            process.kill()
-            print(f"🔪 {bot_name} принудительно остановлен")
-        except Exception as e:
-            print(f"❌ Ошибка остановки {bot_name}: {e}")
+            if rotate_log(log_file):
+                print(f"🗂️ Лог закрыт в сегмент: {log_file}.1")
+                rotated_count += 1
+        except OSError as e:
+            print(f"❌ Ошибка ротации {log_file}: {e}")
+    
+    return rotated_count
 
-def main():
+async def main():
     """Основная функция"""
     print("🧹 Чистый запуск системы ботов...")
+    started = time.monotonic()
     
-    # 1. Убиваем все процессы Python с main.py
+    # 1. Находим и убиваем все процессы ботов за один проход
     print("\n🔪 Шаг 1: Убиваем все процессы ботов...")
-    killed1 = kill_python_processes()
-    killed2 = kill_telegram_bot_processes()
-    total_killed = killed1 + killed2
-    print(f"🔪 Убито процессов: {total_killed}")
-    
-    # 2. Ждем завершения процессов
-    print("\n⏳ Шаг 2: Ждем завершения процессов...")
-    wait_for_processes_to_die()
-    
-    # 3. Очищаем логи
-    print("\n🧹 Шаг 3: Очищаем лог-файлы...")
-    cleared = clear_logs()
-    print(f"🧹 Очищено логов: {cleared}")
-    
-    # 4. Пауза для стабилизации
-    print("\n⏳ Шаг 4: Пауза для стабилизации...")
-    time.sleep(3)
-    
-    # 5. Запускаем ботов
-    print("\n🚀 Шаг 5: Запускаем ботов...")
-    
-    # Список ботов для запуска
-    bots = [
-        ("Telescan Bot", "Telescan_bot"),
-        ("MineServ Bot", "MineServ_bot"),
-        ("Manager Bot", "Mather_bots")
-    ]
-    
-    processes = []
-    
-    try:
-        # Запускаем всех ботов
-        for bot_name, bot_path in bots:
-            if os.path.exists(bot_path):
-                process = start_bot(bot_name, bot_path)
-                if process:
-                    processes.append((process, bot_name))
-                time.sleep(2)  # Пауза между запусками
-            else:
-                print(f"⚠️ Папка {bot_path} не найдена")
-        
-        print(f"\n🎉 Запущено ботов: {len(processes)}")
-        print("💡 Для остановки нажмите Ctrl+C")
-        
-        # Ждем сигнала остановки
-        while True:
-            time.sleep(1)
-            
-            # Проверяем, не упал ли какой-то бот
-            for process, bot_name in processes[:]:
-                if process.poll() is not None:
-                    print(f"⚠️ {bot_name} завершился неожиданно")
-                    processes.remove((process, bot_name))
-    
-    except KeyboardInterrupt:
-        print("\n🛑 Получен сигнал остановки...")
-        
-        # Останавливаем всех ботов
-        for process, bot_name in processes:
-            stop_bot(process, bot_name)
-        
-        print("✅ Все боты остановлены")
-    
-    except Exception as e:
-        print(f"❌ Критическая ошибка: {e}")
-        
-        # Останавливаем всех ботов при ошибке
-        for process, bot_name in processes:
-            stop_bot(process, bot_name)
+    phase_started = time.monotonic()
+    targets = find_bot_processes()
+    gone, alive = kill_processes(targets)
+    print(f"🔪 Убито процессов: {len(gone)}")
+    if alive:
+        print(f"⚠️ Не завершились: {len(alive)}")
+    print(f"⏱️ {time.monotonic() - phase_started:.2f}с")
+    
+    # 2. Закрываем логи в сегменты
+    print("\n🗂️ Шаг 2: Ротация лог-файлов...")
+    phase_started = time.monotonic()
+    rotated = rotate_logs()
+    print(f"🗂️ Логов в ротации: {rotated}")
+    print(f"⏱️ {time.monotonic() - phase_started:.2f}с")
+    
+    # 3. Запускаем ботов
+    print("\n🚀 Шаг 3: Запускаем ботов...")
+    await run_bots(create_supervisor(), started_at=started)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Общие модули для всех ботов проекта"""
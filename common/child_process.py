@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import atexit
+import logging
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+
+from common.limits import apply_after_spawn, prepare_cgroup, wrap_command
+from common.logs import SegmentedLog
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 4096
+MAX_LINE_LENGTH = 16 * 1024
+
+
+class OutputBuffer:
+    """Ограниченный буфер вывода дочернего процесса.
+
+    Хранит последние ``max_lines`` строк в памяти и, если задан ``log_path``,
+    дописывает их в файл с ротацией по размеру (``max_bytes`` x ``backup_count``).
+    Как и ``LogPipeline``, запись в файл идет из фонового потока: ``append``
+    только кладет строку в очередь, поток пишет накопившиеся строки (до
+    ``max_batch``) пачкой. Каждая новая строка передается функциям из
+    ``listeners``.
+    """
+
+    def __init__(self, max_lines=200, log_path=None, max_bytes=1024 * 1024, backup_count=2, max_batch=500):
+        self.lines = deque(maxlen=max_lines)
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.max_batch = max_batch
+        self.total_lines = 0
+        self.listeners = []
+        self._file = None
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._waiters = []
+
+    def append(self, line):
+        """Добавить строку вывода"""
+        self.lines.append((time.time(), line))
+        self.total_lines += 1
+        if self.log_path:
+            if self._thread is None:
+                self._start_writer()
+            self._queue.put(line)
+        if self._waiters:
+            self._notify(line)
+        for listener in self.listeners:
+            try:
+                listener(line)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика вывода: {e}")
+
+    def wait_for_line(self, pattern):
+        """Future, который завершится первой новой строкой, подходящей под pattern"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((re.compile(pattern), future))
+        return future
+
+    def _notify(self, line):
+        for waiter in self._waiters[:]:
+            regex, future = waiter
+            if future.done():
+                self._waiters.remove(waiter)
+            elif regex.search(line):
+                future.set_result(line)
+                self._waiters.remove(waiter)
+
+    def tail(self, count=20):
+        """Последние строки вывода"""
+        if count <= 0:
+            return []
+        return [line for _, line in list(self.lines)[-count:]]
+
+    def close(self, timeout=5):
+        """Дописать очередь и закрыть файл вывода"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _start_writer(self):
+        self._file = SegmentedLog(self.log_path, self.max_bytes, self.backup_count, rotate_interval=0)
+        self._thread = threading.Thread(target=self._run, name='output-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            line = self._queue.get()
+            batch = [line]
+            while line is not None and len(batch) < self.max_batch:
+                try:
+                    line = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(line)
+            lines = [line for line in batch if line is not None]
+            if lines and self.log_path:
+                self._write(lines)
+            if len(lines) < len(batch):
+                return
+
+    def _write(self, lines):
+        # Пачку режем по границе сегмента, чтобы ротация не зависела от размера пачки
+        try:
+            chunk, size = [], 0
+            for line in lines:
+                text = line + '\n'
+                text_size = len(text.encode('utf-8'))
+                if chunk and self._file.size + size + text_size > self.max_bytes:
+                    self._file.write(''.join(chunk))
+                    chunk, size = [], 0
+                chunk.append(text)
+                size += text_size
+            self._file.write(''.join(chunk))
+        except OSError as e:
+            logger.error(f"Ошибка записи вывода в {self.log_path}: {e}")
+            self.log_path = None
+            self._file.close()
+
+
+async def drain_stream(stream, buffer):
+    """Вычитывать поток до EOF, складывая строки в буфер.
+
+    Читаем блоками, а не readline(), чтобы слишком длинная строка
+    не остановила чтение и не заблокировала дочерний процесс.
+    """
+    pending = b''
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        pending += chunk
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            buffer.append(line.decode('utf-8', 'replace').rstrip('\r'))
+        if len(pending) > MAX_LINE_LENGTH:
+            buffer.append(pending.decode('utf-8', 'replace'))
+            pending = b''
+    if pending:
+        buffer.append(pending.decode('utf-8', 'replace').rstrip('\r'))
+
+
+async def spawn_process(args, buffer, cwd=None, stdin_pipe=False, limits=None, name=None):
+    """Запустить процесс с асинхронной откачкой stdout/stderr в буфер.
+
+    Если ``stdin_pipe``, в stdin процесса можно писать команды.
+    ``limits`` (см. ``common.limits.parse_limits``) применяются при запуске,
+    ``name`` - имя группы cgroup для процесса.
+    Возвращает (process, reader_task).
+    """
+    limits = limits or {}
+    kwargs = {}
+    if os.name == 'nt':  # Windows
+        kwargs['creationflags'] = subprocess.CREATE_NEW_CONSOLE
+    elif limits:
+        cgroup_path = prepare_cgroup(name or 'bot', limits) if limits.get('cgroup') else None
+        args = wrap_command(args, limits, cgroup_path)
+
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.PIPE if stdin_pipe else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        cwd=cwd,
+        **kwargs
+    )
+    if os.name == 'nt' and limits:
+        apply_after_spawn(process.pid, limits)
+    reader_task = asyncio.create_task(drain_stream(process.stdout, buffer))
+    return process, reader_task
+
+
+async def terminate_process(process, timeout=5):
+    """Остановить процесс: terminate, а по таймауту kill.
+
+    Возвращает True, если процесс пришлось убить принудительно.
+    """
+    if process.returncode is not None:
+        return False
+    try:
+        process.terminate()
+    except ProcessLookupError:
+        return False
+    try:
+        await asyncio.wait_for(process.wait(), timeout=timeout)
+        return False
+    except asyncio.TimeoutError:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+        return True
+
+
+async def wait_until_ready(process, buffer, pattern, timeout=15):
+    """Дождаться строки готовности в выводе процесса.
+
+    Возвращает 'ready', 'exited' (процесс завершился раньше) или 'timeout'.
+    Вызывать сразу после spawn_process, до первого await, иначе ранние
+    строки вывода могут пройти мимо ожидания.
+    """
+    ready = buffer.wait_for_line(pattern)
+    exited = asyncio.ensure_future(process.wait())
+    try:
+        done, _ = await asyncio.wait(
+            {ready, exited}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        ready.cancel()
+        exited.cancel()
+    if ready in done:
+        return 'ready'
+    if exited in done:
+        return 'exited'
+    return 'timeout'
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Ключи, которые применяются только при перезапуске бота
+RESTART_KEYS = ('bot_token', 'webhook')
+
+# Общая часть схемы конфигов ботов: тип значения, кортеж типов, вложенная
+# схема (dict) или список с типом элементов ([int]); '*' - схема значений
+# словаря с произвольными ключами. Ключей, которых нет в схеме, не проверяем.
+# REQUIRED - множество ключей, без которых конфиг этого уровня не принимается.
+NUMBER = (int, float)
+REQUIRED = '+required'
+BASE_SCHEMA = {
+    'bot_token': str,
+    'admin_ids': [int],
+    'monitoring': {'sample_interval': NUMBER, 'check_interval': NUMBER},
+    'webhook': {'enabled': bool, 'port': int, 'url': str, 'path': str, 'secret_token': str},
+    'logging': {'max_bytes': int, 'backup_count': int, 'rotate_interval': NUMBER, 'compress': bool}
+}
+
+
+class FrozenDict(dict):
+    """Словарь только для чтения: снимок конфига нельзя случайно изменить"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Снимок конфига только для чтения")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+class FrozenList(list):
+    """Список только для чтения"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Снимок конфига только для чтения")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(value):
+    """Неизменяемая копия JSON-значения (по-прежнему dict/list для json и сравнений)"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Изменяемая копия снимка"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+def merge_schema(*schemas):
+    """Схема бота поверх общей: вложенные схемы объединяются"""
+    result = {}
+    for schema in schemas:
+        for key, rule in schema.items():
+            if isinstance(rule, dict) and isinstance(result.get(key), dict):
+                result[key] = merge_schema(result[key], rule)
+            elif isinstance(rule, set) and isinstance(result.get(key), set):
+                result[key] = result[key] | rule
+            else:
+                result[key] = rule
+    return result
+
+
+def validate_config(config, schema, path=''):
+    """Ошибки конфига по схеме: список строк, пустой - конфиг корректен"""
+    if not isinstance(config, dict):
+        return [f"{path or 'конфиг'}: ожидался объект"]
+    errors = []
+    for key in sorted(schema.get(REQUIRED, ())):
+        if key not in config:
+            where = f"{path}.{key}" if path else key
+            errors.append(f"{where}: обязательный ключ отсутствует")
+    for key, value in config.items():
+        rule = schema.get(key, schema.get('*'))
+        if rule is None or key == REQUIRED:
+            continue
+        where = f"{path}.{key}" if path else key
+        errors.extend(_check(value, rule, where))
+    return errors
+
+
+def _check(value, rule, where):
+    if isinstance(rule, dict):
+        return validate_config(value, rule, where)
+    if isinstance(rule, list):
+        if not isinstance(value, list):
+            return [f"{where}: ожидался список"]
+        return [error for i, item in enumerate(value) for error in _check(item, rule[0], f"{where}[{i}]")]
+    types = rule if isinstance(rule, tuple) else (rule,)
+    # bool - подкласс int, но true вместо числа - почти наверняка ошибка
+    if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+        names = '/'.join(t.__name__ for t in types)
+        return [f"{where}: ожидался {names}, получено {type(value).__name__}"]
+    return []
+
+
+def changed_keys(old, new, path=''):
+    """Пути изменившихся значений: {'monitoring.cpu_threshold', 'bots.new_bot', ...}"""
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        return set() if old == new else {path}
+    changed = set()
+    for key in set(old) | set(new):
+        where = f"{path}.{key}" if path else key
+        if key not in old or key not in new:
+            changed.add(where)
+        elif old[key] != new[key]:
+            changed |= changed_keys(old[key], new[key], where)
+    return changed
+
+
+def has_changed(changed, prefix):
+    """Изменилось ли значение ``prefix`` или что-то внутри него"""
+    return any(key == prefix or key.startswith(prefix + '.') for key in changed)
+
+
+class ConfigStore:
+    """Кэш config.json с горячей перезагрузкой.
+
+    ``watch`` раз в ``interval`` секунд сравнивает mtime, размер и inode
+    файла; при изменении файл читается в потоке, проверяется по схеме и
+    целиком заменяет снимок. Снимок неизменяемый, так что обработчик,
+    взявший его, видит согласованный конфиг, пока не возьмет новый. Файл с
+    ошибкой JSON или схемы не применяется - остается прежний снимок, как и
+    файл, который отклонила одна из проверок ``add_check``.
+    Подписчики ``(снимок, изменившиеся ключи)`` вызываются в цикле событий
+    после замены.
+    """
+
+    def __init__(self, path, schema=None, interval=2):
+        self.path = path
+        self.schema = schema or BASE_SCHEMA
+        self.interval = interval
+        self.snapshot = FrozenDict()
+        self.signature = None
+        self.subscribers = []
+        self.checks = []
+        self.reloads = 0
+        self.rejected = 0
+
+    def subscribe(self, callback):
+        """Подписаться на изменения конфига (повторная подписка при перезапуске в хосте не дублируется)"""
+        if callback not in self.subscribers:
+            self.subscribers.append(callback)
+
+    def add_check(self, callback):
+        """Проверка нового конфига по состоянию бота: ``callback(конфиг)`` возвращает список ошибок"""
+        if callback not in self.checks:
+            self.checks.append(callback)
+
+    def file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def prime(self, config):
+        """Принять уже загруженный ботом конфиг как первый снимок"""
+        self.signature = self.file_signature()
+        if isinstance(config, dict):
+            for error in validate_config(config, self.schema):
+                logger.warning(f"Конфиг {self.path}: {error}")
+            self.snapshot = freeze(config)
+        return self.snapshot
+
+    def read(self):
+        """Прочитать и проверить файл. Возвращает (конфиг, ошибки)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            return None, [str(e)]
+        return config, validate_config(config, self.schema)
+
+    async def check(self):
+        """Перечитать конфиг, если файл изменился. Возвращает изменившиеся ключи"""
+        signature = self.file_signature()
+        if signature is None or signature == self.signature:
+            return set()
+        self.signature = signature
+        config, errors = await asyncio.to_thread(self.read)
+        if not errors:
+            # Проверки состояния бота - в цикле событий, как и сам бот
+            errors = [error for check in self.checks for error in check(config)]
+        if errors:
+            self.rejected += 1
+            logger.error(f"Ошибка конфига {self.path}, оставлен прежний: {'; '.join(errors)}")
+            return set()
+        return self.apply(config)
+
+    def apply(self, config):
+        """Заменить снимок и уведомить подписчиков"""
+        changed = changed_keys(self.snapshot, config)
+        if not changed:
+            return changed
+        self.snapshot = freeze(config)
+        self.reloads += 1
+        logger.info(f"Конфиг {self.path} перезагружен: {', '.join(sorted(changed))}")
+        for key in RESTART_KEYS:
+            if has_changed(changed, key):
+                logger.warning(f"Изменение {key} применится только после перезапуска бота")
+        for callback in self.subscribers:
+            try:
+                callback(self.snapshot, changed)
+            except Exception as e:
+                logger.error(f"Ошибка применения конфига: {e}")
+        return changed
+
+    async def watch(self):
+        """Фоновая проверка файла конфига"""
+        while True:
+            try:
+                await self.check()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка проверки конфига {self.path}: {e}")
+            await asyncio.sleep(self.interval)
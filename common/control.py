@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Сокет управления демоном-супервизором
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), 'bots-supervisor.sock')
+# На Windows нет Unix-сокетов - слушаем loopback
+CONTROL_PORT = 47651
+# Подписчик, не читающий события, отключается при таком объеме неотправленных данных
+MAX_SUBSCRIBER_BUFFER = 256 * 1024
+
+
+def has_unix_sockets():
+    return hasattr(asyncio, 'start_unix_server')
+
+
+async def open_control(path):
+    """Подключиться к сокету управления"""
+    try:
+        if has_unix_sockets():
+            return await asyncio.open_unix_connection(path)
+        return await asyncio.open_connection('127.0.0.1', CONTROL_PORT)
+    except OSError as e:
+        raise ConnectionError(f"Супервизор недоступен: {e}") from e
+
+
+def encode(message):
+    return (json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+class SupervisorServer:
+    """Управление ``BotSupervisor`` через локальный сокет.
+
+    Протокол - JSON-строки. Запрос ``{"cmd": ...}``, ответ ``{"ok": ...}``:
+    status, start, stop, restart (параметр bot; для start/restart еще
+    ready_pattern и ready_timeout), tail (bot, lines). Команда subscribe
+    оставляет соединение открытым: сначала приходит снимок состояния
+    (event=snapshot), затем каждое событие супервизора вместе с новым
+    состоянием бота.
+    """
+
+    def __init__(self, supervisor, path=DEFAULT_SOCKET):
+        self.supervisor = supervisor
+        self.path = path
+        self.subscribers = set()
+        self._server = None
+        supervisor.add_listener(self.publish)
+
+    async def start(self):
+        """Начать слушать сокет"""
+        if has_unix_sockets():
+            if os.path.exists(self.path):
+                os.remove(self.path)  # сокет от прошлого запуска
+            self._server = await asyncio.start_unix_server(self._handle, self.path)
+            os.chmod(self.path, 0o600)
+        else:
+            self._server = await asyncio.start_server(self._handle, '127.0.0.1', CONTROL_PORT)
+        logger.info(f"Сокет управления: {self.path}")
+
+    async def close(self):
+        """Закрыть сокет и отключить подписчиков"""
+        for writer in list(self.subscribers):
+            writer.close()
+        self.subscribers.clear()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if has_unix_sockets() and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def publish(self, bot_id, event, info):
+        """Разослать событие подписчикам"""
+        if not self.subscribers:
+            return
+        message = encode({
+            'event': event,
+            'bot': bot_id,
+            'info': info,
+            'state': self.supervisor.status(bot_id)
+        })
+        for writer in list(self.subscribers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                self.subscribers.discard(writer)
+                writer.close()
+                continue
+            writer.write(message)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if request.get('cmd') == 'subscribe':
+                        writer.write(encode({'event': 'snapshot', 'bots': self.supervisor.status_all()}))
+                        self.subscribers.add(writer)
+                        continue
+                    response = await self.dispatch(request)
+                except Exception as e:
+                    logger.error(f"Ошибка запроса к супервизору: {e}")
+                    response = {'ok': False, 'error': str(e)}
+                writer.write(encode(response))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    async def dispatch(self, request):
+        """Выполнить запрос и вернуть ответ"""
+        cmd = request.get('cmd')
+        if cmd == 'status':
+            return {'ok': True, 'bots': self.supervisor.status_all()}
+
+        bot_id = request.get('bot')
+        if bot_id not in self.supervisor.bots:
+            return {'ok': False, 'error': f"Неизвестный бот: {bot_id}"}
+        if cmd == 'start':
+            success, message = await self.supervisor.start_and_wait(
+                bot_id, request.get('ready_pattern'), request.get('ready_timeout', 15)
+            )
+        elif cmd == 'restart':
+            success, message = await self.supervisor.restart(
+                bot_id, request.get('ready_pattern'), request.get('ready_timeout', 15)
+            )
+        elif cmd == 'stop':
+            if not self.supervisor.is_running(bot_id):
+                return {'ok': False, 'error': "Процесс не найден"}
+            await self.supervisor.stop(bot_id)
+            success, message = True, None
+        elif cmd == 'tail':
+            return {'ok': True, 'lines': self.supervisor.bots[bot_id]['output'].tail(request.get('lines', 20))}
+        else:
+            return {'ok': False, 'error': f"Неизвестная команда: {cmd}"}
+        return {'ok': success, 'error': message, 'state': self.supervisor.status(bot_id)}
+
+
+class SupervisorClient:
+    """Клиент сокета управления: одно короткое соединение на запрос"""
+
+    def __init__(self, path=DEFAULT_SOCKET, timeout=30):
+        self.path = path
+        self.timeout = timeout
+
+    async def request(self, cmd, **params):
+        """Отправить запрос и вернуть ответ (ConnectionError, если демон не запущен)"""
+        reader, writer = await open_control(self.path)
+        try:
+            writer.write(encode(dict(params, cmd=cmd)))
+            await writer.drain()
+            line = await asyncio.wait_for(reader.readline(), timeout=self.timeout)
+            if not line:
+                raise ConnectionError("Супервизор закрыл соединение")
+            return json.loads(line)
+        finally:
+            writer.close()
+
+
+class SupervisorView:
+    """Локальное зеркало состояния ботов, обновляемое подпиской на события.
+
+    ``get(bot_id)`` - поиск в словаре, без запросов к демону и без обхода
+    процессов. Пока подписки нет (демон не запущен), ``connected`` равно False
+    и вызывающий код использует свой запасной способ.
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET, retry_interval=5):
+        self.path = path
+        self.retry_interval = retry_interval
+        self.bots = {}
+        self.connected = False
+        self.listeners = []
+
+    def get(self, bot_id):
+        """Состояние бота или None"""
+        return self.bots.get(bot_id)
+
+    async def run(self):
+        """Держать подписку, переподключаясь при обрыве"""
+        while True:
+            try:
+                await self._subscribe()
+            except asyncio.CancelledError:
+                self.connected = False
+                raise
+            except (ConnectionError, OSError, ValueError) as e:
+                if self.connected:
+                    logger.warning(f"Подписка на супервизор потеряна: {e}")
+            self.connected = False
+            await asyncio.sleep(self.retry_interval)
+
+    async def _subscribe(self):
+        reader, writer = await open_control(self.path)
+        try:
+            writer.write(encode({'cmd': 'subscribe'}))
+            await writer.drain()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    raise ConnectionError("Супервизор закрыл соединение")
+                self.apply(json.loads(line))
+        finally:
+            writer.close()
+
+    def apply(self, message):
+        """Применить снимок или событие"""
+        if message.get('event') == 'snapshot':
+            self.bots = message['bots']
+            self.connected = True
+            logger.info(f"Подписка на супервизор: {len(self.bots)} ботов")
+        elif 'bot' in message:
+            self.bots[message['bot']] = message['state']
+        for listener in self.listeners:
+            try:
+                listener(message)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика события супервизора: {e}")
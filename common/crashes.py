@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+CRASH_FILE = 'crashes.json'
+MAX_MESSAGE = 300
+MAX_FRAMES = 8
+
+# Хранилища, для которых вызван install
+_installed = []
+
+
+def frame_summary(tb):
+    """Кадры стека как (файл, строка, функция, код) без абсолютных путей"""
+    return [
+        (os.path.basename(frame.filename), frame.lineno, frame.name, (frame.line or '').strip())
+        for frame in traceback.extract_tb(tb)
+    ]
+
+
+def fingerprint(exc_type, frames):
+    """Отпечаток сбоя: тип исключения и стек по функциям и строкам кода.
+
+    Номера строк и текст ошибки в отпечаток не входят: правка в другом месте
+    файла или другое значение в сообщении не превращают сбой в новый.
+    """
+    key = exc_type.__qualname__ + '|' + '|'.join(
+        f"{filename}:{function}:{code}" for filename, _, function, code in frames
+    )
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+
+
+class CrashStore:
+    """Сбои бота, сгруппированные по отпечатку трассировки.
+
+    Для каждого отпечатка хранится одна компактная запись: тип, последнее
+    сообщение, место, короткий стек, число повторов, время первого и
+    последнего появления. Цикл падений увеличивает счетчик, а не размер
+    файла; записей не больше ``max_entries`` (вытесняются давно не
+    повторявшиеся). Файл перезаписывается атомарно и не чаще раза в
+    ``save_interval`` секунд, кроме записи при падении процесса.
+    """
+
+    def __init__(self, path=CRASH_FILE, bot=None, max_entries=100, save_interval=5):
+        self.path = path
+        self.bot = bot
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self.crashes = {}
+        self.dirty = False
+        self.saved_at = 0
+        self.lock = threading.Lock()
+        self.timer = None
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.crashes = json.load(f).get('crashes', {})
+        except FileNotFoundError:
+            self.crashes = {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Ошибка чтения сбоев {self.path}: {e}")
+            self.crashes = {}
+
+    def save(self):
+        with self.lock:
+            data = {'bot': self.bot, 'crashes': self.crashes}
+            try:
+                with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(self.path + '.tmp', self.path)
+                self.dirty = False
+                self.saved_at = time.monotonic()
+            except OSError as e:
+                logger.error(f"Ошибка сохранения сбоев {self.path}: {e}")
+
+    def flush(self):
+        """Сохранить накопленные изменения"""
+        if self.dirty:
+            self.save()
+
+    def record(self, exc_type, exc_value, tb, flush=False, now=None):
+        """Учесть сбой. Возвращает его отпечаток"""
+        now = time.time() if now is None else now
+        frames = frame_summary(tb)
+        key = fingerprint(exc_type, frames)
+        message = str(exc_value)[:MAX_MESSAGE]
+        with self.lock:
+            entry = self.crashes.get(key)
+            if entry is None:
+                entry = self.crashes[key] = {'type': exc_type.__name__, 'count': 0, 'first_seen': now}
+            entry['count'] += 1
+            entry['last_seen'] = now
+            entry['message'] = message
+            entry['stack'] = [f"{filename}:{line} {function}" for filename, line, function, _ in frames[-MAX_FRAMES:]]
+            if len(self.crashes) > self.max_entries:
+                oldest = min(self.crashes, key=lambda k: self.crashes[k]['last_seen'])
+                del self.crashes[oldest]
+            self.dirty = True
+        if flush or time.monotonic() - self.saved_at >= self.save_interval:
+            self.save()
+        elif self.timer is None:
+            # Повтор в пределах save_interval сохранится отложенно
+            self.timer = threading.Timer(self.save_interval, self._deferred_save)
+            self.timer.daemon = True
+            self.timer.start()
+        return key
+
+    def _deferred_save(self):
+        self.timer = None
+        self.flush()
+
+    def record_exception(self, error, flush=False):
+        """Учесть пойманное исключение"""
+        return self.record(type(error), error, error.__traceback__, flush=flush)
+
+    def top(self, limit=10):
+        """Самые частые сбои: [(отпечаток, запись)]"""
+        return sorted(self.crashes.items(), key=lambda item: (-item[1]['count'], -item[1]['last_seen']))[:limit]
+
+    def install(self):
+        """Записывать необработанные исключения процесса и потоков.
+
+        Обработчик процесса ставится один раз на все хранилища: в хост-режиме
+        каждый бот вызывает ``install`` при импорте, и сбой записывается в
+        хранилище бота, в чьем коде он произошел (см. ``store_for``).
+        Трассировка по-прежнему печатается в stderr, чтобы ее видел
+        супервизор в выводе бота.
+        """
+        if self not in _installed:
+            _installed.append(self)
+            atexit.register(self.flush)
+        sys.excepthook = _excepthook
+        threading.excepthook = _thread_excepthook
+
+    async def error_handler(self, update, context):
+        """Обработчик ошибок python-telegram-bot: сбой в обработчике тоже учитывается.
+
+        Сетевые ошибки и RetryAfter (в том числе из get_updates, тогда
+        ``update`` - None) - не сбои бота: на нестабильной связи они
+        вытеснили бы настоящие сбои, поэтому только пишутся в лог. BadRequest -
+        подкласс NetworkError, но это ошибка обработчика (разметка, длина
+        текста, клавиатура), и она записывается как сбой.
+        """
+        error = context.error
+        if isinstance(error, (NetworkError, RetryAfter)) and not isinstance(error, BadRequest):
+            logger.warning(f"Сетевая ошибка Telegram: {context.error}")
+            return
+        logger.error(f"Ошибка обработки обновления: {context.error}", exc_info=context.error)
+        self.record_exception(context.error)
+
+
+def store_for(tb):
+    """Хранилище из ``install``, в папке которого самый глубокий кадр стека.
+
+    Если хранилище одно (бот в своем процессе), сбой всегда записывается в
+    него. Сбой вне кода ботов в хост-режиме не записывается никуда.
+    """
+    if len(_installed) == 1:
+        return _installed[0]
+    folders = [(os.path.dirname(os.path.abspath(store.path)) + os.sep, store) for store in _installed]
+    for frame in reversed(traceback.extract_tb(tb)):
+        filename = os.path.abspath(frame.filename)
+        for folder, store in folders:
+            if filename.startswith(folder):
+                return store
+    return None
+
+
+def _excepthook(exc_type, exc_value, exc_traceback):
+    store = store_for(exc_traceback)
+    if store is not None:
+        store.record(exc_type, exc_value, exc_traceback, flush=True)
+    sys.__excepthook__(exc_type, exc_value, exc_traceback)
+
+
+def _thread_excepthook(args):
+    if args.exc_type is not SystemExit:
+        store = store_for(args.exc_traceback)
+        if store is not None:
+            store.record(args.exc_type, args.exc_value, args.exc_traceback, flush=True)
+    threading.__excepthook__(args)
+
+
+def bot_crash_path(main_file):
+    """Файл сбоев рядом с main.py бота, независимо от текущей папки"""
+    return os.path.join(os.path.dirname(os.path.abspath(main_file)), CRASH_FILE)
+
+
+def read_crashes(path):
+    """Записи сбоев из файла другого бота: {отпечаток: запись}"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('crashes', {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.error(f"Ошибка чтения сбоев {path}: {e}")
+        return {}
+
+
+def top_crashes(sources, limit=10):
+    """Самые частые сбои нескольких ботов.
+
+    ``sources`` - {имя бота: путь к файлу сбоев}. Возвращает записи с полями
+    ``bot`` и ``fingerprint``, по убыванию числа повторов.
+    """
+    merged = []
+    for bot, path in sources.items():
+        for key, entry in read_crashes(path).items():
+            merged.append(dict(entry, bot=bot, fingerprint=key))
+    merged.sort(key=lambda entry: (-entry['count'], -entry['last_seen']))
+    return merged[:limit]
+
+
+def format_crash(entry):
+    """Строка сбоя для экрана бота"""
+    last_seen = time.strftime('%d.%m %H:%M', time.localtime(entry['last_seen']))
+    where = entry['stack'][-1] if entry.get('stack') else '?'
+    return (
+        f"💥 {entry['count']}× {entry['type']}: {entry['message'][:80]}\n"
+        f"   {entry['bot']} · {where} · посл. {last_seen}"
+    )
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import logging
+import os
+import time
+
+from telegram.error import BadRequest, Forbidden
+
+from common.sender import PRIORITY_ROUTINE
+
+logger = logging.getLogger(__name__)
+
+
+def is_gone(error):
+    """Сообщение удалено, чат недоступен или бот заблокирован - подписка больше не нужна"""
+    if isinstance(error, Forbidden):
+        return True
+    if isinstance(error, BadRequest):
+        text = str(error).lower()
+        return 'not found' in text or "can't be edited" in text
+    return False
+
+
+class Dashboard:
+    """Сообщение со статусом по идентификаторам: правка идет через очередь отправки"""
+
+    def __init__(self, sender, bot, chat_id, message_id):
+        self.sender = sender
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+
+    async def edit_text(self, text, **kwargs):
+        return await self.sender.edit(self.bot, self.chat_id, self.message_id, text, PRIORITY_ROUTINE, **kwargs)
+
+
+class DashboardRegistry:
+    """Сообщения, которые обновляются вместе со статусом.
+
+    Подписки хранятся в JSON-файле и переживают перезапуск бота. В одном
+    чате следят не больше ``max_per_chat`` сообщений: новое вытесняет самое
+    старое. Сообщение, которое удалили или которое больше нельзя
+    редактировать, отписывается при первой неудачной правке.
+    """
+
+    def __init__(self, path='dashboards.json', max_per_chat=3):
+        self.path = path
+        self.max_per_chat = max_per_chat
+        self.subscriptions = {}
+
+    def __len__(self):
+        return len(self.subscriptions)
+
+    def __contains__(self, key):
+        return key in self.subscriptions
+
+    def load(self):
+        """Прочитать подписки из файла"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Ошибка чтения подписок на статус: {e}")
+            return
+        self.subscriptions = {
+            (entry['chat_id'], entry['message_id']): entry.get('since', time.time())
+            for entry in data.get('dashboards', [])
+        }
+        logger.info(f"Подписок на статус: {len(self.subscriptions)}")
+
+    def save(self):
+        data = {'dashboards': [
+            {'chat_id': chat_id, 'message_id': message_id, 'since': since}
+            for (chat_id, message_id), since in self.subscriptions.items()
+        ]}
+        try:
+            with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(self.path + '.tmp', self.path)
+        except OSError as e:
+            logger.error(f"Ошибка сохранения подписок на статус: {e}")
+
+    def add(self, chat_id, message_id):
+        """Подписать сообщение на обновления"""
+        self.subscriptions[(chat_id, message_id)] = time.time()
+        in_chat = sorted(
+            (since, key) for key, since in self.subscriptions.items() if key[0] == chat_id
+        )
+        for _, key in in_chat[:-self.max_per_chat]:
+            del self.subscriptions[key]
+        self.save()
+
+    def remove(self, chat_id, message_id):
+        """Отписать сообщение"""
+        if self.subscriptions.pop((chat_id, message_id), None) is not None:
+            self.save()
+
+    async def publish(self, render, sender, bot, text, **kwargs):
+        """Разослать одну отрисовку всем подписчикам через кэш отрисовок.
+
+        Возвращает результаты ``render.edit`` по каждому сообщению. Правки,
+        которые кэш отложил, отписываются по ошибке через ``error_listeners``.
+        """
+        if self.on_render_error not in render.error_listeners:
+            render.error_listeners.append(self.on_render_error)
+        dashboards = [Dashboard(sender, bot, chat_id, message_id) for chat_id, message_id in self.subscriptions]
+        results = await asyncio.gather(
+            *(render.edit(dashboard, text, **kwargs) for dashboard in dashboards),
+            return_exceptions=True
+        )
+        for dashboard, result in zip(dashboards, results):
+            if is_gone(result):
+                self.unsubscribe_gone(render, dashboard, result)
+        return results
+
+    def on_render_error(self, render, target, error):
+        """Ошибка отложенной правки: отписать удаленное или недоступное сообщение"""
+        if isinstance(target, Dashboard) and is_gone(error) and (target.chat_id, target.message_id) in self:
+            self.unsubscribe_gone(render, target, error)
+
+    def unsubscribe_gone(self, render, dashboard, error):
+        """Отписать сообщение и забыть его отрисовку"""
+        logger.info(f"Сообщение {dashboard.message_id} в чате {dashboard.chat_id} отписано: {error}")
+        self.remove(dashboard.chat_id, dashboard.message_id)
+        render.forget(dashboard)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import sys
+
+import psutil
+
+from common.resources import MB
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+EXEC_WRAPPER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'limits_exec.py')
+# Жесткий предел памяти в cgroup выше мягкого: до него бота перезапускаем
+# мы, а OOM killer срабатывает только если перезапуск не успел
+HARD_MEMORY_FACTOR = 1.5
+# Доля max_fds, при которой бот перезапускается, пока он еще может работать
+FD_BREACH_RATIO = 0.9
+
+
+def parse_limits(config):
+    """Ограничения бота из блока ``limits`` его конфига.
+
+    Поддерживаются: memory_mb, nice, cpu_affinity, max_fds, cgroup
+    (true или путь к делегированной группе cgroup v2). Неизвестные и
+    неверные значения пропускаются с предупреждением.
+    """
+    limits = {}
+    for key, value in (config or {}).items():
+        try:
+            if key in ('memory_mb', 'max_fds'):
+                value = int(value)
+                if value <= 0:
+                    raise ValueError(value)
+            elif key == 'nice':
+                value = max(-20, min(19, int(value)))
+            elif key == 'cpu_affinity':
+                value = sorted({int(cpu) for cpu in value})
+                if not value:
+                    raise ValueError(value)
+            elif key == 'cgroup':
+                if not value:
+                    continue
+                if not isinstance(value, str):
+                    value = True
+            else:
+                raise KeyError(key)
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"Неверное ограничение {key}: {value!r}")
+            continue
+        limits[key] = value
+    return limits
+
+
+def cgroup_base(setting):
+    """Каталог, в котором создаются группы ботов, или None без cgroup v2"""
+    if not os.path.exists(os.path.join(CGROUP_ROOT, 'cgroup.controllers')):
+        return None
+    if isinstance(setting, str):
+        return setting
+    try:
+        with open('/proc/self/cgroup', 'r') as f:
+            for line in f:
+                if line.startswith('0::'):
+                    return os.path.join(CGROUP_ROOT, line[3:].strip().lstrip('/'), 'bots')
+    except OSError:
+        pass
+    return None
+
+
+def prepare_cgroup(name, limits):
+    """Создать группу cgroup v2 для бота и выставить пределы памяти.
+
+    Возвращает путь к группе или None, если cgroup недоступна (нет cgroup v2,
+    нет прав или группа не делегирована) - бот тогда запускается без нее.
+    """
+    base = cgroup_base(limits.get('cgroup'))
+    if not base:
+        logger.warning(f"cgroup v2 недоступна, {name} запускается без группы")
+        return None
+    path = os.path.join(base, name)
+    try:
+        os.makedirs(path, exist_ok=True)
+        if 'memory_mb' in limits:
+            try:
+                with open(os.path.join(base, 'cgroup.subtree_control'), 'w') as f:
+                    f.write('+memory')
+            except OSError as e:
+                logger.warning(f"Контроллер памяти в {base} не включен: {e}")
+            memory = limits['memory_mb'] * MB
+            for control, value in (('memory.high', memory), ('memory.max', int(memory * HARD_MEMORY_FACTOR))):
+                control_path = os.path.join(path, control)
+                if os.path.exists(control_path):
+                    with open(control_path, 'w') as f:
+                        f.write(str(value))
+    except OSError as e:
+        logger.error(f"Ошибка создания cgroup для {name}: {e}")
+        return None
+    return path
+
+
+def wrap_command(args, limits, cgroup_path=None):
+    """Команда запуска через обертку ``limits_exec.py``, которая применяет ограничения и делает exec.
+
+    ``preexec_fn`` для этого не годится: боты и менеджер многопоточны (сбор
+    метрик, запись логов), а код после fork в таком процессе может зависнуть
+    на блокировке, захваченной другим потоком.
+    """
+    if os.name == 'nt' or not (limits or cgroup_path):
+        return list(args)
+    return [sys.executable, EXEC_WRAPPER, json.dumps(limits), cgroup_path or '', *args]
+
+
+def apply_after_spawn(pid, limits):
+    """Ограничения для Windows, где нет exec: приоритет и ядра через psutil"""
+    try:
+        proc = psutil.Process(pid)
+        if limits.get('nice', 0) > 0:
+            proc.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+        if 'cpu_affinity' in limits:
+            proc.cpu_affinity(limits['cpu_affinity'])
+    except (psutil.Error, ValueError) as e:
+        logger.error(f"Ошибка применения ограничений к процессу {pid}: {e}")
+
+
+def find_breach(sample, limits):
+    """Причина превышения ограничений по снимку ResourceTracker или None"""
+    if 'memory_mb' in limits and sample['rss'] > limits['memory_mb'] * MB:
+        return f"память {sample['rss'] / MB:.0f} МБ > {limits['memory_mb']} МБ"
+    if 'max_fds' in limits and sample['fds'] is not None and sample['fds'] >= limits['max_fds'] * FD_BREACH_RATIO:
+        return f"дескрипторов {sample['fds']} из {limits['max_fds']}"
+    return None
+
+
+class LimitEnforcer:
+    """Решает, какого бота пора мягко перезапустить.
+
+    Превышение должно держаться ``grace`` снимков подряд: короткий всплеск
+    памяти не повод перезапускать бота. После срабатывания счетчик
+    сбрасывается, так что новый процесс получает те же ``grace`` снимков.
+    """
+
+    def __init__(self, grace=2):
+        self.grace = grace
+        self.streaks = {}
+
+    def check(self, samples, limits):
+        """``samples`` - {имя: снимок}, ``limits`` - {имя: ограничения}.
+
+        Возвращает [(имя, причина)] ботов для перезапуска.
+        """
+        breaches = []
+        for name, sample in samples.items():
+            reason = find_breach(sample, limits.get(name, {}))
+            if not reason:
+                self.streaks.pop(name, None)
+                continue
+            self.streaks[name] = self.streaks.get(name, 0) + 1
+            if self.streaks[name] >= self.grace:
+                del self.streaks[name]
+                breaches.append((name, reason))
+        return breaches
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Обертка запуска бота с ограничениями (POSIX).
+
+    python limits_exec.py '<limits json>' '<cgroup или пусто>' команда [аргументы...]
+
+Применяет ограничения к себе и заменяет себя командой через exec: PID
+остается тем же, ограничения действуют с первой инструкции бота и
+наследуются всем, что он запустит. Обертка - отдельный однопоточный
+процесс, поэтому в отличие от ``preexec_fn`` ей можно открывать файлы.
+Только стандартная библиотека: модуль запускается как скрипт.
+"""
+
+import json
+import os
+import resource
+import sys
+
+
+def warn(what, error):
+    # stderr уже направлен в буфер вывода бота
+    print(f"⚠️ Ограничение {what} не применено: {error}", file=sys.stderr, flush=True)
+
+
+def apply_limits(limits, cgroup_path=None):
+    """Применить ограничения к текущему процессу"""
+    if cgroup_path:
+        try:
+            with open(os.path.join(cgroup_path, 'cgroup.procs'), 'w') as f:
+                f.write('0')
+        except OSError as e:
+            warn('cgroup', e)
+    if 'nice' in limits:
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, limits['nice'])
+        except OSError as e:
+            warn('nice', e)
+    if 'cpu_affinity' in limits and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, limits['cpu_affinity'])
+        except OSError as e:
+            warn('cpu_affinity', e)
+    if 'max_fds' in limits:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (limits['max_fds'], limits['max_fds']))
+        except (OSError, ValueError) as e:
+            warn('max_fds', e)
+
+
+def main(argv):
+    if len(argv) < 3:
+        print("Использование: limits_exec.py <limits json> <cgroup> команда [аргументы...]", file=sys.stderr)
+        return 2
+    apply_limits(json.loads(argv[0]), argv[1] or None)
+    try:
+        os.execvp(argv[2], argv[2:])
+    except OSError as e:
+        print(f"❌ Не удалось запустить {argv[2]}: {e}", file=sys.stderr, flush=True)
+        return 127
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
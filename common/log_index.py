@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+import os
+import re
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'\w+')
+# Сколько байт читать за одно обновление и с какого хвоста начинать большой лог
+READ_CHUNK = 1024 * 1024
+INITIAL_TAIL = 1024 * 1024
+
+
+def tokenize(text):
+    """Слова строки в нижнем регистре (кириллица тоже)"""
+    return set(TOKEN_RE.findall(text.lower()))
+
+
+class LogIndex:
+    """Инвертированный индекс последних строк одного лог-файла.
+
+    ``update`` дочитывает файл с сохраненного смещения в байтах, ничего не
+    перечитывая. Ротацию (новый inode или файл короче смещения) индекс
+    замечает сам: дочитывает остаток старого файла из сегмента ``.1`` и
+    начинает новый с начала. Хранятся последние ``max_lines`` строк; у
+    каждого слова - список номеров строк по возрастанию, поэтому строка,
+    уходящая из окна, снимается с начала списков своих слов.
+    """
+
+    def __init__(self, path, max_lines=20000):
+        self.path = path
+        self.max_lines = max_lines
+        self.lines = deque()
+        self.postings = {}
+        self.next_seq = 0
+        self.offset = None
+        self.inode = None
+        self.pending = b''
+        self.lock = threading.Lock()
+        self.update_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.lines)
+
+    def update(self):
+        """Проиндексировать новые строки. Возвращает число добавленных строк"""
+        with self.update_lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return 0
+            added = 0
+            skip_partial = False
+            if self.offset is None:
+                # Первый проход: только хвост большого лога, с начала строки
+                self.offset = max(0, stat.st_size - INITIAL_TAIL)
+                self.inode = stat.st_ino
+                skip_partial = self.offset > 0
+            elif stat.st_ino != self.inode or stat.st_size < self.offset:
+                added += self._finish_rotated()
+                self.offset, self.inode, self.pending = 0, stat.st_ino, b''
+            if stat.st_size > self.offset:
+                data = self._read(self.path, self.offset)
+                if skip_partial:
+                    data = data[data.find(b'\n') + 1:]
+                added += self._consume(data)
+            return added
+
+    def _read(self, path, offset):
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(READ_CHUNK)
+        self.offset = offset + len(data)
+        return data
+
+    def _finish_rotated(self):
+        """Дочитать старый файл, ставший сегментом .1 (если он не сжат)"""
+        rotated = self.path + '.1'
+        try:
+            if os.stat(rotated).st_ino != self.inode:
+                return 0
+            added = self._consume(self._read(rotated, self.offset))
+        except OSError:
+            return 0
+        if self.pending:
+            added += self._consume(b'\n')
+        return added
+
+    def _consume(self, data):
+        data = self.pending + data
+        *complete, self.pending = data.split(b'\n')
+        with self.lock:
+            for raw in complete:
+                line = raw.decode('utf-8', 'replace').rstrip('\r')
+                if line:
+                    self._add(line)
+        return len(complete)
+
+    def _add(self, line):
+        seq = self.next_seq
+        self.next_seq += 1
+        self.lines.append((seq, line))
+        for token in tokenize(line):
+            self.postings.setdefault(token, deque()).append(seq)
+        if len(self.lines) > self.max_lines:
+            old_seq, old_line = self.lines.popleft()
+            for token in tokenize(old_line):
+                postings = self.postings[token]
+                postings.popleft()
+                if not postings:
+                    del self.postings[token]
+
+    def search(self, query, page=0, page_size=10):
+        """Строки, содержащие все слова запроса, от новых к старым.
+
+        Возвращает (строки страницы, всего найдено).
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return [], 0
+        with self.lock:
+            lists = [self.postings.get(token) for token in tokens]
+            if not all(lists):
+                return [], 0
+            lists.sort(key=len)
+            matches = set(lists[0])
+            for postings in lists[1:]:
+                matches.intersection_update(postings)
+            ordered = sorted(matches, reverse=True)
+            first_seq = self.lines[0][0]
+            selected = ordered[page * page_size:(page + 1) * page_size]
+            return [self.lines[seq - first_seq][1] for seq in selected], len(ordered)
+
+    def tail(self, count=20):
+        """Последние строки лога"""
+        with self.lock:
+            return [line for _, line in list(self.lines)[-count:]]
+
+
+class LogIndexer:
+    """Индексы логов нескольких ботов с фоновым обновлением"""
+
+    def __init__(self, max_lines=20000):
+        self.max_lines = max_lines
+        self.indexes = {}
+
+    def set_sources(self, sources):
+        """``sources`` - {имя бота: путь к логу}; индексы новых путей создаются заново"""
+        for name, path in sources.items():
+            index = self.indexes.get(name)
+            if index is None or index.path != path:
+                self.indexes[name] = LogIndex(path, self.max_lines)
+        for name in set(self.indexes) - set(sources):
+            del self.indexes[name]
+
+    def update_all(self):
+        """Дочитать все логи. Возвращает {имя: добавлено строк}"""
+        result = {}
+        for name, index in list(self.indexes.items()):
+            try:
+                result[name] = index.update()
+            except OSError as e:
+                logger.error(f"Ошибка индексации лога {index.path}: {e}")
+        return result
+
+    async def run(self, interval=5):
+        """Фоновое обновление индексов (чтение файлов - в потоке)"""
+        while True:
+            try:
+                await asyncio.to_thread(self.update_all)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка индексации логов: {e}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import atexit
+import gzip
+import logging
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_active = None
+
+
+class SegmentedLog:
+    """Лог-файл с ротацией по размеру и по времени.
+
+    Текущий сегмент - ``path``, старые - ``path.1`` (самый новый) ...
+    ``path.N``; при ``compress`` они сжимаются в ``.gz``. Хранится не больше
+    ``backup_count`` старых сегментов, так что на диске лог занимает не больше
+    ``max_bytes * (backup_count + 1)``. Сегмент закрывается, когда он
+    превысит ``max_bytes`` или станет старше ``rotate_interval`` секунд.
+    """
+
+    def __init__(self, path, max_bytes=1024 * 1024, backup_count=5, rotate_interval=86400, compress=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_interval = rotate_interval
+        self.compress = compress
+        self.stream = None
+        self.size = 0
+        self.started = None
+
+    def open(self):
+        self.stream = open(self.path, 'a', encoding='utf-8')
+        self.size = self.stream.tell()
+        # Возраст уже существующего сегмента считаем по последней записи в него
+        self.started = os.path.getmtime(self.path) if self.size else time.time()
+
+    def close(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+    def seconds_until_rotation(self, now=None):
+        """Сколько секунд до ротации по времени (None - не по времени)"""
+        if not self.rotate_interval or self.started is None or not self.size:
+            return None
+        now = time.time() if now is None else now
+        return max(0, self.started + self.rotate_interval - now)
+
+    def write(self, text):
+        """Дописать текст одной записью, при необходимости открыв новый сегмент"""
+        if self.stream is None:
+            self.open()
+        data_size = len(text.encode('utf-8'))
+        if self.size and (self.size + data_size > self.max_bytes or self.seconds_until_rotation() == 0):
+            self.rotate()
+            self.open()
+        self.stream.write(text)
+        self.stream.flush()
+        self.size += data_size
+
+    def rotate_if_due(self):
+        """Ротация по времени без новых записей"""
+        if self.seconds_until_rotation() == 0:
+            self.rotate()
+
+    def segment(self, index):
+        """Путь к существующему старому сегменту с номером index или None"""
+        for name in (f"{self.path}.{index}", f"{self.path}.{index}.gz"):
+            if os.path.exists(name):
+                return name
+        return None
+
+    def rotate(self):
+        """Закрыть текущий сегмент и сдвинуть старые, удалив самый старый"""
+        self.close()
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            self.size = 0
+            return
+        oldest = self.segment(self.backup_count)
+        if oldest:
+            os.remove(oldest)
+        for index in range(self.backup_count - 1, 0, -1):
+            name = self.segment(index)
+            if name:
+                os.replace(name, name.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}", 1))
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+            if self.compress:
+                with open(f"{self.path}.1", 'rb') as src, gzip.open(f"{self.path}.1.gz", 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.size = 0
+        self.started = None
+
+
+class LogPipeline:
+    """Асинхронная запись логов: QueueHandler в потоках приложения, запись в фоне.
+
+    Вызов логгера только кладет запись в очередь, поэтому цикл событий не
+    ждет диска. Фоновый поток забирает все накопившиеся записи (до
+    ``max_batch``) и пишет их в файл и консоль одной операцией.
+    """
+
+    def __init__(self, path, console=True, max_batch=500, **options):
+        self.file = SegmentedLog(path, **options)
+        self.console = sys.stderr if console else None
+        self.max_batch = max_batch
+        self.formatter = logging.Formatter(LOG_FORMAT)
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.records = 0
+        self.batches = 0
+
+    def handler(self):
+        """Обработчик для логгера: кладет записи в очередь пайплайна"""
+        return QueueHandler(self.queue)
+
+    def configure(self, options):
+        """Поменять параметры ротации на ходу (блок ``logging`` конфига)"""
+        for key in ('max_bytes', 'backup_count', 'rotate_interval', 'compress'):
+            if key in (options or {}):
+                setattr(self.file, key, options[key])
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout=5):
+        """Дописать очередь и закрыть файл"""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout)
+            self.thread = None
+        self.file.close()
+
+    def _run(self):
+        while True:
+            wait = self.file.seconds_until_rotation()
+            try:
+                record = self.queue.get(timeout=60 if wait is None else min(max(wait, 1), 60))
+            except queue.Empty:
+                self._guard(self.file.rotate_if_due)
+                continue
+            batch = [record]
+            while record is not None and len(batch) < self.max_batch:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(record)
+            records = [record for record in batch if record is not None]
+            if records:
+                self._write(records)
+            if len(records) < len(batch):
+                return
+
+    def _write(self, records):
+        text = ''.join(self.formatter.format(record) + '\n' for record in records)
+        self._guard(lambda: self.file.write(text))
+        if self.console:
+            self._guard(lambda: (self.console.write(text), self.console.flush()))
+        self.records += len(records)
+        self.batches += 1
+
+    def _guard(self, action):
+        # Логировать ошибку записи лога некуда - пишем в stderr напрямую
+        try:
+            action()
+        except Exception as e:
+            try:
+                sys.stderr.write(f"Ошибка записи лога {self.file.path}: {e}\n")
+            except Exception:
+                pass
+
+
+def setup_logging(path, level=logging.INFO, **options):
+    """Настроить корневой логгер на запись через LogPipeline.
+
+    Как ``basicConfig``, ничего не делает, если логирование уже настроено
+    (например, хост-режимом до импорта ботов). Возвращает пайплайн или None.
+    """
+    global _active
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+    pipeline = LogPipeline(path, **options)
+    pipeline.start()
+    root.addHandler(pipeline.handler())
+    root.setLevel(level)
+    atexit.register(pipeline.stop)
+    _active = pipeline
+    return pipeline
+
+
+def configure_logging(options):
+    """Применить блок ``logging`` конфига к пайплайну процесса"""
+    if _active and options:
+        _active.configure(options)
+
+
+def reload_logging(config, changed):
+    """Подписчик ConfigStore: применить изменившийся блок ``logging``"""
+    if any(key == 'logging' or key.startswith('logging.') for key in changed):
+        configure_logging(config.get('logging'))
+
+
+def rotate_log(path, backup_count=5, compress=False):
+    """Закрыть лог остановленного бота в старый сегмент вместо очистки.
+
+    Возвращает True, если был непустой лог.
+    """
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return False
+    SegmentedLog(path, backup_count=backup_count, compress=compress).rotate()
+    return True
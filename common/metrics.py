@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+import time
+from collections import deque
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+THERMAL_ZONE = '/sys/class/thermal/thermal_zone0/temp'
+
+
+def read_temperature():
+    """Прочитать температуру (если доступно)"""
+    try:
+        with open(THERMAL_ZONE, 'r') as f:
+            return float(f.read()) / 1000
+    except (OSError, ValueError):
+        return None
+
+
+class MetricsSampler:
+    """Фоновый сборщик системных метрик.
+
+    Раз в ``interval`` секунд снимает CPU, память, диск, сеть и температуру
+    в отдельном потоке и кладет снимок в кольцевой буфер. Обработчики
+    читают готовый снимок через ``latest()`` и не блокируют event loop.
+    """
+
+    def __init__(self, interval=2, history_size=300, disk_path='/'):
+        self.interval = interval
+        self.disk_path = disk_path
+        self.history = deque(maxlen=history_size)
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._last_net = None
+
+    def start(self):
+        """Запустить фоновый поток сбора метрик"""
+        if self._thread and self._thread.is_alive():
+            return
+        # Первый вызов cpu_percent(None) только инициализирует счетчики
+        psutil.cpu_percent(interval=None)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='metrics-sampler', daemon=True)
+        self._thread.start()
+        logger.info(f"Сборщик метрик запущен (интервал {self.interval} сек)")
+
+    def stop(self):
+        """Остановить фоновый поток"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def add_listener(self, callback):
+        """Подписаться на новые снимки (вызывается в потоке сборщика)"""
+        self._listeners.append(callback)
+
+    def latest(self):
+        """Последний снимок метрик или None, если сбора еще не было"""
+        with self._lock:
+            return self.history[-1] if self.history else None
+
+    def snapshot(self):
+        """Последний снимок, при его отсутствии - снять сразу без ожидания"""
+        return self.latest() or self.sample_now()
+
+    def get_history(self):
+        """Копия кольцевого буфера снимков"""
+        with self._lock:
+            return list(self.history)
+
+    def sample_now(self):
+        """Снять метрики немедленно и сохранить в буфер"""
+        snapshot = self._collect()
+        if snapshot:
+            with self._lock:
+                self.history.append(snapshot)
+            for callback in self._listeners:
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    logger.error(f"Ошибка обработчика метрик: {e}")
+        return snapshot
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            self.sample_now()
+            elapsed = time.monotonic() - started
+            self._stop_event.wait(max(0.0, self.interval - elapsed))
+
+    def _collect(self):
+        try:
+            now = time.time()
+            memory = psutil.virtual_memory()
+            disk = psutil.disk_usage(self.disk_path)
+            network = psutil.net_io_counters()
+
+            # Скорость сети считаем по разнице с предыдущим снимком
+            sent_rate = recv_rate = 0.0
+            if self._last_net:
+                last_time, last_sent, last_recv = self._last_net
+                dt = now - last_time
+                if dt > 0:
+                    sent_rate = max(0, network.bytes_sent - last_sent) / dt
+                    recv_rate = max(0, network.bytes_recv - last_recv) / dt
+            self._last_net = (now, network.bytes_sent, network.bytes_recv)
+
+            return {
+                'timestamp': now,
+                'cpu_percent': psutil.cpu_percent(interval=None),
+                'cpu_count': psutil.cpu_count(),
+                'memory_percent': memory.percent,
+                'memory_used_gb': memory.used / (1024**3),
+                'memory_total_gb': memory.total / (1024**3),
+                'disk_percent': disk.percent,
+                'disk_used_gb': disk.used / (1024**3),
+                'disk_total_gb': disk.total / (1024**3),
+                'temperature': read_temperature(),
+                'network_bytes_sent': network.bytes_sent,
+                'network_bytes_recv': network.bytes_recv,
+                'network_sent_rate': sent_rate,
+                'network_recv_rate': recv_rate
+            }
+        except Exception as e:
+            logger.error(f"Ошибка сбора метрик: {e}")
+            return {}
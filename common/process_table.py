@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import time
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+def script_path(cmdline, cwd_getter):
+    """Абсолютный путь к .py скрипту из cmdline или None"""
+    for arg in cmdline[1:]:
+        if arg.endswith('.py'):
+            if not os.path.isabs(arg):
+                arg = os.path.join(cwd_getter(), arg)
+            return os.path.normcase(os.path.normpath(arg))
+    return None
+
+
+class ProcessTable:
+    """Индекс процессов Python-скриптов: путь к скрипту -> (pid, create_time).
+
+    Полный проход по /proc делается не чаще раза в ``scan_interval`` секунд
+    и только при промахе. Найденные PID проверяются по ``create_time``,
+    поэтому в стабильном состоянии поиск бота стоит одного обращения к /proc.
+    """
+
+    def __init__(self, scan_interval=10):
+        self.scan_interval = scan_interval
+        self.full_scans = 0
+        self._index = {}
+        self._last_scan = None
+
+    def scan(self):
+        """Полный проход по таблице процессов с построением индекса"""
+        index = {}
+        for proc in psutil.process_iter(['pid', 'cmdline', 'create_time']):
+            try:
+                cmdline = proc.info['cmdline']
+                if not cmdline:
+                    continue
+                path = script_path(cmdline, proc.cwd)
+                if path:
+                    index[path] = (proc.info['pid'], proc.info['create_time'])
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        self._index = index
+        self._last_scan = time.monotonic()
+        self.full_scans += 1
+        return index
+
+    def is_stale(self):
+        """Пора ли делать новый полный проход"""
+        return self._last_scan is None or time.monotonic() - self._last_scan >= self.scan_interval
+
+    def find(self, path):
+        """PID процесса, выполняющего скрипт path, или None"""
+        path = os.path.normcase(os.path.normpath(os.path.abspath(path)))
+        pid = self._validate(path)
+        if pid is None and self.is_stale():
+            self.scan()
+            pid = self._validate(path)
+        return pid
+
+    def _validate(self, path):
+        entry = self._index.get(path)
+        if not entry:
+            return None
+        pid, create_time = entry
+        try:
+            proc = psutil.Process(pid)
+            # PID мог быть переиспользован другим процессом
+            if proc.create_time() == create_time and proc.status() != psutil.STATUS_ZOMBIE:
+                return pid
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+        del self._index[path]
+        return None
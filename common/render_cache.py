@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from telegram.error import BadRequest
+
+logger = logging.getLogger(__name__)
+
+
+def message_key(target):
+    """Ключ сообщения для CallbackQuery или Message"""
+    message = getattr(target, 'message', None) if hasattr(target, 'edit_message_text') else target
+    if message is None:
+        return target.inline_message_id
+    return (message.chat_id, message.message_id)
+
+
+def render_digest(screen, data, reply_markup=None):
+    """Хеш экрана: имя, данные и клавиатура"""
+    markup = json.dumps(reply_markup.to_dict(), sort_keys=True) if reply_markup is not None else ''
+    return hashlib.blake2b(f"{screen}\0{data}\0{markup}".encode('utf-8'), digest_size=16).hexdigest()
+
+
+class RenderCache:
+    """Последняя отрисовка каждого сообщения с кнопками.
+
+    ``edit`` заменяет ``query.edit_message_text``: если экран и его данные не
+    изменились, запрос в Telegram не отправляется. Повторная отрисовка того
+    же экрана раньше ``min_interval`` откладывается, и за интервал уходит не
+    больше одной правки - с последним содержимым. Переход на другой экран
+    отправляется сразу. Ошибки отложенных правок передаются функциям
+    ``error_listeners(кэш, target, error)``.
+    """
+
+    def __init__(self, min_interval=1.0, max_entries=1000):
+        self.min_interval = min_interval
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.sent = 0
+        self.skipped = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.error_listeners = []
+
+    def stats(self):
+        """Счетчики правок"""
+        return {'sent': self.sent, 'skipped': self.skipped, 'coalesced': self.coalesced, 'failed': self.failed}
+
+    def forget(self, target):
+        """Сбросить кэш сообщения, измененного в обход ``edit``"""
+        entry = self.entries.pop(message_key(target), None)
+        if entry and entry['timer']:
+            entry['timer'].cancel()
+
+    async def edit(self, target, text, screen=None, data=None, **kwargs):
+        """Отредактировать сообщение, если отрисовка изменилась.
+
+        ``screen`` - имя экрана (по умолчанию callback_data кнопки), ``data`` -
+        то, от чего зависит текст, без меток времени (по умолчанию сам текст).
+        Возвращает 'sent', 'skipped' или 'deferred'.
+        """
+        key = message_key(target)
+        if screen is None:
+            screen = getattr(target, 'data', None)
+        digest = render_digest(screen, text if data is None else data, kwargs.get('reply_markup'))
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = {'screen': None, 'digest': None, 'sent_at': 0, 'pending': None, 'timer': None}
+            self.entries[key] = entry
+            while len(self.entries) > self.max_entries:
+                _, old = self.entries.popitem(last=False)
+                if old['timer']:
+                    old['timer'].cancel()
+        self.entries.move_to_end(key)
+
+        if digest == entry['digest']:
+            # Отложенная правка больше не нужна: на экране уже то же самое
+            entry['pending'] = None
+            self.skipped += 1
+            return 'skipped'
+        if entry['pending'] and entry['pending'][2] == digest:
+            self.skipped += 1
+            return 'skipped'
+
+        wait = entry['sent_at'] + self.min_interval - time.monotonic()
+        if screen == entry['screen'] and wait > 0:
+            entry['pending'] = (target, text, digest, screen, kwargs)
+            if entry['timer'] is None:
+                entry['timer'] = asyncio.create_task(self._flush_later(key, entry, wait))
+            self.coalesced += 1
+            return 'deferred'
+
+        entry['pending'] = None
+        return await self._send(entry, target, text, digest, screen, kwargs)
+
+    async def _send(self, entry, target, text, digest, screen, kwargs):
+        edit = target.edit_message_text if hasattr(target, 'edit_message_text') else target.edit_text
+        try:
+            await edit(text, **kwargs)
+            result = 'sent'
+            self.sent += 1
+        except BadRequest as e:
+            if 'not modified' not in str(e).lower():
+                self.failed += 1
+                raise
+            result = 'skipped'
+            self.skipped += 1
+        entry.update(screen=screen, digest=digest, sent_at=time.monotonic())
+        return result
+
+    async def _flush_later(self, key, entry, wait):
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            entry['timer'] = None
+        pending, entry['pending'] = entry['pending'], None
+        if pending is None or self.entries.get(key) is not entry:
+            return
+        target, text, digest, screen, kwargs = pending
+        try:
+            await self._send(entry, target, text, digest, screen, kwargs)
+        except Exception as e:
+            logger.error(f"Ошибка отложенного обновления сообщения: {e}")
+            for listener in self.error_listeners:
+                try:
+                    listener(self, target, e)
+                except Exception as listener_error:
+                    logger.error(f"Ошибка обработчика неудачной правки: {listener_error}")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def read_process(proc):
+    """Один снимок ресурсов процесса: все поля читаются за один проход по /proc"""
+    with proc.oneshot():
+        cpu = proc.cpu_times()
+        try:
+            memory = proc.memory_full_info()
+            uss = memory.uss
+        except psutil.AccessDenied:
+            memory = proc.memory_info()
+            uss = None
+        try:
+            fds = proc.num_fds()
+        except (AttributeError, psutil.AccessDenied):
+            fds = proc.num_handles() if hasattr(proc, 'num_handles') else None
+        return {
+            'cpu_time': cpu.user + cpu.system,
+            'rss': memory.rss,
+            'uss': uss,
+            'fds': fds,
+            'threads': proc.num_threads()
+        }
+
+
+def growth_per_hour(samples, key, window):
+    """Скорость роста величины в час (наклон МНК) за последние ``window`` секунд"""
+    # Копия одним вызовом в C: sample() дописывает историю из потока сбора,
+    # а обход живой deque при этом падает с RuntimeError
+    samples = list(samples)
+    if not samples:
+        return None
+    since = samples[-1]['time'] - window
+    points = [(s['time'], s[key]) for s in samples if s['time'] >= since and s[key] is not None]
+    if len(points) < 5 or points[-1][0] - points[0][0] < window / 4:
+        return None
+    mean_t = sum(t for t, _ in points) / len(points)
+    mean_v = sum(v for _, v in points) / len(points)
+    denominator = sum((t - mean_t) ** 2 for t, _ in points)
+    if not denominator:
+        return None
+    slope = sum((t - mean_t) * (v - mean_v) for t, v in points) / denominator
+    return slope * 3600
+
+
+class ResourceTracker:
+    """Учет ресурсов процессов ботов: CPU, RSS/USS, открытые файлы, потоки.
+
+    ``sample`` снимает по одному снимку на процесс и хранит короткую
+    историю для каждого бота. По истории считается скорость роста памяти и
+    числа дескрипторов: бот, который стабильно растет, виден задолго до
+    того, как его убьет OOM killer. При смене PID (перезапуск) история
+    начинается заново.
+    """
+
+    def __init__(self, history_size=120, growth_window=1800, rss_growth_mb=30, fd_growth=100):
+        self.history_size = history_size
+        self.growth_window = growth_window
+        self.rss_growth_mb = rss_growth_mb
+        self.fd_growth = fd_growth
+        self.histories = {}
+        self._processes = {}
+
+    def sample(self, pids, now=None):
+        """Снять ресурсы процессов {имя: pid}. Возвращает {имя: снимок}"""
+        now = time.time() if now is None else now
+        result = {}
+        for name, pid in pids.items():
+            if pid is None:
+                self._forget(name)
+                continue
+            try:
+                proc = self._process(name, pid)
+                data = read_process(proc)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                self._forget(name)
+                continue
+            except psutil.AccessDenied as e:
+                logger.error(f"Нет доступа к процессу {name} ({pid}): {e}")
+                continue
+            history = self.histories[name]
+            data['time'] = now
+            data['pid'] = pid
+            data['cpu_percent'] = None
+            if history:
+                elapsed = now - history[-1]['time']
+                if elapsed > 0:
+                    data['cpu_percent'] = (data['cpu_time'] - history[-1]['cpu_time']) / elapsed * 100
+            history.append(data)
+            result[name] = data
+        for name in set(self.histories) - set(pids):
+            self._forget(name)
+        return result
+
+    def _process(self, name, pid):
+        proc = self._processes.get(name)
+        if proc is None or proc.pid != pid or not proc.is_running():
+            proc = psutil.Process(pid)
+            self._processes[name] = proc
+            self.histories[name] = deque(maxlen=self.history_size)
+        return proc
+
+    def _forget(self, name):
+        self._processes.pop(name, None)
+        self.histories.pop(name, None)
+
+    def latest(self, name):
+        history = self.histories.get(name)
+        return history[-1] if history else None
+
+    def warnings(self, name):
+        """Предупреждения о росте памяти и дескрипторов"""
+        history = list(self.histories.get(name) or ())
+        if not history:
+            return []
+        result = []
+        rss = growth_per_hour(history, 'rss', self.growth_window)
+        if rss is not None and rss / MB >= self.rss_growth_mb:
+            result.append(f"⚠️ Память растет: +{rss / MB:.0f} МБ/ч")
+        fds = growth_per_hour(history, 'fds', self.growth_window)
+        if fds is not None and fds >= self.fd_growth:
+            result.append(f"⚠️ Дескрипторы растут: +{fds:.0f}/ч")
+        return result
+
+    def format_line(self, name):
+        """Строка ресурсов бота для экрана статуса или пустая строка"""
+        data = self.latest(name)
+        if not data:
+            return ""
+        parts = []
+        if data['cpu_percent'] is not None:
+            parts.append(f"CPU {data['cpu_percent']:.1f}%")
+        memory = f"RSS {data['rss'] / MB:.0f} МБ"
+        if data['uss'] is not None:
+            memory += f" (USS {data['uss'] / MB:.0f})"
+        parts.append(memory)
+        if data['fds'] is not None:
+            parts.append(f"FD {data['fds']}")
+        parts.append(f"потоков {data['threads']}")
+        line = "   📈 " + " · ".join(parts)
+        for warning in self.warnings(name):
+            line += f"\n   {warning}"
+        return line
+
+    async def run(self, get_pids, interval=30, on_sample=None):
+        """Фоновый сбор: ``get_pids()`` возвращает {имя: pid}; поиск PID и psutil - в потоке.
+
+        ``on_sample(снимки)`` вызывается в цикле событий после каждого сбора.
+        """
+        while True:
+            try:
+                samples = await asyncio.to_thread(lambda: self.sample(get_pids()))
+                if on_sample:
+                    on_sample(samples)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка учета ресурсов ботов: {e}")
+            await asyncio.sleep(interval)
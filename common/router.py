@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+# Разделитель полей в callback_data: 'bot:stop:telescan'
+SEPARATOR = ':'
+# Предел Telegram для callback_data в байтах
+MAX_CALLBACK_DATA = 64
+# Верхние границы корзин гистограммы задержек, мс; последняя корзина - все, что дольше
+LATENCY_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+DENIED_TEXT = "⛔ У вас нет доступа к этому боту!"
+STALE_TEXT = "⌛ Кнопка устарела, откройте меню заново"
+
+
+def pack(route, *args):
+    """callback_data кнопки: имя маршрута и аргументы через ':'"""
+    data = SEPARATOR.join((route,) + tuple(str(arg) for arg in args))
+    if len(data.encode('utf-8')) > MAX_CALLBACK_DATA:
+        raise ValueError(f"callback_data длиннее {MAX_CALLBACK_DATA} байт: {data}")
+    return data
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с фиксированными корзинами: память не растет с числом вызовов"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, q):
+        """Верхняя граница корзины, в которую попадает q-й процентиль"""
+        if not self.count:
+            return None
+        rank = self.count * q / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def stats(self):
+        return {
+            'count': self.count,
+            'avg': self.total / self.count if self.count else 0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'max': self.max
+        }
+
+
+class Router:
+    """Маршрутизация обновлений бота по заранее собранным таблицам.
+
+    Кнопки несут компактный callback_data из ``pack``: имя маршрута и
+    аргументы через ':'. Обработчик ищется одним обращением к словарю по
+    имени, аргументы приводятся к типам, заданным при регистрации, так что
+    новые экраны не удлиняют цепочку проверок. Админы хранятся во
+    frozenset и обновляются вместе с конфигом. Время каждого обработчика
+    попадает в гистограмму своего маршрута.
+    """
+
+    def __init__(self, admin_ids=()):
+        self.admins = frozenset(admin_ids)
+        self.routes = {}
+        self.latency = {}
+        self.denied = 0
+        self.stale = 0
+
+    def set_admins(self, admin_ids):
+        """Заменить множество админов (при загрузке и перезагрузке конфига)"""
+        self.admins = frozenset(admin_ids)
+
+    def is_admin(self, user_id):
+        return user_id in self.admins
+
+    def add(self, route, handler, *arg_types, pass_context=False, admin=True):
+        """Зарегистрировать кнопку: ``handler(query, [context,] *args)``.
+
+        Последний аргумент забирает остаток строки, поэтому в нем может
+        встречаться ':'.
+        """
+        if SEPARATOR in route:
+            raise ValueError(f"Имя маршрута не может содержать '{SEPARATOR}': {route}")
+        self.routes[route] = (handler, arg_types, pass_context, admin)
+        self.latency[route] = LatencyHistogram()
+
+    def command(self, name, handler, admin=True):
+        """Обработчик команды для CommandHandler с проверкой доступа и замером времени"""
+        route = '/' + name
+        self.latency[route] = LatencyHistogram()
+
+        async def run_command(update, context):
+            if admin and update.effective_user.id not in self.admins:
+                self.denied += 1
+                await update.message.reply_text(DENIED_TEXT)
+                return
+            await self._timed(route, handler(update, context))
+
+        return run_command
+
+    async def dispatch(self, update, context):
+        """Обработчик для CallbackQueryHandler"""
+        query = update.callback_query
+        name, _, rest = (query.data or '').partition(SEPARATOR)
+        entry = self.routes.get(name)
+        if entry is None:
+            # Кнопки из сообщений, отправленных до изменения меню
+            self.stale += 1
+            await query.answer(STALE_TEXT)
+            return
+        handler, arg_types, pass_context, admin = entry
+        if admin and query.from_user.id not in self.admins:
+            self.denied += 1
+            await query.answer(DENIED_TEXT)
+            return
+        try:
+            raw_args = rest.split(SEPARATOR, len(arg_types) - 1) if arg_types else []
+            if len(raw_args) != len(arg_types):
+                raise ValueError(query.data)
+            args = [arg_type(raw) for arg_type, raw in zip(arg_types, raw_args)]
+        except ValueError:
+            self.stale += 1
+            await query.answer(STALE_TEXT)
+            return
+        await query.answer()
+        if pass_context:
+            await self._timed(name, handler(query, context, *args))
+        else:
+            await self._timed(name, handler(query, *args))
+
+    async def _timed(self, route, coroutine):
+        started = time.perf_counter()
+        try:
+            await coroutine
+        finally:
+            self.latency[route].add((time.perf_counter() - started) * 1000)
+
+    def stats(self):
+        """Задержки маршрутов, вызывавшихся хотя бы раз: {маршрут: stats()}"""
+        return {route: histogram.stats() for route, histogram in self.latency.items() if histogram.count}
+
+    def format_stats(self, limit=5):
+        """Блок самых медленных по p95 маршрутов для экрана бота (Markdown), пустой без вызовов"""
+        stats = sorted(self.stats().items(), key=lambda item: -item[1]['p95'])[:limit]
+        if not stats:
+            return ""
+        lines = [
+            f"`{route}`: {entry['count']}×, p50 ≤{entry['p50']:.0f} мс, p95 ≤{entry['p95']:.0f} мс, макс {entry['max']:.0f} мс"
+            for route, entry in stats
+        ]
+        return "\n⏱️ **Задержки обработчиков:**\n" + "\n".join(lines) + "\n"
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import itertools
+import logging
+import time
+
+from telegram.error import RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты: меньше - раньше
+PRIORITY_ALERT = 0
+PRIORITY_NORMAL = 1
+PRIORITY_ROUTINE = 2
+
+# Предел длины сообщения Telegram
+MAX_MESSAGE_LENGTH = 4096
+
+
+class TokenBucket:
+    """Ведро токенов: ``rate`` в секунду, не больше ``capacity`` подряд"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now):
+        """Сколько ждать до следующего токена"""
+        self.refill(now)
+        wait = 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def take(self, now):
+        self.refill(now)
+        self.tokens -= 1
+
+    def block(self, now, seconds):
+        """Не выдавать токены ``seconds`` секунд (ответ 429 с retry_after)"""
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class MessageSender:
+    """Общая очередь исходящих сообщений с учетом лимитов Telegram.
+
+    У каждого бота (токена) свое глобальное ведро (около 30 сообщений в
+    секунду), у каждого чата - свое (около одного в секунду). Сообщения,
+    которые накопились для одного чата, пока его ведро пусто, уходят одним
+    сообщением. Из готовых к отправке чатов первым обслуживается тот, где
+    ждет сообщение с наименьшим приоритетом. Ответ 429 ставит сообщение
+    обратно в очередь и замораживает на ``retry_after`` секунд только ведро
+    этого чата: остальные админы продолжают получать тревоги.
+    """
+
+    def __init__(self, global_rate=25, chat_rate=1, chat_burst=1, max_retries=3):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.queues = {}
+        self.buckets = {}
+        self.sent = 0
+        self.batched = 0
+        self.retried = 0
+        self.failed = 0
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._task = None
+        self._inflight = set()
+
+    def stats(self):
+        """Счетчики отправки"""
+        return {
+            'queued': sum(len(queue) for queue in self.queues.values()),
+            'sent': self.sent,
+            'batched': self.batched,
+            'retried': self.retried,
+            'failed': self.failed
+        }
+
+    def send(self, bot, chat_id, text, priority=PRIORITY_NORMAL, batch=True, **kwargs):
+        """Поставить сообщение в очередь. Возвращает future с отправленным Message.
+
+        Ошибка отправки записывается в лог, поэтому future можно не ждать.
+        ``batch=False`` - не объединять с соседними сообщениями (например,
+        если у сообщения есть кнопки).
+        """
+        return self._enqueue(bot, chat_id, 'send_message', text, priority,
+                             batch and not kwargs.get('reply_markup'), kwargs)
+
+    def edit(self, bot, chat_id, message_id, text, priority=PRIORITY_ROUTINE, **kwargs):
+        """Поставить в очередь правку сообщения (правки не объединяются)"""
+        return self._enqueue(bot, chat_id, 'edit_message_text', text, priority, False,
+                             dict(kwargs, message_id=message_id))
+
+    def _enqueue(self, bot, chat_id, method, text, priority, batch, kwargs):
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        item = {
+            'bot': bot,
+            'method': method,
+            'priority': priority,
+            'seq': next(self._seq),
+            'text': text,
+            'kwargs': kwargs,
+            'batch': batch,
+            'futures': [future],
+            'retries': 0
+        }
+        self.queues.setdefault((bot.token, chat_id), []).append(item)
+        self._wakeup.set()
+        return future
+
+    async def send_many(self, bot, chat_ids, text, priority=PRIORITY_NORMAL, **kwargs):
+        """Отправить одно сообщение в несколько чатов и дождаться результата.
+
+        Возвращает список из Message или исключений по каждому чату.
+        """
+        futures = [self.send(bot, chat_id, text, priority, **kwargs) for chat_id in chat_ids]
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._task and not self._task.done() and self._task.get_loop() is loop:
+            return
+        # Новый цикл событий (или первый запуск): старые future уже никто не ждет
+        self.queues.clear()
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def close(self):
+        """Остановить отправку; неотправленные сообщения отменяются"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in list(self._inflight):
+            task.cancel()
+        await asyncio.gather(*self._inflight, return_exceptions=True)
+        for queue in self.queues.values():
+            for item in queue:
+                for future in item['futures']:
+                    future.cancel()
+        self.queues.clear()
+
+    def bucket(self, key, rate, capacity):
+        if key not in self.buckets:
+            self.buckets[key] = TokenBucket(rate, capacity)
+        return self.buckets[key]
+
+    def next_ready(self, now):
+        """Чат, из которого можно отправить сейчас, или время ожидания"""
+        best = None
+        wait = None
+        for key, queue in self.queues.items():
+            if not queue:
+                continue
+            delay = max(
+                self.bucket(key[0], self.global_rate, self.global_rate).delay(now),
+                self.bucket(key, self.chat_rate, self.chat_burst).delay(now)
+            )
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            head = min(queue, key=lambda item: (item['priority'], item['seq']))
+            if best is None or (head['priority'], head['seq']) < best[0]:
+                best = ((head['priority'], head['seq']), key)
+        return (best[1] if best else None), wait
+
+    def take_batch(self, key):
+        """Забрать из очереди чата сообщение или пачку сообщений для объединения"""
+        queue = self.queues[key]
+        queue.sort(key=lambda item: (item['priority'], item['seq']))
+        first = queue.pop(0)
+        if first['batch']:
+            self._merge(first, queue)
+        if not queue:
+            del self.queues[key]
+        return first
+
+    def _merge(self, first, queue):
+        texts = [first['text']]
+        length = len(first['text'])
+        for item in list(queue):
+            if not item['batch'] or item['kwargs'] != first['kwargs']:
+                continue
+            if length + len(item['text']) + 2 > MAX_MESSAGE_LENGTH:
+                break
+            queue.remove(item)
+            texts.append(item['text'])
+            length += len(item['text']) + 2
+            first['futures'].extend(item['futures'])
+            self.batched += 1
+        first['text'] = "\n\n".join(texts)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            key, wait = self.next_ready(now)
+            if key is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            item = self.take_batch(key)
+            self.bucket(key[0], self.global_rate, self.global_rate).take(now)
+            self.bucket(key, self.chat_rate, self.chat_burst).take(now)
+            # Отправка не задерживает остальные чаты
+            task = asyncio.create_task(self._deliver(key, item))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _deliver(self, key, item):
+        chat_id = key[1]
+        try:
+            method = getattr(item['bot'], item['method'])
+            message = await method(chat_id=chat_id, text=item['text'], **item['kwargs'])
+        except RetryAfter as e:
+            retry_after = float(e.retry_after)
+            self.bucket(key, self.chat_rate, self.chat_burst).block(time.monotonic(), retry_after)
+            item['retries'] += 1
+            if item['retries'] > self.max_retries:
+                self._fail(item, e, chat_id)
+                return
+            self.retried += 1
+            logger.warning(f"Лимит Telegram для чата {chat_id}: повтор через {retry_after:g} сек")
+            self.queues.setdefault(key, []).insert(0, item)
+            self._wakeup.set()
+            return
+        except Exception as e:
+            self._fail(item, e, chat_id)
+            return
+        self.sent += 1
+        for future in item['futures']:
+            if not future.done():
+                future.set_result(message)
+
+    def _fail(self, item, error, chat_id):
+        self.failed += 1
+        logger.error(f"Не удалось отправить сообщение в чат {chat_id}: {error}")
+        for future in item['futures']:
+            if not future.done():
+                future.set_exception(error)
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+from common.child_process import OutputBuffer, spawn_process, terminate_process, wait_until_ready
+from common.limits import LimitEnforcer, parse_limits
+from common.resources import ResourceTracker
+
+logger = logging.getLogger(__name__)
+
+
+def bot_dir_name(path):
+    """Имя папки бота по пути к его main.py (идентификатор бота в супервизоре)"""
+    return os.path.basename(os.path.dirname(os.path.normpath(path)))
+
+
+def read_manager_config(config_path):
+    """Конфиг менеджера или пустой словарь, если его нет"""
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Не удалось прочитать {config_path}: {e}")
+        return {}
+
+
+def load_restart_policy(config_path):
+    """Прочитать auto_restart ботов и auto_restart_delay из конфига менеджера.
+
+    Возвращает ({имя папки бота: auto_restart}, auto_restart_delay).
+    """
+    config = read_manager_config(config_path)
+    policy = {}
+    for bot_config in config.get('bots', {}).values():
+        bot_dir = bot_dir_name(bot_config.get('path', ''))
+        if bot_dir:
+            policy[bot_dir] = bot_config.get('auto_restart', True)
+    delay = config.get('monitoring', {}).get('auto_restart_delay', 10)
+    return policy, delay
+
+
+def load_bot_limits(config_path):
+    """Прочитать ограничения ресурсов ботов из конфига менеджера.
+
+    Возвращает ({имя папки бота: ограничения}, resource_interval).
+    """
+    config = read_manager_config(config_path)
+    limits = {}
+    for bot_config in config.get('bots', {}).values():
+        bot_dir = bot_dir_name(bot_config.get('path', ''))
+        bot_limits = parse_limits(bot_config.get('limits'))
+        if bot_dir and bot_limits:
+            limits[bot_dir] = bot_limits
+    return limits, config.get('monitoring', {}).get('resource_interval', 30)
+
+
+class BotSupervisor:
+    """Владелец дочерних процессов ботов.
+
+    Завершение каждого процесса ожидается через ``process.wait()`` - asyncio
+    узнает о нем от child watcher (pidfd/SIGCHLD), без периодического опроса.
+    Упавшие боты с ``auto_restart`` перезапускаются с экспоненциальной
+    задержкой: ``restart_delay * 2**n``, но не больше ``max_delay``. Если бот
+    проработал дольше ``stable_after`` секунд, счетчик сбоев сбрасывается.
+
+    Ограничения ресурсов бота (``limits``) применяются при каждом запуске
+    процесса; ``enforce_limits`` следит за ними и мягко перезапускает бота,
+    который их превысил.
+
+    Слушатели ``(bot_id, event, info)`` из ``add_listener`` (и ``on_event``)
+    вызываются при событиях: started, start_failed, exited, restarting,
+    limit_exceeded, stopped.
+    """
+
+    def __init__(self, restart_delay=10, max_delay=300, stable_after=60, on_event=None, resource_interval=30):
+        self.restart_delay = restart_delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.listeners = [on_event] if on_event else []
+        self.bots = {}
+        self.resource_interval = resource_interval
+        self.resources = ResourceTracker()
+        self.enforcer = LimitEnforcer()
+
+    def add_bot(self, bot_id, name, bot_dir, auto_restart=True, script='main.py', limits=None):
+        """Зарегистрировать бота"""
+        self.bots[bot_id] = {
+            'name': name,
+            'dir': bot_dir,
+            'script': script,
+            'auto_restart': auto_restart,
+            'limits': limits or {},
+            'process': None,
+            'output': OutputBuffer(max_lines=200),
+            'watch_task': None,
+            'started_at': None,
+            'started_wall': None,
+            'failures': 0,
+            'stopping': False
+        }
+
+    def is_running(self, bot_id):
+        """Работает ли процесс бота"""
+        process = self.bots[bot_id]['process']
+        return process is not None and process.returncode is None
+
+    def running_count(self):
+        """Количество работающих ботов"""
+        return sum(1 for bot_id in self.bots if self.is_running(bot_id))
+
+    def add_listener(self, listener):
+        """Подписаться на события супервизора"""
+        self.listeners.append(listener)
+
+    def status(self, bot_id):
+        """Состояние бота без обращения к таблице процессов"""
+        state = self.bots[bot_id]
+        process = state['process']
+        running = self.is_running(bot_id)
+        return {
+            'name': state['name'],
+            'running': running,
+            'pid': process.pid if running else None,
+            'returncode': process.returncode if process else None,
+            'started_at': state['started_wall'] if running else None,
+            'failures': state['failures'],
+            'auto_restart': state['auto_restart']
+        }
+
+    def status_all(self):
+        """Состояние всех ботов"""
+        return {bot_id: self.status(bot_id) for bot_id in self.bots}
+
+    async def start_and_wait(self, bot_id, ready_pattern=None, ready_timeout=15):
+        """Запустить бота и дождаться строки готовности.
+
+        Возвращает (success, message) в формате менеджера ботов.
+        """
+        if self.is_running(bot_id):
+            return True, "Уже запущен"
+        if not await self.start(bot_id):
+            return False, "Не удалось запустить процесс"
+        if not ready_pattern:
+            return True, None
+        state = self.bots[bot_id]
+        readiness = await wait_until_ready(state['process'], state['output'], ready_pattern, timeout=ready_timeout)
+        if readiness == 'exited':
+            return False, f"Процесс завершился сразу после запуска (код {state['process'].returncode})"
+        if readiness == 'timeout':
+            return True, "готовность не подтверждена"
+        return True, None
+
+    async def restart(self, bot_id, ready_pattern=None, ready_timeout=15):
+        """Перезапустить бота"""
+        await self.stop(bot_id)
+        return await self.start_and_wait(bot_id, ready_pattern, ready_timeout)
+
+    async def start(self, bot_id):
+        """Запустить бота и начать следить за его завершением"""
+        state = self.bots[bot_id]
+        if self.is_running(bot_id):
+            return True
+        state['stopping'] = False
+        if not await self._spawn(bot_id):
+            return False
+        state['watch_task'] = asyncio.create_task(self._watch(bot_id))
+        return True
+
+    async def stop(self, bot_id, timeout=5):
+        """Остановить бота без перезапуска"""
+        state = self.bots[bot_id]
+        state['stopping'] = True
+        watch_task = state['watch_task']
+        if watch_task and watch_task is not asyncio.current_task():
+            watch_task.cancel()
+        process = state['process']
+        if process and process.returncode is None:
+            killed = await terminate_process(process, timeout=timeout)
+            self._emit(bot_id, 'stopped', {'killed': killed})
+
+    async def stop_all(self, timeout=5):
+        """Остановить всех ботов параллельно"""
+        await asyncio.gather(*(self.stop(bot_id, timeout) for bot_id in self.bots))
+
+    async def _spawn(self, bot_id):
+        state = self.bots[bot_id]
+        main_file = os.path.abspath(os.path.join(state['dir'], state['script']))
+        if not os.path.exists(main_file):
+            self._emit(bot_id, 'start_failed', {'error': f"Файл {main_file} не найден"})
+            return False
+        try:
+            process, _ = await spawn_process(
+                [sys.executable, main_file], state['output'], cwd=state['dir'],
+                limits=state['limits'], name=bot_id
+            )
+        except Exception as e:
+            self._emit(bot_id, 'start_failed', {'error': str(e)})
+            return False
+        state['process'] = process
+        state['started_at'] = time.monotonic()
+        state['started_wall'] = time.time()
+        self._emit(bot_id, 'started', {'pid': process.pid})
+        return True
+
+    def limited_pids(self):
+        """PID работающих ботов с ограничениями ресурсов"""
+        return {
+            bot_id: self.status(bot_id)['pid']
+            for bot_id, state in self.bots.items() if state['limits']
+        }
+
+    async def enforce_limits(self):
+        """Следить за ограничениями и перезапускать нарушивших их ботов.
+
+        Перезапуск мягкий: terminate с таймаутом, как при обычной остановке,
+        и не считается сбоем для экспоненциальной задержки.
+        """
+        if not any(state['limits'] for state in self.bots.values()):
+            return
+        while True:
+            try:
+                samples = await asyncio.to_thread(lambda: self.resources.sample(self.limited_pids()))
+                limits = {bot_id: state['limits'] for bot_id, state in self.bots.items()}
+                for bot_id, reason in self.enforcer.check(samples, limits):
+                    self._emit(bot_id, 'limit_exceeded', {'reason': reason})
+                    await self.restart(bot_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка проверки ограничений ботов: {e}")
+            await asyncio.sleep(self.resource_interval)
+
+    def next_delay(self, bot_id):
+        """Задержка перед следующим перезапуском"""
+        failures = self.bots[bot_id]['failures']
+        return min(self.max_delay, self.restart_delay * (2 ** max(0, failures - 1)))
+
+    async def _watch(self, bot_id):
+        state = self.bots[bot_id]
+        try:
+            while True:
+                returncode = await state['process'].wait()
+                if state['stopping']:
+                    return
+                uptime = time.monotonic() - state['started_at']
+                self._emit(bot_id, 'exited', {
+                    'returncode': returncode,
+                    'uptime': uptime,
+                    'tail': state['output'].tail(10)
+                })
+                if not state['auto_restart']:
+                    return
+
+                if uptime >= self.stable_after:
+                    state['failures'] = 0
+                state['failures'] += 1
+                delay = self.next_delay(bot_id)
+                self._emit(bot_id, 'restarting', {'delay': delay, 'attempt': state['failures']})
+                await asyncio.sleep(delay)
+
+                # Если запуск не удался - ждем следующую задержку и пробуем снова
+                while not state['stopping'] and not await self._spawn(bot_id):
+                    state['failures'] += 1
+                    delay = self.next_delay(bot_id)
+                    self._emit(bot_id, 'restarting', {'delay': delay, 'attempt': state['failures']})
+                    await asyncio.sleep(delay)
+                if state['stopping']:
+                    return
+        except asyncio.CancelledError:
+            pass
+
+    def _emit(self, bot_id, event, info):
+        info = dict(info, name=self.bots[bot_id]['name'])
+        for listener in self.listeners:
+            try:
+                listener(bot_id, event, info)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика события {event}: {e}")
+
+
+def print_event(bot_id, event, info):
+    """Вывод событий супервизора в консоль для скриптов запуска"""
+    name = info['name']
+    if event == 'started':
+        print(f"✅ {name} запущен (PID: {info['pid']})")
+    elif event == 'start_failed':
+        print(f"❌ Ошибка запуска {name}: {info['error']}")
+    elif event == 'exited':
+        print(f"⚠️ {name} завершился неожиданно (код {info['returncode']})")
+        for line in info['tail']:
+            print(f"   {line}")
+    elif event == 'restarting':
+        print(f"🔄 {name}: перезапуск через {info['delay']:.0f} сек (попытка {info['attempt']})")
+    elif event == 'limit_exceeded':
+        print(f"🚧 {name} превысил ограничения ({info['reason']}), перезапуск")
+    elif event == 'stopped':
+        if info['killed']:
+            print(f"🔪 {name} принудительно остановлен")
+        else:
+            print(f"⏹️ {name} остановлен")
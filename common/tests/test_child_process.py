@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.child_process import OutputBuffer, spawn_process, terminate_process, wait_until_ready
+
+class TestOutputBuffer(unittest.TestCase):
+    
+    def test_buffer_is_bounded(self):
+        """Тест: буфер хранит только последние строки"""
+        buffer = OutputBuffer(max_lines=3)
+        for i in range(10):
+            buffer.append(f"line {i}")
+        
+        self.assertEqual(buffer.tail(5), ["line 7", "line 8", "line 9"])
+        self.assertEqual(buffer.total_lines, 10)
+    
+    def test_file_rotation(self):
+        """Тест ротации файла вывода по размеру"""
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = os.path.join(tmp, 'output.log')
+            buffer = OutputBuffer(log_path=log_path, max_bytes=100, backup_count=2)
+            for i in range(50):
+                buffer.append(f"line {i:04d}")
+            buffer.close()
+            
+            self.assertTrue(os.path.exists(log_path + '.1'))
+            self.assertTrue(os.path.exists(log_path + '.2'))
+            self.assertFalse(os.path.exists(log_path + '.3'))
+            self.assertLess(os.path.getsize(log_path + '.1'), 120)
+    
+    def test_file_written_in_background(self):
+        """Тест: строки пишутся в файл фоновым потоком пачками и дописываются при закрытии"""
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = os.path.join(tmp, 'output.log')
+            buffer = OutputBuffer(log_path=log_path, max_batch=100)
+            for i in range(1000):
+                buffer.append(f"line {i}")
+            self.assertEqual(buffer._thread.name, 'output-writer')
+            buffer.close()
+            
+            with open(log_path, encoding='utf-8') as f:
+                self.assertEqual(f.read().splitlines(), [f"line {i}" for i in range(1000)])
+
+class TestSpawnProcess(unittest.IsolatedAsyncioTestCase):
+    
+    async def test_chatty_child_does_not_block(self):
+        """Тест: процесс, пишущий больше буфера pipe, не зависает"""
+        script = "import sys\nfor i in range(20000): print('x' * 20, i)\nsys.stderr.write('done\\n')"
+        buffer = OutputBuffer(max_lines=50)
+        process, reader_task = await spawn_process([sys.executable, '-c', script], buffer)
+        
+        await asyncio.wait_for(process.wait(), timeout=30)
+        await reader_task
+        
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(buffer.total_lines, 20001)
+        self.assertEqual(len(buffer.lines), 50)
+        self.assertEqual(buffer.tail(1), ['done'])
+    
+    async def test_terminate_process(self):
+        """Тест остановки зависшего процесса"""
+        buffer = OutputBuffer()
+        process, reader_task = await spawn_process(
+            [sys.executable, '-c', 'import time; time.sleep(60)'], buffer
+        )
+        
+        killed = await terminate_process(process, timeout=5)
+        await reader_task
+        
+        self.assertFalse(killed)
+        self.assertIsNotNone(process.returncode)
+
+    async def test_wait_until_ready(self):
+        """Тест ожидания строки готовности"""
+        buffer = OutputBuffer()
+        script = "import sys, time\nsys.stderr.write('Bot запущен\\n')\nsys.stderr.flush()\ntime.sleep(60)"
+        process, reader_task = await spawn_process([sys.executable, '-c', script], buffer)
+        
+        self.assertEqual(await wait_until_ready(process, buffer, 'запущен', timeout=10), 'ready')
+        
+        await terminate_process(process)
+        await reader_task
+    
+    async def test_wait_until_ready_exited(self):
+        """Тест: процесс упал до готовности"""
+        buffer = OutputBuffer()
+        process, reader_task = await spawn_process([sys.executable, '-c', 'raise SystemExit(3)'], buffer)
+        
+        self.assertEqual(await wait_until_ready(process, buffer, 'запущен', timeout=10), 'exited')
+        self.assertEqual(process.returncode, 3)
+        await reader_task
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import copy
+import json
+import os
+import sys
+import tempfile
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.config import BASE_SCHEMA, NUMBER, REQUIRED, ConfigStore, changed_keys, freeze, merge_schema, validate_config
+
+SCHEMA = merge_schema(BASE_SCHEMA, {'monitoring': {'cpu_threshold': NUMBER}, 'bots': {'*': {'name': str}}})
+STRICT_SCHEMA = merge_schema(SCHEMA, {REQUIRED: {'monitoring'}, 'monitoring': {REQUIRED: {'cpu_threshold'}}}, {REQUIRED: {'bots'}})
+
+class TestConfigSnapshot(unittest.TestCase):
+
+    def test_frozen_snapshot(self):
+        """Снимок нельзя изменить, но он сериализуется и сравнивается как обычный dict"""
+        config = {'admin_ids': [1, 2], 'monitoring': {'cpu_threshold': 80}}
+        snapshot = freeze(config)
+        with self.assertRaises(TypeError):
+            snapshot['admin_ids'] = []
+        with self.assertRaises(TypeError):
+            snapshot['monitoring'].update(cpu_threshold=1)
+        with self.assertRaises(TypeError):
+            snapshot['admin_ids'].append(3)
+        self.assertEqual(snapshot, config)
+        self.assertEqual(json.loads(json.dumps(snapshot)), config)
+        # Изменяемая копия для правок
+        editable = copy.deepcopy(snapshot)
+        editable['monitoring']['cpu_threshold'] = 90
+        self.assertEqual(snapshot['monitoring']['cpu_threshold'], 80)
+
+    def test_validation_and_changes(self):
+        """Ошибки типов с путем к ключу; изменившиеся ключи с точками"""
+        errors = validate_config({
+            'admin_ids': [1, '2'],
+            'monitoring': {'cpu_threshold': True, 'sample_interval': 0.5},
+            'bots': {'a': {'name': 5}},
+            'extra': 'неизвестные ключи не проверяются'
+        }, SCHEMA)
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(errors[0].startswith('admin_ids[1]'))
+        self.assertTrue(errors[1].startswith('monitoring.cpu_threshold'))
+        self.assertTrue(errors[2].startswith('bots.a.name'))
+
+        old = {'monitoring': {'cpu_threshold': 80, 'sample_interval': 1}, 'bots': {'a': {}}}
+        new = {'monitoring': {'cpu_threshold': 90, 'sample_interval': 1}, 'bots': {'a': {}, 'b': {}}}
+        self.assertEqual(changed_keys(old, new), {'monitoring.cpu_threshold', 'bots.b'})
+
+    def test_required_keys(self):
+        """Без обязательных ключей конфиг не проходит проверку"""
+        self.assertEqual(STRICT_SCHEMA[REQUIRED], {'monitoring', 'bots'})
+        self.assertEqual(validate_config({'monitoring': {'cpu_threshold': 80}, 'bots': {}}, STRICT_SCHEMA), [])
+        errors = validate_config({'monitoring': {}}, STRICT_SCHEMA)
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(errors[0].startswith('bots:'))
+        self.assertTrue(errors[1].startswith('monitoring.cpu_threshold:'))
+
+class TestConfigStore(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'config.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        # Гарантированно новая подпись файла даже при грубом mtime
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    async def test_reload_and_reject(self):
+        """Изменение доходит до подписчика; битый файл оставляет прежний снимок"""
+        config = {'monitoring': {'cpu_threshold': 80}}
+        self.write(json.dumps(config))
+        store = ConfigStore(self.path, SCHEMA)
+        snapshot = store.prime(config)
+        calls = []
+        store.subscribe(lambda new, changed: calls.append((new, changed)))
+
+        self.assertEqual(await store.check(), set())
+        self.write(json.dumps({'monitoring': {'cpu_threshold': 70}}))
+        self.assertEqual(await store.check(), {'monitoring.cpu_threshold'})
+        self.assertEqual(calls[0][0]['monitoring']['cpu_threshold'], 70)
+        # Старый снимок у того, кто его взял, не изменился
+        self.assertEqual(snapshot['monitoring']['cpu_threshold'], 80)
+
+        self.write('{"monitoring": ')
+        self.assertEqual(await store.check(), set())
+        self.write(json.dumps({'monitoring': {'cpu_threshold': 'много'}}))
+        self.assertEqual(await store.check(), set())
+        self.assertEqual(store.rejected, 2)
+        self.assertEqual(store.snapshot['monitoring']['cpu_threshold'], 70)
+        self.assertEqual(len(calls), 1)
+
+    async def test_state_check_keeps_snapshot(self):
+        """Файл без обязательной секции или отклоненный проверкой бота не применяется"""
+        config = {'monitoring': {'cpu_threshold': 80}, 'bots': {'a': {}}}
+        self.write(json.dumps(config))
+        store = ConfigStore(self.path, STRICT_SCHEMA)
+        store.prime(config)
+        store.add_check(lambda new: [] if 'a' in new['bots'] else ['bots.a: бот запущен'])
+
+        self.write(json.dumps({'bots': {'a': {}}}))
+        self.assertEqual(await store.check(), set())
+        self.write(json.dumps({'monitoring': {'cpu_threshold': 80}, 'bots': {}}))
+        self.assertEqual(await store.check(), set())
+        self.assertEqual(store.rejected, 2)
+        self.assertEqual(store.snapshot, config)
+
+if __name__ == '__main__':
+    unittest.main()
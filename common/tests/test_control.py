@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.control import SupervisorServer, SupervisorClient, SupervisorView
+from common.supervisor import BotSupervisor
+
+BOT_CODE = "import time\nprint('Бот запущен', flush=True)\ntime.sleep(60)\n"
+
+class TestSupervisorControl(unittest.IsolatedAsyncioTestCase):
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        bot_dir = os.path.join(self.tmp.name, 'Test_bot')
+        os.makedirs(bot_dir)
+        with open(os.path.join(bot_dir, 'main.py'), 'w') as f:
+            f.write(BOT_CODE)
+        
+        self.supervisor = BotSupervisor(restart_delay=0.1)
+        self.supervisor.add_bot('Test_bot', 'Test Bot', bot_dir)
+        self.socket_path = os.path.join(self.tmp.name, 'control.sock')
+        self.server = SupervisorServer(self.supervisor, self.socket_path)
+        await self.server.start()
+        self.client = SupervisorClient(self.socket_path, timeout=10)
+    
+    async def asyncTearDown(self):
+        await self.supervisor.stop_all()
+        await self.server.close()
+        self.tmp.cleanup()
+    
+    async def test_start_status_stop(self):
+        """Тест управления ботом через сокет"""
+        response = await self.client.request('start', bot='Test_bot', ready_pattern='запущен', ready_timeout=10)
+        self.assertTrue(response['ok'])
+        self.assertIsNone(response['error'])
+        
+        status = await self.client.request('status')
+        self.assertTrue(status['bots']['Test_bot']['running'])
+        self.assertEqual(status['bots']['Test_bot']['pid'], self.supervisor.bots['Test_bot']['process'].pid)
+        
+        tail = await self.client.request('tail', bot='Test_bot', lines=5)
+        self.assertEqual(tail['lines'], ['Бот запущен'])
+        
+        response = await self.client.request('stop', bot='Test_bot')
+        self.assertTrue(response['ok'])
+        self.assertFalse(response['state']['running'])
+    
+    async def test_unknown_bot(self):
+        """Тест ошибки для неизвестного бота"""
+        response = await self.client.request('start', bot='nope')
+        
+        self.assertFalse(response['ok'])
+        self.assertIn('nope', response['error'])
+    
+    async def test_view_follows_events(self):
+        """Тест: зеркало состояния обновляется по событиям без запросов"""
+        view = SupervisorView(self.socket_path, retry_interval=0.1)
+        task = asyncio.create_task(view.run())
+        try:
+            for _ in range(50):
+                if view.connected:
+                    break
+                await asyncio.sleep(0.02)
+            self.assertTrue(view.connected)
+            self.assertFalse(view.get('Test_bot')['running'])
+            
+            await self.supervisor.start('Test_bot')
+            for _ in range(50):
+                if view.get('Test_bot')['running']:
+                    break
+                await asyncio.sleep(0.02)
+            self.assertTrue(view.get('Test_bot')['running'])
+            
+            await self.supervisor.stop('Test_bot')
+            await asyncio.sleep(0.1)
+            self.assertFalse(view.get('Test_bot')['running'])
+        finally:
+            task.cancel()
+    
+    async def test_client_without_daemon(self):
+        """Тест: без демона клиент сообщает ConnectionError"""
+        client = SupervisorClient(os.path.join(self.tmp.name, 'missing.sock'))
+        
+        with self.assertRaises(ConnectionError):
+            await client.request('status')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import json
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+import asyncio
+import io
+import threading
+from contextlib import redirect_stderr
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common import crashes
+from common.crashes import CrashStore, format_crash, top_crashes
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+
+def fail(value):
+    raise ValueError(f"плохое значение {value}")
+
+def fail_elsewhere():
+    raise ValueError("плохое значение")
+
+def catch(function, *args):
+    try:
+        function(*args)
+    except ValueError as e:
+        return e
+
+class TestCrashStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'crashes.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repeated_crash_is_one_record(self):
+        """Повтор сбоя с другим сообщением увеличивает счетчик, другое место - новая запись"""
+        store = CrashStore(self.path, bot='Test Bot')
+        first = store.record_exception(catch(fail, 1), flush=True)
+        for value in range(2, 50):
+            self.assertEqual(store.record_exception(catch(fail, value), flush=True), first)
+        other = store.record_exception(catch(fail_elsewhere), flush=True)
+        self.assertNotEqual(other, first)
+
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        entry = data['crashes'][first]
+        self.assertEqual(entry['count'], 49)
+        self.assertEqual(entry['message'], "плохое значение 49")
+        self.assertLessEqual(entry['first_seen'], entry['last_seen'])
+        self.assertTrue(entry['stack'][-1].startswith('test_crashes.py:'))
+        # Файл не растет с числом повторов
+        self.assertLess(os.path.getsize(self.path), 2048)
+
+        # После перезапуска счетчики продолжаются
+        restored = CrashStore(self.path)
+        self.assertEqual(restored.top(1)[0][0], first)
+
+    def test_oldest_evicted_and_top_across_bots(self):
+        """Записей не больше max_entries; топ объединяет ботов по числу повторов"""
+        store = CrashStore(self.path, bot='A', max_entries=1)
+        store.record_exception(catch(fail_elsewhere), flush=True)
+        for _ in range(3):
+            store.record_exception(catch(fail, 1), flush=True)
+        self.assertEqual(len(store.crashes), 1)
+
+        other_path = os.path.join(self.tmp.name, 'other.json')
+        other = CrashStore(other_path, bot='B')
+        other.record_exception(catch(fail_elsewhere), flush=True)
+
+        top = top_crashes({'A': self.path, 'B': other_path, 'C': os.path.join(self.tmp.name, 'none.json')})
+        self.assertEqual([(entry['bot'], entry['count']) for entry in top], [('A', 3), ('B', 1)])
+        self.assertIn("3× ValueError", format_crash(top[0]))
+
+    def test_network_errors_are_not_crashes(self):
+        """Сетевые ошибки опроса Telegram не попадают в хранилище сбоев"""
+        store = CrashStore(self.path)
+        for error in (NetworkError("Bad Gateway"), TimedOut(), RetryAfter(5)):
+            asyncio.run(store.error_handler(None, SimpleNamespace(error=error)))
+        self.assertEqual(store.top(10), [])
+
+        asyncio.run(store.error_handler(None, SimpleNamespace(error=catch(fail, 1))))
+        self.assertEqual(len(store.top(10)), 1)
+        # BadRequest - подкласс NetworkError, но это ошибка обработчика
+        asyncio.run(store.error_handler(None, SimpleNamespace(error=BadRequest("Can't parse entities"))))
+        self.assertEqual(len(store.top(10)), 2)
+
+    def test_hook_routes_by_bot_folder(self):
+        """Один обработчик процесса на несколько ботов: сбой попадает в файл бота, где он произошел"""
+        saved = (list(crashes._installed), sys.excepthook, threading.excepthook)
+        crashes._installed.clear()
+        try:
+            stores = {}
+            for bot in ('A', 'B'):
+                folder = os.path.join(self.tmp.name, bot)
+                os.mkdir(folder)
+                stores[bot] = CrashStore(os.path.join(folder, 'crashes.json'), bot=bot)
+                stores[bot].install()
+            self.assertIs(sys.excepthook, crashes._excepthook)
+
+            # Обработчик бота A (установлен первым) вызывается из общего кода
+            namespace = {}
+            exec(compile("def handler():\n    raise ValueError('A')\n", os.path.join(self.tmp.name, 'A', 'main.py'), 'exec'), namespace)
+            error = catch(lambda: namespace['handler']())
+            with redirect_stderr(io.StringIO()):
+                sys.excepthook(ValueError, error, error.__traceback__)
+                # Сбой вне папок ботов не записывается никуда
+                error = catch(fail, 1)
+                sys.excepthook(ValueError, error, error.__traceback__)
+
+            self.assertEqual([entry['message'] for _, entry in stores['A'].top(10)], ['A'])
+            self.assertEqual(stores['B'].top(10), [])
+        finally:
+            crashes._installed[:] = saved[0]
+            sys.excepthook, threading.excepthook = saved[1], saved[2]
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+from unittest.mock import AsyncMock, Mock
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from telegram.error import BadRequest
+
+from common.dashboards import DashboardRegistry
+from common.render_cache import RenderCache
+from common.sender import MessageSender
+
+class TestDashboardRegistry(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'dashboards.json')
+        self.sender = MessageSender(global_rate=100, chat_rate=100)
+        self.bot = Mock()
+        self.bot.token = '1:TEST'
+        self.bot.edit_message_text = AsyncMock(return_value=True)
+
+    async def asyncTearDown(self):
+        await self.sender.close()
+        self.tmp.cleanup()
+
+    async def test_subscriptions_survive_restart(self):
+        """Подписки сохраняются в файл; в чате остаются только последние"""
+        registry = DashboardRegistry(self.path, max_per_chat=2)
+        for message_id in (1, 2, 3):
+            registry.add(100, message_id)
+        registry.add(200, 1)
+        registry.remove(200, 1)
+        registry.remove(200, 1)
+
+        restored = DashboardRegistry(self.path)
+        restored.load()
+        self.assertEqual(sorted(restored.subscriptions), [(100, 2), (100, 3)])
+
+    async def test_publish_fans_out_once(self):
+        """Одна отрисовка уходит во все сообщения, повтор без изменений не отправляется"""
+        registry = DashboardRegistry(self.path)
+        registry.add(100, 1)
+        registry.add(200, 5)
+        render = RenderCache(min_interval=0)
+
+        await registry.publish(render, self.sender, self.bot, "статус 12:00", screen='status', data="статус")
+        await registry.publish(render, self.sender, self.bot, "статус 12:30", screen='status', data="статус")
+
+        self.assertEqual(self.bot.edit_message_text.await_count, 2)
+        edited = {(call.kwargs['chat_id'], call.kwargs['message_id']) for call in self.bot.edit_message_text.await_args_list}
+        self.assertEqual(edited, {(100, 1), (200, 5)})
+        self.assertEqual(render.skipped, 2)
+
+    async def test_deleted_message_is_unsubscribed(self):
+        """Удаленное сообщение отписывается, остальные обновляются"""
+        registry = DashboardRegistry(self.path)
+        registry.add(100, 1)
+        registry.add(200, 5)
+
+        async def edit(chat_id, message_id, text, **kwargs):
+            if chat_id == 100:
+                raise BadRequest("Message to edit not found")
+            return True
+        self.bot.edit_message_text = AsyncMock(side_effect=edit)
+
+        results = await registry.publish(RenderCache(min_interval=0), self.sender, self.bot, "статус")
+        self.assertEqual(results[1], 'sent')
+        self.assertEqual(list(registry.subscriptions), [(200, 5)])
+
+    async def test_deferred_edit_failure_unsubscribes(self):
+        """Ошибка отложенной кэшем правки тоже отписывает удаленное сообщение"""
+        registry = DashboardRegistry(self.path)
+        registry.add(100, 1)
+        render = RenderCache(min_interval=0.1)
+        await registry.publish(render, self.sender, self.bot, "статус 1", screen='status')
+
+        self.bot.edit_message_text = AsyncMock(side_effect=BadRequest("Message to edit not found"))
+        results = await registry.publish(render, self.sender, self.bot, "статус 2", screen='status')
+        self.assertEqual(results, ['deferred'])
+        await asyncio.sleep(0.3)
+
+        self.assertEqual(len(registry), 0)
+        self.assertEqual(render.entries, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import logging
+import os
+import sys
+import tempfile
+import shutil
+
+# Добавляем путь к корню проекта для импорта host
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Обработчик у корневого логгера: basicConfig ботов не добавит свои обработчики
+logging.getLogger().addHandler(logging.NullHandler())
+
+from host import PluginHost
+from host_benchmark import prepare_configs
+
+class TestPluginHost(unittest.IsolatedAsyncioTestCase):
+    
+    def setUp(self):
+        self.config_root = tempfile.mkdtemp()
+        prepare_configs(self.config_root)
+        # Боты при импорте открывают свои лог-файлы в текущей папке
+        cwd = os.getcwd()
+        os.chdir(self.config_root)
+        try:
+            self.host = PluginHost(config_root=self.config_root)
+            self.host.load_all()
+        finally:
+            os.chdir(cwd)
+    
+    def tearDown(self):
+        if self.host.metrics:
+            self.host.metrics.stop()
+        shutil.rmtree(self.config_root, ignore_errors=True)
+    
+    def test_plugins_share_resources(self):
+        """Тест: все боты загружены в один процесс с общим HTTP-клиентом и метриками"""
+        self.assertEqual(set(self.host.plugins), {'Telescan_bot', 'MineServ_bot', 'Mather_bots', 'BotMonitor'})
+        for plugin in self.host.plugins.values():
+            self.assertIsNone(plugin['error'])
+            self.assertIs(plugin["application"].bot.request, self.host.http)
+            self.assertIs(plugin['bot'].metrics, self.host.metrics)
+    
+    async def test_manager_controls_plugins_through_host(self):
+        """Тест: менеджер видит плагины через хост вместо процессов"""
+        manager = self.host.plugins['Mather_bots']['bot']
+        
+        self.assertIs(manager.supervisor, self.host)
+        self.assertEqual(manager.daemon_bot_id('telescan'), 'Telescan_bot')
+        self.assertFalse(manager.is_bot_running('telescan'))
+        
+        response = await self.host.request('stop', bot='Mather_bots')
+        self.assertFalse(response['ok'])
+
+if __name__ == '__main__':
+    unittest.main()
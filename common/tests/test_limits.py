@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.child_process import OutputBuffer, spawn_process
+from common.limits import LimitEnforcer, parse_limits
+from common.resources import MB
+from common.supervisor import BotSupervisor
+
+class TestLimits(unittest.TestCase):
+
+    def test_parse_limits(self):
+        """Неверные и неизвестные ограничения пропускаются, nice ограничен диапазоном"""
+        limits = parse_limits({
+            'memory_mb': '200', 'nice': 40, 'cpu_affinity': [1, 0, 1],
+            'max_fds': -1, 'cgroup': False, 'swap': 1
+        })
+        self.assertEqual(limits, {'memory_mb': 200, 'nice': 19, 'cpu_affinity': [0, 1]})
+        self.assertEqual(parse_limits(None), {})
+
+    def test_breach_needs_consecutive_samples(self):
+        """Перезапуск только после превышения несколько снимков подряд"""
+        enforcer = LimitEnforcer(grace=2)
+        limits = {'bot': {'memory_mb': 100, 'max_fds': 100}}
+        high = {'bot': {'rss': 150 * MB, 'fds': 10}}
+        low = {'bot': {'rss': 50 * MB, 'fds': 10}}
+
+        self.assertEqual(enforcer.check(high, limits), [])
+        self.assertEqual(enforcer.check(low, limits), [])
+        self.assertEqual(enforcer.check(high, limits), [])
+        breaches = enforcer.check(high, limits)
+        self.assertEqual(len(breaches), 1)
+        self.assertIn('150 МБ', breaches[0][1])
+
+        fds = {'bot': {'rss': 50 * MB, 'fds': 95}}
+        enforcer.check(fds, limits)
+        self.assertIn('дескрипторов', enforcer.check(fds, limits)[0][1])
+
+@unittest.skipIf(os.name == 'nt', "exec-обертка есть только в POSIX")
+class TestLimitedProcess(unittest.IsolatedAsyncioTestCase):
+
+    async def test_limits_applied_at_spawn(self):
+        """nice и лимит дескрипторов действуют в процессе с самого запуска"""
+        code = "import os, resource; print(os.getpid(), os.getpriority(os.PRIO_PROCESS, 0), resource.getrlimit(resource.RLIMIT_NOFILE)[0])"
+        buffer = OutputBuffer()
+        base = os.getpriority(os.PRIO_PROCESS, 0)
+        process, reader = await spawn_process(
+            [sys.executable, '-c', code], buffer, limits={'nice': min(19, base + 5), 'max_fds': 64}
+        )
+        await process.wait()
+        await reader
+        # Обертка заменяет себя ботом через exec - PID тот же
+        self.assertEqual(buffer.tail(1), [f"{process.pid} {min(19, base + 5)} 64"])
+
+    async def test_supervisor_restarts_bot_over_memory_limit(self):
+        """Бот, превысивший память, мягко перезапускается супервизором"""
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, 'main.py'), 'w') as f:
+                f.write("import time\ndata = bytearray(40 * 1024 * 1024)\ntime.sleep(60)\n")
+            events = []
+            supervisor = BotSupervisor(on_event=lambda bot_id, event, info: events.append((event, info)), resource_interval=0.2)
+            supervisor.add_bot('test', 'Test Bot', tmp, limits={'memory_mb': 20})
+
+            await supervisor.start('test')
+            first_pid = supervisor.status('test')['pid']
+            enforcer = asyncio.create_task(supervisor.enforce_limits())
+            try:
+                for _ in range(50):
+                    await asyncio.sleep(0.1)
+                    if any(event == 'limit_exceeded' for event, _ in events) and supervisor.is_running('test'):
+                        break
+            finally:
+                enforcer.cancel()
+                await supervisor.stop('test')
+
+            self.assertIn('limit_exceeded', [event for event, _ in events])
+            started = [info['pid'] for event, info in events if event == 'started']
+            self.assertGreaterEqual(len(started), 2)
+            self.assertEqual(started[0], first_pid)
+            self.assertNotIn('exited', [event for event, _ in events])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+import sys
+import tempfile
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.log_index import LogIndex
+from common.logs import SegmentedLog
+
+class TestLogIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'bot.log')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def append(self, text):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_incremental_by_offset(self):
+        """Дочитываются только новые байты, незаконченная строка ждет конца"""
+        index = LogIndex(self.path)
+        self.append("запуск бота\nОшибка сети: timeout\nнеполная")
+        self.assertEqual(index.update(), 2)
+        offset = index.offset
+        self.assertEqual(offset, os.path.getsize(self.path))
+
+        self.append(" строка ошибка\n")
+        self.assertEqual(index.update(), 1)
+        self.assertEqual(index.update(), 0)
+        self.assertEqual(index.tail(1), ["неполная строка ошибка"])
+
+        lines, total = index.search("ОШИБКА")
+        self.assertEqual(total, 2)
+        self.assertEqual(lines, ["неполная строка ошибка", "Ошибка сети: timeout"])
+        self.assertEqual(index.search("ошибка сети")[1], 1)
+        self.assertEqual(index.search("нет такого")[1], 0)
+
+    def test_rotation_and_window(self):
+        """После ротации дочитывается старый сегмент; старые строки уходят из индекса"""
+        log = SegmentedLog(self.path, max_bytes=400)
+        index = LogIndex(self.path, max_lines=5)
+        log.write("строка 0 событие\n")
+        index.update()
+        for i in range(1, 12):
+            log.write(f"строка {i} событие {'x' * 20}\n")
+            if i == 8:
+                index.update()
+        log.close()
+        index.update()
+
+        # Все строки прочитаны по порядку, в окне - последние пять
+        self.assertEqual(index.next_seq, 12)
+        self.assertEqual(len(index), 5)
+        lines, total = index.search("событие", page=1, page_size=2)
+        self.assertEqual(total, 5)
+        self.assertEqual([line.split()[1] for line in lines], ['9', '8'])
+        self.assertEqual(index.search("0")[1], 0)
+        self.assertTrue(all(len(postings) <= 5 for postings in index.postings.values()))
+
+if __name__ == '__main__':
+    unittest.main()
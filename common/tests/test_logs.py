@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import gzip
+import logging
+import os
+import sys
+import tempfile
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.logs import LogPipeline, SegmentedLog, rotate_log
+
+class TestSegmentedLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'bot.log')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_size_rotation_is_bounded(self):
+        """Сегменты по размеру, самые старые удаляются, старые сжимаются"""
+        log = SegmentedLog(self.path, max_bytes=100, backup_count=2, compress=True)
+        for i in range(10):
+            log.write(f"{i}" * 60 + "\n")
+        log.close()
+
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['bot.log', 'bot.log.1.gz', 'bot.log.2.gz'])
+        with open(self.path) as f:
+            self.assertTrue(f.read().startswith('9'))
+        with gzip.open(self.path + '.1.gz', 'rt') as f:
+            self.assertTrue(f.read().startswith('8'))
+
+    def test_time_rotation(self):
+        """Сегмент старше rotate_interval закрывается и без новых записей"""
+        log = SegmentedLog(self.path, rotate_interval=3600)
+        log.write("старое\n")
+        self.assertAlmostEqual(log.seconds_until_rotation(), 3600, delta=5)
+        log.started -= 3600
+        log.rotate_if_due()
+        log.write("новое\n")
+        log.close()
+
+        with open(self.path + '.1') as f:
+            self.assertEqual(f.read(), "старое\n")
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "новое\n")
+
+        # Лог остановленного бота уходит в сегмент, а не очищается
+        self.assertTrue(rotate_log(self.path))
+        self.assertFalse(os.path.exists(self.path))
+        with open(self.path + '.1') as f:
+            self.assertEqual(f.read(), "новое\n")
+
+class TestLogPipeline(unittest.TestCase):
+
+    def test_records_written_in_batches(self):
+        """Записи из логгера попадают в файл пачками через фоновый поток"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bot.log')
+            pipeline = LogPipeline(path, console=False)
+            logger = logging.getLogger('test_logs.pipeline')
+            logger.propagate = False
+            logger.addHandler(pipeline.handler())
+            try:
+                for i in range(1000):
+                    logger.warning("запись %d", i)
+                try:
+                    raise ValueError("сбой")
+                except ValueError:
+                    logger.exception("ошибка")
+                pipeline.start()
+                pipeline.stop()
+            finally:
+                logger.handlers.clear()
+
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+            self.assertEqual(pipeline.records, 1001)
+            self.assertLessEqual(pipeline.batches, 3)
+            self.assertIn("WARNING - запись 999", text)
+            self.assertIn("ValueError: сбой", text)
+
+if __name__ == '__main__':
+    unittest.main()
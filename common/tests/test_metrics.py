@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+import sys
+import time
+from unittest.mock import patch, MagicMock
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.metrics import MetricsSampler
+
+class TestMetricsSampler(unittest.TestCase):
+    
+    def setUp(self):
+        """Мокаем системные вызовы psutil"""
+        patchers = [
+            patch('psutil.cpu_percent', return_value=25.5),
+            patch('psutil.virtual_memory', return_value=MagicMock(percent=60.0, used=4*1024**3, total=8*1024**3)),
+            patch('psutil.disk_usage', return_value=MagicMock(percent=45.0, used=100*1024**3, total=500*1024**3)),
+            patch('psutil.net_io_counters', return_value=MagicMock(bytes_sent=1000, bytes_recv=2000)),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def test_latest_empty_before_start(self):
+        """Тест: до первого сбора снимка нет"""
+        sampler = MetricsSampler(interval=1)
+        self.assertIsNone(sampler.latest())
+    
+    def test_snapshot_samples_without_blocking(self):
+        """Тест: snapshot снимает метрики сразу, если буфер пуст"""
+        sampler = MetricsSampler(interval=1)
+        info = sampler.snapshot()
+        
+        self.assertEqual(info['cpu_percent'], 25.5)
+        self.assertEqual(info['memory_percent'], 60.0)
+        self.assertEqual(info['disk_percent'], 45.0)
+        self.assertIs(sampler.latest(), info)
+    
+    def test_ring_buffer_is_bounded(self):
+        """Тест: кольцевой буфер не растет больше history_size"""
+        sampler = MetricsSampler(interval=1, history_size=3)
+        for _ in range(10):
+            sampler.sample_now()
+        
+        self.assertEqual(len(sampler.get_history()), 3)
+    
+    def test_network_rate(self):
+        """Тест расчета скорости сети между снимками"""
+        sampler = MetricsSampler(interval=1)
+        sampler.sample_now()
+        sampler._last_net = (time.time() - 2, 0, 0)
+        info = sampler.sample_now()
+        
+        self.assertGreater(info['network_sent_rate'], 0)
+        self.assertGreater(info['network_recv_rate'], info['network_sent_rate'])
+    
+    def test_background_thread(self):
+        """Тест фонового потока и подписчиков"""
+        sampler = MetricsSampler(interval=0.01)
+        received = []
+        sampler.add_listener(received.append)
+        sampler.start()
+        time.sleep(0.1)
+        sampler.stop()
+        
+        self.assertGreater(len(received), 1)
+        self.assertIsNotNone(sampler.latest())
+
+if __name__ == '__main__':
+    unittest.main()
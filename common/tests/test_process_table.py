@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.process_table import ProcessTable, script_path
+
+class TestProcessTable(unittest.TestCase):
+    
+    def setUp(self):
+        """Запускаем тестовый скрипт, имитирующий бота"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.script = os.path.join(self.tmp.name, 'main.py')
+        with open(self.script, 'w') as f:
+            f.write("import time\ntime.sleep(60)\n")
+        # Запускаем по относительному пути, как это делают скрипты запуска
+        self.process = subprocess.Popen([sys.executable, 'main.py'], cwd=self.tmp.name)
+    
+    def tearDown(self):
+        """Останавливаем тестовый процесс"""
+        self.process.kill()
+        self.process.wait()
+        self.tmp.cleanup()
+    
+    def test_script_path_relative(self):
+        """Тест разрешения относительного пути скрипта через cwd"""
+        path = script_path(['python', 'main.py'], lambda: '/bots/Telescan_bot')
+        self.assertEqual(path, os.path.normcase(os.path.normpath('/bots/Telescan_bot/main.py')))
+        self.assertIsNone(script_path(['python', '-m', 'http.server'], lambda: '/'))
+    
+    def test_find_running_process(self):
+        """Тест поиска процесса по пути скрипта"""
+        table = ProcessTable(scan_interval=60)
+        
+        self.assertEqual(table.find(self.script), self.process.pid)
+        self.assertIsNone(table.find(os.path.join(self.tmp.name, 'other.py')))
+    
+    def test_steady_state_without_full_scan(self):
+        """Тест: повторные запросы не делают полный проход по процессам"""
+        table = ProcessTable(scan_interval=60)
+        table.find(self.script)
+        
+        with patch('psutil.process_iter') as mock_iter:
+            for _ in range(5):
+                self.assertEqual(table.find(self.script), self.process.pid)
+                table.find(os.path.join(self.tmp.name, 'other.py'))
+            mock_iter.assert_not_called()
+        self.assertEqual(table.full_scans, 1)
+    
+    def test_dead_pid_is_dropped(self):
+        """Тест: завершенный процесс пропадает из индекса"""
+        table = ProcessTable(scan_interval=60)
+        self.assertEqual(table.find(self.script), self.process.pid)
+        
+        self.process.kill()
+        self.process.wait()
+        
+        self.assertIsNone(table.find(self.script))
+
+if __name__ == '__main__':
+    unittest.main()
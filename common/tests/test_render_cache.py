@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
+
+from common.render_cache import RenderCache
+
+def make_query(data='refresh', chat_id=1, message_id=10):
+    query = MagicMock()
+    query.data = data
+    query.message.chat_id = chat_id
+    query.message.message_id = message_id
+    query.edit_message_text = AsyncMock()
+    return query
+
+class TestRenderCache(unittest.IsolatedAsyncioTestCase):
+
+    async def test_skips_identical_render(self):
+        """Тот же экран с теми же данными не отправляется повторно"""
+        cache = RenderCache(min_interval=0)
+        markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔄", callback_data='refresh')]])
+        query = make_query()
+
+        self.assertEqual(await cache.edit(query, "статус 12:00:00", data="статус", reply_markup=markup), 'sent')
+        self.assertEqual(await cache.edit(query, "статус 12:00:30", data="статус", reply_markup=markup), 'skipped')
+        self.assertEqual(await cache.edit(query, "статус 2", reply_markup=markup), 'sent')
+        self.assertEqual(query.edit_message_text.await_count, 2)
+
+        # Другое сообщение того же чата кэшируется отдельно
+        other = make_query(message_id=11)
+        self.assertEqual(await cache.edit(other, "статус 2", reply_markup=markup), 'sent')
+        self.assertEqual(cache.stats(), {'sent': 3, 'skipped': 1, 'coalesced': 0, 'failed': 0})
+
+    async def test_coalesces_rapid_refreshes(self):
+        """Частые обновления одного экрана сливаются в одну правку с последним текстом"""
+        cache = RenderCache(min_interval=0.1)
+        query = make_query()
+
+        self.assertEqual(await cache.edit(query, "1"), 'sent')
+        self.assertEqual(await cache.edit(query, "2"), 'deferred')
+        self.assertEqual(await cache.edit(query, "3"), 'deferred')
+        self.assertEqual(query.edit_message_text.await_count, 1)
+
+        await asyncio.sleep(0.2)
+        self.assertEqual(query.edit_message_text.await_count, 2)
+        self.assertEqual(query.edit_message_text.await_args.args[0], "3")
+        self.assertEqual(cache.coalesced, 2)
+
+    async def test_screen_change_is_immediate(self):
+        """Переход на другой экран не ждет интервала; возврат к показанному - отменяет отложенное"""
+        cache = RenderCache(min_interval=10)
+        query = make_query('detailed')
+
+        await cache.edit(query, "подробно")
+        self.assertEqual(await cache.edit(query, "меню", screen='main'), 'sent')
+        self.assertEqual(await cache.edit(query, "меню 2", screen='main'), 'deferred')
+        self.assertEqual(await cache.edit(query, "меню", screen='main'), 'skipped')
+        self.assertIsNone(cache.entries[(1, 10)]['pending'])
+
+    async def test_message_target_and_not_modified(self):
+        """Сообщение редактируется через edit_text, ошибка 'not modified' - это пропуск"""
+        cache = RenderCache(min_interval=0)
+        message = MagicMock(spec=['chat_id', 'message_id', 'edit_text'])
+        message.chat_id, message.message_id = 5, 7
+        message.edit_text = AsyncMock(side_effect=BadRequest("Message is not modified"))
+
+        self.assertEqual(await cache.edit(message, "статус", screen='status'), 'skipped')
+        self.assertEqual(cache.stats()['skipped'], 1)
+        message.edit_text.side_effect = BadRequest("Message to edit not found")
+        with self.assertRaises(BadRequest):
+            await cache.edit(message, "другой статус", screen='status')
+        self.assertEqual(cache.failed, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+import subprocess
+import sys
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.resources import ResourceTracker, growth_per_hour, MB
+
+class TestResourceTracker(unittest.TestCase):
+
+    def test_samples_child_process(self):
+        """Снимок процесса: CPU между снимками, память, потоки; история сбрасывается при смене PID"""
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        try:
+            tracker = ResourceTracker()
+            first = tracker.sample({'bot': child.pid}, now=1000)['bot']
+            self.assertIsNone(first['cpu_percent'])
+            self.assertGreater(first['rss'], 0)
+            self.assertGreaterEqual(first['threads'], 1)
+
+            second = tracker.sample({'bot': child.pid}, now=1010)['bot']
+            self.assertGreaterEqual(second['cpu_percent'], 0)
+            self.assertIn('RSS', tracker.format_line('bot'))
+
+            # Бот перезапущен с другим PID - история начинается заново
+            tracker.sample({'bot': os.getpid()}, now=1020)
+            self.assertEqual(len(tracker.histories['bot']), 1)
+        finally:
+            child.kill()
+            child.wait()
+
+        # Завершенный процесс и бот без PID забываются
+        tracker.sample({'bot': child.pid, 'other': None}, now=1030)
+        self.assertNotIn('bot', tracker.histories)
+        self.assertIsNone(tracker.latest('other'))
+
+    def test_growth_warning(self):
+        """Стабильный рост памяти дает предупреждение, колебания - нет"""
+        tracker = ResourceTracker(growth_window=1800, rss_growth_mb=30)
+        leaking = [{'time': t * 60, 'rss': 100 * MB + t * MB, 'fds': 10} for t in range(30)]
+        tracker.histories['leaky'] = leaking
+        self.assertAlmostEqual(growth_per_hour(leaking, 'rss', 1800) / MB, 60)
+        self.assertEqual(len(tracker.warnings('leaky')), 1)
+
+        stable = [{'time': t * 60, 'rss': 100 * MB + (t % 2) * 5 * MB, 'fds': 10} for t in range(30)]
+        tracker.histories['stable'] = stable
+        self.assertEqual(tracker.warnings('stable'), [])
+
+        # Слишком короткая история - скорость не считается
+        self.assertIsNone(growth_per_hour(leaking[:3], 'rss', 1800))
+
+if __name__ == '__main__':
+    unittest.main()
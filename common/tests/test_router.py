@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.router import LatencyHistogram, Router, pack
+
+def make_update(data, user_id=1):
+    update = MagicMock()
+    update.callback_query.data = data
+    update.callback_query.from_user.id = user_id
+    update.callback_query.answer = AsyncMock()
+    update.effective_user.id = user_id
+    update.message.reply_text = AsyncMock()
+    return update
+
+class TestRouter(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.router = Router([1])
+        self.calls = []
+
+        async def bot_action(query, context, action, bot_id):
+            self.calls.append((action, bot_id))
+
+        async def page(query, number):
+            self.calls.append(number)
+
+        self.router.add('bot', bot_action, str, str, pass_context=True)
+        self.router.add('page', page, int)
+
+    async def test_dispatch_typed_args(self):
+        """Аргументы приводятся к типам, последний забирает остаток строки"""
+        await self.router.dispatch(make_update(pack('bot', 'stop', 'my:bot')), None)
+        await self.router.dispatch(make_update(pack('page', 3)), None)
+        self.assertEqual(self.calls, [('stop', 'my:bot'), 3])
+        self.assertEqual(self.router.stats()['bot']['count'], 1)
+        self.assertIn('`page`', self.router.format_stats())
+
+    async def test_denied_and_stale(self):
+        """Чужой пользователь и устаревшие кнопки не доходят до обработчиков"""
+        stranger = make_update(pack('page', 1), user_id=2)
+        await self.router.dispatch(stranger, None)
+        stranger.callback_query.answer.assert_awaited_once()
+        for data in ('bot_stop_telescan', 'page:abc', 'bot:stop'):
+            await self.router.dispatch(make_update(data), None)
+        self.assertEqual(self.calls, [])
+        self.assertEqual((self.router.denied, self.router.stale), (1, 3))
+        self.assertEqual(self.router.format_stats(), "")
+
+        # Админы меняются вместе с конфигом
+        self.router.set_admins([2])
+        await self.router.dispatch(make_update(pack('page', 1), user_id=2), None)
+        self.assertEqual(self.calls, [1])
+
+    async def test_command_access(self):
+        """Команда от не-админа получает отказ"""
+        handler = AsyncMock()
+        command = self.router.command('start', handler)
+        denied = make_update(None, user_id=2)
+        await command(denied, None)
+        handler.assert_not_awaited()
+        denied.message.reply_text.assert_awaited_once()
+        await command(make_update(None), None)
+        handler.assert_awaited_once()
+        self.assertEqual(self.router.stats()['/start']['count'], 1)
+
+    def test_histogram_and_pack(self):
+        """Процентили по корзинам; слишком длинный callback_data - ошибка"""
+        histogram = LatencyHistogram()
+        for ms in [0.5] * 90 + [30] * 9 + [7000]:
+            histogram.add(ms)
+        self.assertEqual(histogram.percentile(50), 1)
+        self.assertEqual(histogram.percentile(95), 50)
+        self.assertEqual(histogram.percentile(100), 7000)
+        with self.assertRaises(ValueError):
+            pack('bot', 'restart', 'x' * 60)
+
+if __name__ == '__main__':
+    unittest.main()
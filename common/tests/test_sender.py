@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, Mock
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from telegram.error import RetryAfter
+
+from common.sender import MessageSender, TokenBucket, PRIORITY_ALERT, PRIORITY_ROUTINE
+
+def make_bot(token='1:TEST'):
+    bot = Mock()
+    bot.token = token
+    bot.send_message = AsyncMock(side_effect=lambda chat_id, text, **kwargs: (chat_id, text))
+    return bot
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_rate_and_block(self):
+        """Токены восстанавливаются со скоростью rate, block задерживает выдачу"""
+        bucket = TokenBucket(rate=2, capacity=1)
+        now = bucket.updated
+        self.assertEqual(bucket.delay(now), 0)
+        bucket.take(now)
+        self.assertAlmostEqual(bucket.delay(now), 0.5)
+        self.assertEqual(bucket.delay(now + 0.5), 0)
+        bucket.block(now + 0.5, 3)
+        self.assertAlmostEqual(bucket.delay(now + 1), 2.5)
+
+class TestMessageSender(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.sender = MessageSender(global_rate=100, chat_rate=10)
+
+    async def asyncTearDown(self):
+        await self.sender.close()
+
+    async def test_batches_messages_to_same_chat(self):
+        """Сообщения, накопившиеся для чата, уходят одним сообщением"""
+        bot = make_bot()
+        await self.sender.send(bot, 1, "уведомление 0")
+        # Ведро чата пусто: следующие ждут токена и объединяются
+        futures = [self.sender.send(bot, 1, f"уведомление {i}") for i in range(1, 4)]
+        results = await asyncio.gather(*futures)
+
+        self.assertEqual(bot.send_message.await_count, 2)
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(results[2][1], "уведомление 1\n\nуведомление 2\n\nуведомление 3")
+        self.assertEqual(self.sender.stats()['batched'], 2)
+
+    async def test_chats_do_not_wait_for_each_other(self):
+        """Лимит одного чата не задерживает другие чаты"""
+        bot = make_bot()
+        started = time.monotonic()
+        await self.sender.send_many(bot, [1, 2, 3], "рестарт")
+        self.assertLess(time.monotonic() - started, 0.05)
+        self.assertEqual(bot.send_message.await_count, 3)
+
+    async def test_alerts_go_first(self):
+        """Пока ведро чата пусто, тревога обгоняет плановое обновление"""
+        bot = make_bot()
+        await self.sender.send(bot, 1, "первое")
+        routine = self.sender.send(bot, 1, "плановое", priority=PRIORITY_ROUTINE, batch=False)
+        alert = self.sender.send(bot, 1, "тревога", priority=PRIORITY_ALERT, batch=False)
+        await asyncio.gather(routine, alert)
+
+        texts = [call.kwargs['text'] for call in bot.send_message.await_args_list]
+        self.assertEqual(texts, ["первое", "тревога", "плановое"])
+
+    async def test_retry_after(self):
+        """Ответ 429 замораживает ведро и повторяет отправку"""
+        bot = make_bot()
+        bot.send_message.side_effect = [RetryAfter(0.2), (1, "ok")]
+        started = time.monotonic()
+        result = await self.sender.send(bot, 1, "ok")
+
+        self.assertEqual(result, (1, "ok"))
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(self.sender.stats()['retried'], 1)
+
+        # 429 одного чата не задерживает другие
+        bot.send_message.side_effect = [RetryAfter(1), (2, "ok"), (3, "ok")]
+        flooded = asyncio.ensure_future(self.sender.send(bot, 3, "flood"))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        await self.sender.send(bot, 4, "alert")
+        self.assertLess(time.monotonic() - started, 0.5)
+        await flooded
+
+        # Постоянная ошибка приходит в future и в счетчик
+        bot.send_message.side_effect = RuntimeError("chat not found")
+        with self.assertRaises(RuntimeError):
+            await self.sender.send(bot, 2, "x")
+        self.assertEqual(self.sender.failed, 1)
+
+if __name__ == '__main__':
+    unittest.main()
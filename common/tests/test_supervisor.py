@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.supervisor import BotSupervisor, load_restart_policy
+
+def write_bot(directory, code):
+    """Создать тестовый main.py"""
+    with open(os.path.join(directory, 'main.py'), 'w') as f:
+        f.write(code)
+
+class TestBotSupervisor(unittest.IsolatedAsyncioTestCase):
+    
+    def setUp(self):
+        """Временная папка для тестового бота"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.events = []
+    
+    def tearDown(self):
+        """Удаляем временную папку"""
+        self.tmp.cleanup()
+    
+    def on_event(self, bot_id, event, info):
+        self.events.append((event, info))
+    
+    async def test_crashed_bot_restarts_with_backoff(self):
+        """Тест перезапуска упавшего бота с растущей задержкой"""
+        write_bot(self.tmp.name, "raise SystemExit(1)\n")
+        supervisor = BotSupervisor(restart_delay=0.05, max_delay=0.2, on_event=self.on_event)
+        supervisor.add_bot('test', 'Test Bot', self.tmp.name)
+        
+        await supervisor.start('test')
+        await asyncio.sleep(0.8)
+        await supervisor.stop('test')
+        
+        delays = [info['delay'] for event, info in self.events if event == 'restarting']
+        self.assertGreaterEqual(len(delays), 3)
+        self.assertEqual(delays[:3], [0.05, 0.1, 0.2])
+        self.assertTrue(all(delay <= 0.2 for delay in delays))
+    
+    async def test_no_restart_when_disabled(self):
+        """Тест: без auto_restart бот не перезапускается"""
+        write_bot(self.tmp.name, "raise SystemExit(2)\n")
+        supervisor = BotSupervisor(restart_delay=0.01, on_event=self.on_event)
+        supervisor.add_bot('test', 'Test Bot', self.tmp.name, auto_restart=False)
+        
+        await supervisor.start('test')
+        await asyncio.wait_for(supervisor.bots['test']['watch_task'], timeout=10)
+        
+        events = [event for event, _ in self.events]
+        self.assertEqual(events, ['started', 'exited'])
+        self.assertEqual(self.events[1][1]['returncode'], 2)
+    
+    async def test_stop_does_not_restart(self):
+        """Тест: остановленный бот не перезапускается"""
+        write_bot(self.tmp.name, "import time\ntime.sleep(60)\n")
+        supervisor = BotSupervisor(restart_delay=0.01, on_event=self.on_event)
+        supervisor.add_bot('test', 'Test Bot', self.tmp.name)
+        
+        await supervisor.start('test')
+        self.assertTrue(supervisor.is_running('test'))
+        await supervisor.stop('test')
+        await asyncio.sleep(0.1)
+        
+        self.assertFalse(supervisor.is_running('test'))
+        self.assertNotIn('restarting', [event for event, _ in self.events])
+    
+    def test_load_restart_policy(self):
+        """Тест чтения auto_restart и auto_restart_delay из конфига менеджера"""
+        config_path = os.path.join(self.tmp.name, 'config.json')
+        with open(config_path, 'w') as f:
+            json.dump({
+                "bots": {
+                    "telescan": {"path": "../Telescan_bot/main.py", "auto_restart": True},
+                    "mineserv": {"path": "../MineServ_bot/main.py", "auto_restart": False}
+                },
+                "monitoring": {"auto_restart_delay": 7}
+            }, f)
+        
+        policy, delay = load_restart_policy(config_path)
+        
+        self.assertEqual(policy, {'Telescan_bot': True, 'MineServ_bot': False})
+        self.assertEqual(delay, 7)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+import sys
+import tempfile
+import time
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common.timeseries import RollupRing, TimeSeriesStore, sparkline
+
+class TestRollupRing(unittest.TestCase):
+    
+    def test_rollup_aggregates(self):
+        """Тест агрегатов min/max/sum/count в корзине"""
+        ring = RollupRing(step=60, size=10)
+        for value in (10, 30, 20):
+            ring.add(120.5, value)
+        
+        self.assertEqual(ring.get(120.0), (10.0, 30.0, 60.0, 3.0))
+    
+    def test_ring_wraparound(self):
+        """Тест: старые корзины перезаписываются, память не растет"""
+        ring = RollupRing(step=1, size=5)
+        for second in range(20):
+            ring.add(second, second)
+        
+        rows = ring.rows(0, 100)
+        self.assertEqual([row[0] for row in rows], [15.0, 16.0, 17.0, 18.0, 19.0])
+        self.assertEqual(len(ring.buckets), 5)
+    
+    def test_closed_bucket(self):
+        """Тест: при переходе в новую корзину возвращается закрытая"""
+        ring = RollupRing(step=60, size=10)
+        self.assertIsNone(ring.add(10, 1))
+        self.assertIsNone(ring.add(50, 1))
+        self.assertEqual(ring.add(200, 1), 0.0)
+
+class TestTimeSeriesStore(unittest.TestCase):
+    
+    def feed(self, store, seconds, value_func):
+        now = time.time()
+        for i in range(seconds):
+            store.add_snapshot({'timestamp': now - seconds + i, 'cpu_percent': value_func(i)})
+    
+    def test_summary_and_percentile(self):
+        """Тест min/max/avg и перцентиля за окно"""
+        store = TimeSeriesStore()
+        self.feed(store, 100, lambda i: float(i))
+        
+        summary = store.summary('cpu_percent', 3600)
+        self.assertEqual(summary['min'], 0.0)
+        self.assertEqual(summary['max'], 99.0)
+        self.assertAlmostEqual(summary['avg'], 49.5)
+        self.assertEqual(store.percentile('cpu_percent', 95), 94.0)
+        self.assertIsNone(store.summary('temperature', 3600))
+    
+    def test_persistence_roundtrip(self):
+        """Тест: минутные агрегаты переживают перезапуск"""
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'metrics.db')
+            store = TimeSeriesStore()
+            store.open_database(db_path)
+            self.feed(store, 600, lambda i: 50.0)
+            store.close()
+            
+            restored = TimeSeriesStore()
+            restored.open_database(db_path)
+            summary = restored.summary('cpu_percent', 86400)
+            restored.close()
+        
+        self.assertIsNotNone(summary)
+        self.assertEqual(summary['avg'], 50.0)
+        self.assertGreaterEqual(summary['count'], 480)
+    
+    def test_sparkline(self):
+        """Тест мини-графика"""
+        self.assertEqual(sparkline([0, 50, 100]), '▁▄█')
+        self.assertEqual(sparkline([None, 1, 1]), ' ▁▁')
+        self.assertEqual(sparkline([]), '')
+
+if __name__ == '__main__':
+    unittest.main()
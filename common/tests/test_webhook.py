@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import asyncio
+import json
+import os
+import sys
+
+# Добавляем путь к корню проекта для импорта common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from telegram.ext import Application
+
+from common.webhook import WebhookServer, register_webhook
+
+def make_update(update_id, text="/start"):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 1700000000,
+            'chat': {'id': 42, 'type': 'private'},
+            'text': text
+        }
+    }
+
+class FakeTelegram:
+    """Отправитель обновлений как у Telegram: POST с секретом по keep-alive соединению"""
+
+    def __init__(self, port):
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def post(self, path, payload, secret=None, method='POST'):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        headers = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        if secret:
+            headers += f"X-Telegram-Bot-Api-Secret-Token: {secret}\r\n"
+        headers += f"Content-Length: {len(body)}\r\n\r\n"
+        self.writer.write(headers.encode() + body)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line == b'\r\n':
+                break
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await self.reader.readexactly(length)
+        return int(status_line.split()[1])
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+
+class TestWebhookServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = WebhookServer(port=0)
+        await self.server.start()
+        self.first = Application.builder().token('111:FIRST').build()
+        self.second = Application.builder().token('222:SECOND').build()
+        self.server.add_route('/first', self.first, 'secret-1')
+        self.server.add_route('second/', self.second, 'secret-2')
+        self.telegram = FakeTelegram(self.server.port)
+
+    async def asyncTearDown(self):
+        self.telegram.close()
+        await self.server.close()
+
+    async def test_routes_by_path_and_secret(self):
+        """Обновления попадают в очередь своего бота"""
+        self.assertEqual(await self.telegram.post('/first', make_update(1), 'secret-1'), 200)
+        self.assertEqual(await self.telegram.post('/second', make_update(2, "hi"), 'secret-2'), 200)
+        # Второй запрос по тому же соединению - keep-alive работает
+        self.assertEqual(await self.telegram.post('/first', make_update(3), 'secret-1'), 200)
+
+        first = [self.first.update_queue.get_nowait() for _ in range(2)]
+        self.assertEqual([update.update_id for update in first], [1, 3])
+        second = self.second.update_queue.get_nowait()
+        self.assertEqual(second.message.text, "hi")
+        self.assertIs(second.get_bot(), self.second.bot)
+        self.assertEqual(self.server.received, 3)
+
+    async def test_rejects_bad_requests(self):
+        """Чужой секрет, неизвестный путь, мусор и GET не попадают в очередь"""
+        self.assertEqual(await self.telegram.post('/first', make_update(1), 'secret-2'), 403)
+        self.assertEqual(await self.telegram.post('/first', make_update(1)), 403)
+        self.assertEqual(await self.telegram.post('/unknown', make_update(1), 'secret-1'), 404)
+        self.assertEqual(await self.telegram.post('/first', b'not json', 'secret-1'), 400)
+        self.assertEqual(await self.telegram.post('/first', b'', 'secret-1', method='GET'), 405)
+
+        self.assertTrue(self.first.update_queue.empty())
+        self.assertEqual(self.server.rejected, 5)
+
+        # После удаления маршрута бот больше не получает обновлений
+        self.server.remove_route('/first')
+        self.assertEqual(await self.telegram.post('/first', make_update(1), 'secret-1'), 404)
+
+    async def test_manual_registration_without_secret(self):
+        """Без url и secret_token вебхук принимает обновления без заголовка"""
+        manual = Application.builder().token('333:MANUAL').build()
+        path = await register_webhook(manual, self.server, {'path': '/manual'})
+        self.assertEqual(path, '/manual')
+        self.assertEqual(await self.telegram.post('/manual', make_update(7)), 200)
+        self.assertEqual(manual.update_queue.get_nowait().update_id, 7)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import math
+import sqlite3
+import threading
+import time
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# Метрики снимка MetricsSampler, которые храним в истории
+DEFAULT_METRICS = (
+    'cpu_percent',
+    'memory_percent',
+    'disk_percent',
+    'temperature',
+    'network_sent_rate',
+    'network_recv_rate'
+)
+
+# (шаг в секундах, количество корзин): 1 час по 1 сек, 24 часа по 1 мин, 7 дней по 1 часу
+RESOLUTIONS = ((1, 3600), (60, 1440), (3600, 168))
+
+SPARK_CHARS = '▁▂▃▄▅▆▇█'
+
+
+class RollupRing:
+    """Кольцо агрегатов (min, max, sum, count) с фиксированным шагом.
+
+    Корзины лежат в плоских массивах array('d'), поэтому объем памяти
+    не зависит от числа пришедших значений.
+    """
+
+    def __init__(self, step, size):
+        self.step = step
+        self.size = size
+        self.buckets = array('d', [-1.0]) * size
+        self.mins = array('d', [0.0]) * size
+        self.maxs = array('d', [0.0]) * size
+        self.sums = array('d', [0.0]) * size
+        self.counts = array('d', [0.0]) * size
+        self.current = -1.0
+
+    def add(self, timestamp, value):
+        """Добавить значение. Возвращает начало корзины, которая при этом закрылась, или None"""
+        number = int(timestamp // self.step)
+        bucket = float(number * self.step)
+        index = number % self.size
+        closed = None
+        if bucket != self.current:
+            if self.current >= 0:
+                closed = self.current
+            self.current = bucket
+        if self.buckets[index] != bucket:
+            self.buckets[index] = bucket
+            self.mins[index] = self.maxs[index] = value
+            self.sums[index] = 0.0
+            self.counts[index] = 0.0
+        self.mins[index] = min(self.mins[index], value)
+        self.maxs[index] = max(self.maxs[index], value)
+        self.sums[index] += value
+        self.counts[index] += 1
+        return closed
+
+    def load(self, bucket, minimum, maximum, total, count):
+        """Восстановить корзину из сохраненного агрегата"""
+        index = int(bucket // self.step) % self.size
+        if bucket >= self.buckets[index]:
+            self.buckets[index] = bucket
+            self.mins[index] = minimum
+            self.maxs[index] = maximum
+            self.sums[index] = total
+            self.counts[index] = count
+
+    def get(self, bucket):
+        """Агрегат корзины (min, max, sum, count) или None"""
+        index = int(bucket // self.step) % self.size
+        if self.buckets[index] != bucket or not self.counts[index]:
+            return None
+        return self.mins[index], self.maxs[index], self.sums[index], self.counts[index]
+
+    def rows(self, since, until):
+        """Непустые корзины в интервале [since, until] по возрастанию времени"""
+        result = []
+        for index in range(self.size):
+            bucket = self.buckets[index]
+            if since <= bucket <= until and self.counts[index]:
+                result.append((bucket, self.mins[index], self.maxs[index],
+                               self.sums[index], self.counts[index]))
+        result.sort()
+        return result
+
+
+class TimeSeriesStore:
+    """Хранилище истории метрик с агрегатами по 1 сек, 1 мин и 1 час.
+
+    Секундное кольцо живет только в памяти. Минутные и часовые корзины при
+    закрытии сохраняются в SQLite в таблицу с фиксированным числом слотов,
+    поэтому размер базы ограничен и история переживает перезапуск бота.
+    """
+
+    def __init__(self, metrics=DEFAULT_METRICS, resolutions=RESOLUTIONS):
+        self.metrics = tuple(metrics)
+        self.resolutions = tuple(resolutions)
+        self.rings = {
+            metric: [RollupRing(step, size) for step, size in self.resolutions]
+            for metric in self.metrics
+        }
+        self._lock = threading.Lock()
+        self._db = None
+
+    def open_database(self, path):
+        """Подключить SQLite для сохранения минутных и часовых агрегатов"""
+        try:
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS rollups ("
+                "metric TEXT, step INTEGER, slot INTEGER, bucket REAL, "
+                "min REAL, max REAL, sum REAL, count REAL, "
+                "PRIMARY KEY (metric, step, slot))"
+            )
+            db.commit()
+            with self._lock:
+                self._db = db
+                self._load()
+            logger.info(f"История метрик: {path}")
+        except sqlite3.Error as e:
+            logger.error(f"Не удалось открыть базу истории {path}: {e}")
+
+    def close(self):
+        """Закрыть базу"""
+        with self._lock:
+            if self._db:
+                self._db.close()
+                self._db = None
+
+    def add_snapshot(self, snapshot):
+        """Добавить снимок MetricsSampler (подходит как слушатель сборщика)"""
+        timestamp = snapshot.get('timestamp', time.time())
+        closed = []
+        with self._lock:
+            for metric in self.metrics:
+                value = snapshot.get(metric)
+                if value is None:
+                    continue
+                for ring in self.rings[metric]:
+                    bucket = ring.add(timestamp, float(value))
+                    if bucket is not None and ring.step > 1:
+                        closed.append((metric, ring, bucket))
+            if closed and self._db:
+                self._persist(closed)
+
+    def summary(self, metric, window):
+        """min/max/avg за последние window секунд из самого мелкого подходящего кольца"""
+        ring = self._ring_for(metric, window)
+        now = time.time()
+        with self._lock:
+            rows = ring.rows(now - window, now)
+        count = sum(row[4] for row in rows)
+        if not count:
+            return None
+        return {
+            'min': min(row[1] for row in rows),
+            'max': max(row[2] for row in rows),
+            'avg': sum(row[3] for row in rows) / count,
+            'count': int(count)
+        }
+
+    def percentile(self, metric, q, window=3600):
+        """Перцентиль q (0-100) средних значений корзин за окно"""
+        ring = self._ring_for(metric, window)
+        now = time.time()
+        with self._lock:
+            values = sorted(row[3] / row[4] for row in ring.rows(now - window, now))
+        if not values:
+            return None
+        rank = max(0, math.ceil(q / 100 * len(values)) - 1)
+        return values[rank]
+
+    def series(self, metric, window, points):
+        """Средние значения за окно, сведенные в points равных интервалов (None - нет данных)"""
+        ring = self._ring_for(metric, window)
+        now = time.time()
+        since = now - window
+        with self._lock:
+            rows = ring.rows(since, now)
+        sums = [0.0] * points
+        counts = [0.0] * points
+        for bucket, _, _, total, count in rows:
+            index = min(points - 1, int((bucket - since) / window * points))
+            sums[index] += total
+            counts[index] += count
+        return [sums[i] / counts[i] if counts[i] else None for i in range(points)]
+
+    def _ring_for(self, metric, window):
+        for ring in self.rings[metric]:
+            if window <= ring.step * ring.size:
+                return ring
+        return self.rings[metric][-1]
+
+    def _persist(self, closed):
+        try:
+            rows = []
+            for metric, ring, bucket in closed:
+                aggregate = ring.get(bucket)
+                if aggregate:
+                    slot = int(bucket // ring.step) % ring.size
+                    rows.append((metric, ring.step, slot, bucket) + aggregate)
+            self._db.executemany("INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка сохранения истории метрик: {e}")
+
+    def _load(self):
+        steps = {}
+        for metric in self.metrics:
+            for ring in self.rings[metric]:
+                steps[(metric, ring.step)] = ring
+        for metric, step, _, bucket, minimum, maximum, total, count in self._db.execute("SELECT * FROM rollups"):
+            ring = steps.get((metric, step))
+            if ring:
+                ring.load(bucket, minimum, maximum, total, count)
+
+
+def sparkline(values):
+    """Мини-график из блоков ▁..█ (пропуски - пробел)"""
+    present = [value for value in values if value is not None]
+    if not present:
+        return ''
+    low, high = min(present), max(present)
+    span = (high - low) or 1
+    return ''.join(
+        ' ' if value is None else SPARK_CHARS[int((value - low) / span * (len(SPARK_CHARS) - 1))]
+        for value in values
+    )
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import hmac
+import json
+import logging
+import secrets
+
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'x-telegram-bot-api-secret-token'
+# Обновление Telegram намного меньше; больше - явно не от Telegram
+MAX_BODY = 1024 * 1024
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    403: 'Forbidden',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    411: 'Length Required',
+    413: 'Payload Too Large'
+}
+
+
+async def read_request(reader):
+    """Прочитать HTTP/1.1 запрос: (метод, путь, заголовки, тело) или None при закрытии"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    lines = head.decode('latin-1').split('\r\n')
+    method, path, _ = lines[0].split(' ', 2)
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', ''):
+        raise ValueError(411)
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY:
+        raise ValueError(413)
+    body = await reader.readexactly(length) if length else b''
+    return method, path, headers, body
+
+
+def write_response(writer, status, body=b'', content_type='application/json', keep_alive=True):
+    """Записать HTTP/1.1 ответ"""
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode('latin-1') + body)
+
+
+class WebhookServer:
+    """Один HTTP-сервер для вебхуков всех ботов.
+
+    Обновление приходит POST-запросом на путь бота; заголовок
+    X-Telegram-Bot-Api-Secret-Token сверяется с секретом, заданным в
+    setWebhook. Принятое обновление кладется в ``update_queue`` приложения,
+    ответ 200 отправляется сразу, не дожидаясь обработчика. TLS завершается
+    на обратном прокси или туннеле перед сервером.
+    """
+
+    def __init__(self, listen='127.0.0.1', port=8443):
+        self.listen = listen
+        self.port = port
+        self.routes = {}
+        self.received = 0
+        self.rejected = 0
+        self._server = None
+        self._connections = {}
+
+    def add_route(self, path, application, secret_token=None):
+        """Направлять обновления с пути ``path`` в приложение"""
+        self.routes['/' + path.strip('/')] = {'application': application, 'secret_token': secret_token}
+
+    def remove_route(self, path):
+        self.routes.pop('/' + path.strip('/'), None)
+
+    async def start(self):
+        """Начать слушать порт"""
+        self._server = await asyncio.start_server(self._handle, self.listen, self.port)
+        if not self.port:
+            self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Вебхуки принимаются на {self.listen}:{self.port}")
+
+    async def close(self):
+        """Перестать слушать порт и закрыть keep-alive соединения"""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in list(self._connections):
+            writer.close()
+        if self._connections:
+            await asyncio.gather(*self._connections.values(), return_exceptions=True)
+
+    async def _handle(self, reader, writer):
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ValueError as e:
+                    status = e.args[0] if isinstance(e.args[0], int) else 400
+                    write_response(writer, status, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status = await self.dispatch(method, path, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                write_response(writer, status, keep_alive=keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def dispatch(self, method, path, headers, body):
+        """Принять обновление и вернуть HTTP-статус"""
+        route = self.routes.get('/' + path.split('?', 1)[0].strip('/'))
+        if route is None:
+            self.rejected += 1
+            return 404
+        if method != 'POST':
+            self.rejected += 1
+            return 405
+        secret = route['secret_token']
+        if secret and not hmac.compare_digest(headers.get(SECRET_HEADER, ''), secret):
+            self.rejected += 1
+            logger.warning(f"Вебхук {path}: неверный секретный токен")
+            return 403
+        try:
+            application = route['application']
+            update = Update.de_json(json.loads(body), application.bot)
+        except (ValueError, TypeError, KeyError) as e:
+            self.rejected += 1
+            logger.error(f"Ошибка разбора обновления {path}: {e}")
+            return 400
+        await application.update_queue.put(update)
+        self.received += 1
+        return 200
+
+
+async def register_webhook(application, server, webhook_config):
+    """Подключить инициализированное приложение к серверу и сообщить URL в Telegram.
+
+    Возвращает путь маршрута. Без ``url`` вебхук в Telegram не регистрируется -
+    это нужно, если setWebhook выполнен вручную. Случайный секрет создается
+    только при своей регистрации: при ручной проверяется заданный
+    ``secret_token``, а без него заголовок не проверяется.
+    """
+    path = webhook_config.get('path') or f"/{application.bot.id}"
+    url = webhook_config.get('url')
+    secret_token = webhook_config.get('secret_token')
+    if url and not secret_token:
+        secret_token = secrets.token_urlsafe(32)
+    server.add_route(path, application, secret_token)
+    if url:
+        try:
+            await application.bot.set_webhook(
+                url=url.rstrip('/') + '/' + path.strip('/'),
+                secret_token=secret_token,
+                allowed_updates=Update.ALL_TYPES,
+                max_connections=webhook_config.get('max_connections', 40)
+            )
+        except Exception:
+            server.remove_route(path)
+            raise
+        logger.info(f"Вебхук зарегистрирован: {url.rstrip('/')}/{path.strip('/')}")
+    else:
+        logger.warning(f"Вебхук {path}: url не задан, setWebhook нужно выполнить вручную")
+    return path
+
+
+async def run_webhook(application, webhook_config):
+    """Замена ``run_polling`` для одного бота: свой сервер и обработка до отмены"""
+    server = WebhookServer(webhook_config.get('listen', '127.0.0.1'), webhook_config.get('port', 8443))
+    await server.start()
+    try:
+        await application.initialize()
+        await application.start()
+        await register_webhook(application, server, webhook_config)
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        if application.running:
+            await application.stop()
+        await application.shutdown()
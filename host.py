@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Хост-режим: все боты в одном процессе и одном цикле событий.
+
+Каждый бот загружается как плагин из своего main.py и получает отдельное
+приложение Telegram со своими обработчиками и обработчиком ошибок, но все
+они используют один пул HTTP-соединений и один сборщик метрик. Ошибка
+запуска или обработки в одном боте не затрагивает остальных. Необработанное
+исключение записывается в crashes.json того бота, в чьем коде оно произошло
+(см. ``common.crashes.store_for``).
+
+Если в конфиге бота включен ``webhook``, обновления для него принимает один
+общий HTTP-сервер хоста (маршрут по пути и секретному токену) вместо long
+polling. Адрес и порт сервера берутся из конфига первого такого бота.
+
+Относительные пути в конфигах ботов (history_db, backup_path и т.п.)
+считаются от текущей папки, поэтому запускать из корня проекта:
+
+    python host.py
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import sys
+import time
+
+from telegram.ext import Application
+from telegram.request import HTTPXRequest
+
+from common.control import SupervisorView
+from common.logs import setup_logging
+from common.webhook import WebhookServer, register_webhook
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# (папка бота, название, класс бота в main.py)
+PLUGINS = [
+    ("Telescan_bot", "Telescan Bot", "TelescanBot"),
+    ("MineServ_bot", "MineServ Bot", "MineServBot"),
+    ("Mather_bots", "Manager Bot", "BotManager"),
+    ("BotMonitor", "Bot Monitor", "BotMonitor")
+]
+
+# Боты, которые управляют другими и не могут остановить сами себя
+CONTROLLERS = {"Mather_bots"}
+
+logger = logging.getLogger("host")
+
+
+def load_plugin_module(bot_dir):
+    """Загрузить main.py бота под уникальным именем модуля"""
+    bot_path = os.path.join(ROOT, bot_dir)
+    # Соседние модули бота (alerts, rcon, backup...) импортируются по короткому имени
+    if bot_path not in sys.path:
+        sys.path.insert(0, bot_path)
+    name = f"{bot_dir.lower()}_main"
+    spec = importlib.util.spec_from_file_location(name, os.path.join(bot_path, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class HostView(SupervisorView):
+    """Состояние плагинов для менеджера и монитора: хост обновляет его сам"""
+
+    def __init__(self):
+        super().__init__(path=None)
+        self.connected = True
+
+    async def run(self):
+        # Подписываться не на что - события приходят от хоста напрямую
+        await asyncio.Event().wait()
+
+
+class PluginHost:
+    """Загрузка, запуск и остановка ботов-плагинов.
+
+    Для менеджера и монитора хост подменяет клиент супервизора: у него тот же
+    метод ``request(cmd, bot=...)``, а состояние публикуется в ``view``.
+    """
+
+    def __init__(self, config_root=ROOT, pool_size=16):
+        self.config_root = config_root
+        self.path = None
+        self.plugins = {}
+        self.view = HostView()
+        # Общий пул соединений для всех ботов; long polling у каждого свой
+        self.http = HTTPXRequest(connection_pool_size=pool_size)
+        self.metrics = None
+        self.sender = None
+        self.webhook = None
+        self._webhook_lock = asyncio.Lock()
+
+    def load(self, bot_dir, name, class_name):
+        """Загрузить бота и создать его приложение"""
+        started = time.perf_counter()
+        plugin = {
+            'name': name,
+            'module': None,
+            'bot': None,
+            'application': None,
+            'tasks': set(),
+            'running': False,
+            'started_at': None,
+            'webhook_path': None,
+            'failures': 0,
+            'error': None
+        }
+        self.plugins[bot_dir] = plugin
+        try:
+            module = load_plugin_module(bot_dir)
+            config_path = os.path.join(self.config_root, bot_dir, 'config.json')
+            bot = getattr(module, class_name)(config_path=config_path)
+
+            # Один сборщик метрик на процесс вместо одного на бота
+            if self.metrics is None:
+                self.metrics = bot.metrics
+            else:
+                bot.metrics = self.metrics
+            # И одна очередь исходящих сообщений с лимитами по каждому токену
+            if self.sender is None:
+                self.sender = bot.sender
+            else:
+                bot.sender = self.sender
+
+            builder = Application.builder().request(self.http)
+            application = module.create_application(bot, builder)
+            application.add_error_handler(self._error_handler(bot_dir))
+            plugin.update(module=module, bot=bot, application=application)
+            logger.info(f"{name} загружен за {(time.perf_counter() - started) * 1000:.0f} мс")
+        except Exception as e:
+            plugin['error'] = str(e)
+            logger.error(f"Не удалось загрузить {name}: {e}")
+        return plugin
+
+    def load_all(self, plugins=PLUGINS):
+        """Загрузить ботов и подключить менеджер и монитор к хосту"""
+        for bot_dir, name, class_name in plugins:
+            if os.path.isdir(os.path.join(ROOT, bot_dir)):
+                self.load(bot_dir, name, class_name)
+        for plugin in self.plugins.values():
+            bot = plugin['bot']
+            if bot is None:
+                continue
+            if hasattr(bot, 'supervisor'):
+                bot.supervisor = self
+            if hasattr(bot, 'supervisor_view'):
+                if hasattr(bot, 'on_supervisor_event'):
+                    self.view.listeners.append(bot.on_supervisor_event)
+                bot.supervisor_view = self.view
+        self.view.bots = {bot_id: self.status(bot_id) for bot_id in self.plugins}
+
+    def _error_handler(self, bot_id):
+        name = self.plugins[bot_id]['name']
+
+        async def handle_error(update, context):
+            logger.error(f"[{name}] Ошибка обработки обновления: {context.error}")
+        return handle_error
+
+    def status(self, bot_id):
+        """Состояние плагина в формате супервизора"""
+        plugin = self.plugins[bot_id]
+        return {
+            'name': plugin['name'],
+            'running': plugin['running'],
+            'pid': os.getpid() if plugin['running'] else None,
+            'returncode': None,
+            'started_at': plugin['started_at'],
+            'failures': plugin['failures'],
+            'auto_restart': False
+        }
+
+    def _publish(self, bot_id, event, info=None):
+        self.view.apply({'event': event, 'bot': bot_id, 'info': info or {}, 'state': self.status(bot_id)})
+
+    async def start_plugin(self, bot_id):
+        """Запустить приложение плагина и его фоновые задачи"""
+        plugin = self.plugins[bot_id]
+        if plugin['running']:
+            return True, "Уже запущен"
+        if plugin['application'] is None:
+            return False, plugin['error'] or "Плагин не загружен"
+        application = plugin['application']
+        try:
+            await application.initialize()
+            # Задачи, созданные ботом при старте, принадлежат ему и отменяются при остановке
+            before = asyncio.all_tasks()
+            plugin['module'].start_background_tasks(plugin['bot'], application)
+            plugin['tasks'] = asyncio.all_tasks() - before
+            await application.start()
+            webhook_config = plugin['bot'].config.get('webhook', {})
+            if webhook_config.get('enabled'):
+                server = await self.get_webhook_server(webhook_config)
+                plugin['webhook_path'] = await register_webhook(application, server, webhook_config)
+            else:
+                await application.updater.start_polling()
+        except Exception as e:
+            plugin['failures'] += 1
+            plugin['error'] = str(e)
+            logger.error(f"Ошибка запуска {plugin['name']}: {e}")
+            await self._cancel_tasks(plugin)
+            self._publish(bot_id, 'start_failed', {'error': str(e)})
+            return False, str(e)
+        plugin['running'] = True
+        plugin['started_at'] = time.time()
+        self._publish(bot_id, 'started', {'pid': os.getpid()})
+        logger.info(f"{plugin['name']} запущен")
+        return True, None
+
+    async def stop_plugin(self, bot_id):
+        """Остановить опрос и фоновые задачи плагина (общий HTTP-клиент не закрывается)"""
+        plugin = self.plugins[bot_id]
+        if not plugin['running']:
+            return False, "Процесс не найден"
+        application = plugin['application']
+        if plugin['webhook_path']:
+            self.webhook.remove_route(plugin['webhook_path'])
+            plugin['webhook_path'] = None
+        try:
+            if application.updater.running:
+                await application.updater.stop()
+            if application.running:
+                await application.stop()
+        except Exception as e:
+            logger.error(f"Ошибка остановки {plugin['name']}: {e}")
+        await self._cancel_tasks(plugin)
+        plugin['running'] = False
+        plugin['started_at'] = None
+        self._publish(bot_id, 'stopped', {'killed': False})
+        logger.info(f"{plugin['name']} остановлен")
+        return True, None
+
+    async def get_webhook_server(self, webhook_config):
+        """Общий сервер вебхуков (запускается при первом обращении)"""
+        async with self._webhook_lock:
+            if self.webhook is None:
+                server = WebhookServer(webhook_config.get('listen', '127.0.0.1'), webhook_config.get('port', 8443))
+                await server.start()
+                self.webhook = server
+        return self.webhook
+
+    async def _cancel_tasks(self, plugin):
+        for task in plugin['tasks']:
+            task.cancel()
+        if plugin['tasks']:
+            await asyncio.gather(*plugin['tasks'], return_exceptions=True)
+        plugin['tasks'] = set()
+
+    async def request(self, cmd, bot=None, **params):
+        """Тот же интерфейс, что у SupervisorClient.request"""
+        if cmd == 'status':
+            return {'ok': True, 'bots': {bot_id: self.status(bot_id) for bot_id in self.plugins}}
+        if bot not in self.plugins:
+            return {'ok': False, 'error': f"Неизвестный бот: {bot}"}
+        if cmd in ('stop', 'restart') and bot in CONTROLLERS:
+            return {'ok': False, 'error': "В хост-режиме менеджер не может остановить сам себя"}
+        if cmd == 'start':
+            success, message = await self.start_plugin(bot)
+        elif cmd == 'stop':
+            success, message = await self.stop_plugin(bot)
+        elif cmd == 'restart':
+            await self.stop_plugin(bot)
+            success, message = await self.start_plugin(bot)
+        else:
+            return {'ok': False, 'error': f"Неизвестная команда: {cmd}"}
+        return {'ok': success, 'error': message, 'state': self.status(bot)}
+
+    async def start_all(self):
+        """Запустить все загруженные плагины параллельно"""
+        await asyncio.gather(*(self.start_plugin(bot_id) for bot_id in self.plugins))
+        # У общего сборщика метрик - самый частый из заданных интервалов
+        intervals = [
+            plugin['bot'].config.get('monitoring', {}).get('sample_interval')
+            for plugin in self.plugins.values() if plugin['bot']
+        ]
+        intervals = [interval for interval in intervals if interval]
+        if self.metrics and intervals:
+            self.metrics.interval = min(intervals)
+
+    async def shutdown(self):
+        """Остановить все плагины и закрыть общие ресурсы"""
+        await asyncio.gather(*(self.stop_plugin(bot_id) for bot_id in self.plugins
+                               if self.plugins[bot_id]['running']))
+        for plugin in self.plugins.values():
+            if plugin['application']:
+                try:
+                    await plugin['application'].shutdown()
+                except Exception as e:
+                    logger.error(f"Ошибка завершения {plugin['name']}: {e}")
+        if self.webhook:
+            await self.webhook.close()
+        if self.sender:
+            await self.sender.close()
+        if self.metrics:
+            self.metrics.stop()
+
+
+async def main():
+    """Основная функция"""
+    # Настраиваем логирование до импорта ботов: их setup_logging станет пустым
+    setup_logging('host.log')
+    started = time.perf_counter()
+    host = PluginHost()
+    host.load_all()
+    try:
+        await host.start_all()
+        running = sum(1 for plugin in host.plugins.values() if plugin['running'])
+        print(f"🎉 Запущено ботов: {running}/{len(host.plugins)} за {time.perf_counter() - started:.2f}с")
+        print("💡 Для остановки нажмите Ctrl+C")
+        await asyncio.Event().wait()
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("\n🛑 Получен сигнал остановки...")
+    finally:
+        await host.shutdown()
+        print("✅ Все боты остановлены")
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Сравнение хост-режима с запуском ботов отдельными процессами.
+
+Для каждого варианта измеряется холодный старт (от запуска интерпретатора
+до готовности приложений всех ботов) и суммарный RSS/USS процессов.
+Сеть не используется: боты загружаются с временными конфигами и
+поддельными токенами, до long polling дело не доходит.
+
+    python host_benchmark.py [--rounds 3]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import psutil
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Пример конфига для каждого бота
+CONFIG_EXAMPLES = {
+    "Telescan_bot": "telescan_config.json",
+    "MineServ_bot": "mineserv_config.json",
+    "Mather_bots": "manager_config.json",
+    "BotMonitor": "botmonitor_config.json"
+}
+
+
+def prepare_configs(config_root):
+    """Временные конфиги ботов с поддельными токенами"""
+    for bot_dir, example in CONFIG_EXAMPLES.items():
+        with open(os.path.join(ROOT, 'config_examples', example), 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        config['bot_token'] = '123456:BENCHMARK'
+        config.setdefault('monitoring', {})['history_db'] = os.path.join(config_root, 'metrics.db')
+        os.makedirs(os.path.join(config_root, bot_dir), exist_ok=True)
+        with open(os.path.join(config_root, bot_dir, 'config.json'), 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+
+
+def run_child(config_root, bot_dirs):
+    """Дочерний режим: загрузить ботов, вывести замер и ждать завершения"""
+    logging.basicConfig(level=logging.WARNING, handlers=[logging.StreamHandler(sys.stderr)])
+    sys.path.insert(0, ROOT)
+    from host import PLUGINS, PluginHost
+
+    host = PluginHost(config_root=config_root)
+    host.load_all([plugin for plugin in PLUGINS if plugin[0] in bot_dirs])
+    loaded = sum(1 for plugin in host.plugins.values() if plugin['application'])
+    memory = psutil.Process().memory_full_info()
+    print(json.dumps({'loaded': loaded, 'rss': memory.rss, 'uss': memory.uss}), flush=True)
+    sys.stdin.readline()
+
+
+async def measure(config_root, groups):
+    """Запустить по процессу на группу ботов и дождаться готовности всех"""
+    started = time.perf_counter()
+    processes = [
+        await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), '--child', config_root, *group,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, cwd=config_root
+        )
+        for group in groups
+    ]
+    results = [json.loads(await process.stdout.readline()) for process in processes]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.stdin.close()
+        await process.wait()
+    return {
+        'elapsed': elapsed,
+        'loaded': sum(result['loaded'] for result in results),
+        'rss': sum(result['rss'] for result in results),
+        'uss': sum(result['uss'] for result in results)
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    config_root = tempfile.mkdtemp(prefix='host-benchmark-')
+    try:
+        prepare_configs(config_root)
+        bot_dirs = list(CONFIG_EXAMPLES)
+        layouts = {
+            'Отдельные процессы': [[bot_dir] for bot_dir in bot_dirs],
+            'Хост-режим': [bot_dirs]
+        }
+        print(f"🤖 Боты: {', '.join(bot_dirs)}; раундов: {args.rounds}\n")
+        for title, groups in layouts.items():
+            rounds = [await measure(config_root, groups) for _ in range(args.rounds)]
+            elapsed = statistics.median(r['elapsed'] for r in rounds)
+            rss = statistics.median(r['rss'] for r in rounds) / 1024 / 1024
+            uss = statistics.median(r['uss'] for r in rounds) / 1024 / 1024
+            print(f"{title}: процессов {len(groups)}, загружено ботов {rounds[-1]['loaded']}")
+            print(f"   ⏱️ Холодный старт: {elapsed:.2f}с")
+            print(f"   💾 RSS: {rss:.1f} МБ, USS: {uss:.1f} МБ\n")
+    finally:
+        shutil.rmtree(config_root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], sys.argv[3:])
+    else:
+        asyncio.run(main())
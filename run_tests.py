@@ -52,7 +52,8 @@ def main():
     bots = [
         ("Telescan Bot", "Telescan_bot"),
         ("MineServ Bot", "MineServ_bot"),
-        ("Manager Bot", "Mather_bots")
+        ("Manager Bot", "Mather_bots"),
+        ("Common", "common")
     ]
     
     total_tests = len(bots)
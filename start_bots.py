@@ -1,107 +1,94 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import subprocess
-import sys
+import asyncio
 import os
 import time
-import signal
-import psutil
 
-def start_bot(bot_name, bot_path):
-    """Запустить бота в отдельном процессе"""
-    try:
-        # Проверяем, что папка существует
-        if not os.path.exists(bot_path):
-            print(f"❌ Папка {bot_path} не найдена")
-            return None
-            
-        # Проверяем, что main.py существует
-        main_file = os.path.join(bot_path, 'main.py')
-        if not os.path.exists(main_file):
-            print(f"❌ Файл main.py не найден в {bot_path}")
-            return None
-        
-        # Запускаем бота
-        if os.name == 'nt':  # Windows
-            process = subprocess.Popen(
-                [sys.executable, main_file],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                creationflags=subprocess.CREATE_NEW_CONSOLE,
-                cwd=bot_path  # Устанавливаем рабочую директорию
-            )
-        else:  # Linux/Android
-            process = subprocess.Popen(
-                [sys.executable, main_file],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                cwd=bot_path  # Устанавливаем рабочую директорию
-            )
-        
-        print(f"✅ {bot_name} запущен (PID: {process.pid})")
-        return process
-        
-    except Exception as e:
-        print(f"❌ Ошибка запуска {bot_name}: {e}")
-        return None
+from common.control import DEFAULT_SOCKET, SupervisorClient, SupervisorServer
+from common.supervisor import BotSupervisor, load_bot_limits, load_restart_policy, print_event
 
-def stop_bot(process, bot_name):
-    """Остановить бота"""
-    if process and process.poll() is None:
-        try:
-            process.terminate()
-            process.wait(timeout=5)
-            print(f"⏹️ {bot_name} остановлен")
-        except subprocess.TimeoutExpired:
-            process.kill()
-            print(f"🔪 {bot_name} принудительно остановлен")
-        except Exception as e:
-            print(f"❌ Ошибка остановки {bot_name}: {e}")
+# Список ботов для запуска
+BOTS = [
+    ("Telescan Bot", "Telescan_bot"),
+    ("MineServ Bot", "MineServ_bot"),
+    ("Manager Bot", "Mather_bots")
+]
 
-def main():
-    """Основная функция"""
-    print("🤖 Запуск системы ботов...")
+# auto_restart, auto_restart_delay и ограничения ресурсов (limits)
+# берутся из конфига менеджера
+MANAGER_CONFIG = os.path.join("Mather_bots", "config.json")
+
+def create_supervisor():
+    """Создать супервизор со списком ботов и политикой перезапуска"""
+    policy, restart_delay = load_restart_policy(MANAGER_CONFIG)
+    limits, resource_interval = load_bot_limits(MANAGER_CONFIG)
+    supervisor = BotSupervisor(
+        restart_delay=restart_delay,
+        on_event=print_event,
+        resource_interval=resource_interval
+    )
+    
+    for bot_name, bot_path in BOTS:
+        if os.path.exists(bot_path):
+            supervisor.add_bot(
+                bot_path, bot_name, bot_path,
+                auto_restart=policy.get(bot_path, True),
+                limits=limits.get(bot_path)
+            )
+        else:
+            print(f"⚠️ Папка {bot_path} не найдена")
     
-    # Список ботов для запуска
-    bots = [
-        ("Telescan Bot", "Telescan_bot"),
-        ("MineServ Bot", "MineServ_bot"),
-        ("Manager Bot", "Mather_bots")
-    ]
+    return supervisor
+
+async def is_daemon_running(socket_path=DEFAULT_SOCKET):
+    """Отвечает ли уже другой супервизор на сокете управления"""
+    try:
+        await SupervisorClient(socket_path, timeout=2).request('status')
+        return True
+    except (ConnectionError, OSError, asyncio.TimeoutError, ValueError):
+        return False
+
+async def run_bots(supervisor, started_at=None, socket_path=DEFAULT_SOCKET):
+    """Запустить ботов параллельно и держать их под присмотром до сигнала остановки.
     
-    processes = []
+    Пока скрипт работает, он - единственный владелец процессов ботов:
+    менеджер и монитор управляют ими и узнают их состояние через сокет
+    управления, а не запуском и поиском процессов.
+    """
+    if await is_daemon_running(socket_path):
+        print(f"⚠️ Супервизор уже запущен ({socket_path})")
+        return
     
+    control = SupervisorServer(supervisor, socket_path)
+    limits_task = None
     try:
-        # Запускаем всех ботов
-        for bot_name, bot_path in bots:
-            if os.path.exists(bot_path):
-                process = start_bot(bot_name, bot_path)
-                if process:
-                    processes.append((process, bot_name))
-                time.sleep(2)  # Пауза между запусками
-            else:
-                print(f"⚠️ Папка {bot_path} не найдена")
+        await control.start()
         
-        print(f"\n🎉 Запущено ботов: {len(processes)}")
+        # Запускаем всех ботов одновременно
+        launch_started = time.monotonic()
+        await asyncio.gather(*(supervisor.start(bot_id) for bot_id in supervisor.bots))
+        
+        print(f"\n🎉 Запущено ботов: {supervisor.running_count()} за {time.monotonic() - launch_started:.2f}с")
+        if started_at is not None:
+            print(f"⏱️ Всего с начала перезапуска: {time.monotonic() - started_at:.2f}с")
         print("💡 Для остановки нажмите Ctrl+C")
         
-        # Ждем сигнала остановки
-        while True:
-            time.sleep(1)
-            
-            # Проверяем, не упал ли какой-то бот
-            for process, bot_name in processes[:]:
-                if process.poll() is not None:
-                    print(f"⚠️ {bot_name} завершился неожиданно")
-                    processes.remove((process, bot_name))
+        # Ботов, превысивших ограничения ресурсов, супервизор перезапускает сам
+        limits_task = asyncio.create_task(supervisor.enforce_limits())
+        
+        # Падения ботов обрабатывает супервизор по событию завершения
+        # процесса, здесь просто спим до сигнала остановки
+        await asyncio.Event().wait()
     
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
         print("\n🛑 Получен сигнал остановки...")
         
-        # Останавливаем всех ботов
-        for process, bot_name in processes:
-            stop_bot(process, bot_name)
+        # Останавливаем всех ботов (и проверку ограничений, чтобы она
+        # не перезапустила кого-то во время остановки)
+        if limits_task:
+            limits_task.cancel()
+        await supervisor.stop_all()
         
         print("✅ Все боты остановлены")
     
@@ -109,8 +96,20 @@ def main():
         print(f"❌ Критическая ошибка: {e}")
         
         # Останавливаем всех ботов при ошибке
-        for process, bot_name in processes:
-            stop_bot(process, bot_name)
+        if limits_task:
+            limits_task.cancel()
+        await supervisor.stop_all()
+    
+    finally:
+        await control.close()
+
+async def main():
+    """Основная функция"""
+    print("🤖 Запуск системы ботов...")
+    await run_bots(create_supervisor())
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
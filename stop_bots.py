@@ -4,7 +4,8 @@
 import psutil
 import os
 import sys
-import time
+
+from common.logs import rotate_log
 
 def stop_python_processes():
     """Остановить все процессы Python"""
@@ -30,28 +31,30 @@ def stop_python_processes():
     
     return stopped_count
 
-def clear_logs():
-    """Очистить все лог-файлы"""
+def rotate_logs():
+    """Закрыть логи ботов в старые сегменты.
+    
+    Вместо очистки текущий лог становится сегментом .1, а самый старый
+    удаляется: история последних запусков сохраняется, но объем логов
+    ограничен числом сегментов.
+    """
     log_files = [
         "Telescan_bot/telescan.log",
         "MineServ_bot/mineserv.log",
         "Mather_bots/manager.log"
     ]
     
-    cleared_count = 0
+    rotated_count = 0
     
     for log_file in log_files:
-        if os.path.exists(log_file):
-            try:
-                # Очищаем файл, оставляя только заголовок
-                with open(log_file, 'w', encoding='utf-8') as f:
-                    f.write(f"# Лог очищен {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                print(f"🧹 Очищен лог: {log_file}")
-                cleared_count += 1
-            except Exception as e:
-                print(f"❌ Ошибка очистки {log_file}: {e}")
+        try:
+            if rotate_log(log_file):
+                print(f"🗂️ Лог закрыт в сегмент: {log_file}.1")
+                rotated_count += 1
+        except OSError as e:
+            print(f"❌ Ошибка ротации {log_file}: {e}")
     
-    return cleared_count
+    return rotated_count
 
 def main():
     """Основная функция"""
@@ -65,10 +68,10 @@ def main():
     else:
         print("ℹ️ Не найдено запущенных ботов")
     
-    # Очищаем логи
-    print("\n🧹 Очищаем лог-файлы...")
-    cleared = clear_logs()
-    print(f"🧹 Очищено логов: {cleared}")
+    # Закрываем логи в сегменты
+    print("\n🗂️ Ротация лог-файлов...")
+    rotated = rotate_logs()
+    print(f"🗂️ Логов в ротации: {rotated}")
     
     # Дополнительно можно остановить по имени файлов
     bot_files = [
@@ -43,9 +43,9 @@ start_bot() {
     
     echo "🚀 Запуск $bot_name..."
     
-    # Запускаем бота в фоне с логированием
+    # Запускаем бота в фоне: лог с ротацией бот пишет сам
     cd "$bot_path"
-    nohup python main.py > "${bot_name,,}.log" 2>&1 &
+    nohup python main.py > /dev/null 2>&1 &
     local pid=$!
     cd - > /dev/null
     
@@ -68,7 +68,7 @@ sleep 3
 # Запускаем Bot Monitor отдельно
 echo "📊 Запуск Bot Monitor..."
 cd BotMonitor
-nohup python main.py > bot_monitor.log 2>&1 &
+nohup python main.py > /dev/null 2>&1 &
 monitor_pid=$!
 cd - > /dev/null
 echo "✅ Bot Monitor запущен (PID: $monitor_pid)"
@@ -47,12 +47,12 @@ fi
 echo "🧹 Финальная очистка..."
 pkill -f "main.py" 2>/dev/null || true
 
-# Очищаем логи
-echo "🧹 Очистка логов..."
+# Закрываем логи в сегменты вместо очистки
+echo "🗂️ Ротация логов..."
 for log_file in */telescan.log */mineserv.log */manager.log BotMonitor/bot_monitor.log; do
     if [ -f "$log_file" ]; then
-        echo "# Лог очищен $(date)" > "$log_file"
-        echo "🧹 Очищен: $log_file"
+        python -c "import sys; from common.logs import rotate_log; rotate_log(sys.argv[1])" "$log_file"
+        echo "🗂️ В сегмент: $log_file.1"
     fi
 done
 
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Задержка от появления обновления до обработчика: long polling против вебхука.
+
+Все происходит на loopback. Поддельный Bot API отвечает на getMe,
+deleteWebhook и getUpdates (long polling держит запрос, пока нет
+обновлений), поддельный Telegram отправляет вебхуки POST-запросами по
+нескольким keep-alive соединениям. Обновления приходят пачками (burst);
+``--delay`` имитирует сетевую задержку в одну сторону.
+
+    python webhook_benchmark.py [--bursts 20] [--burst-size 50] [--delay 30]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from urllib.parse import parse_qs
+
+from telegram import Update
+from telegram.ext import Application, TypeHandler
+
+from common.webhook import WebhookServer, read_request, write_response
+
+TOKEN = '123456:BENCHMARK'
+SECRET = 'benchmark-secret'
+PATH = '/benchmark'
+ME = {'id': 123456, 'is_bot': True, 'first_name': 'Benchmark', 'username': 'benchmark_bot'}
+
+
+def make_update(update_id):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': 42, 'type': 'private'},
+            'text': f"/ping {update_id}"
+        }
+    }
+
+
+class FakeBotApi:
+    """Минимальный Bot API для long polling"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.pending = []
+        self.arrived = asyncio.Event()
+        self.port = None
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def push(self, updates):
+        self.pending.extend(updates)
+        self.arrived.set()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                _, path, _, body = request
+                method = path.rsplit('/', 1)[-1]
+                params = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+                result = await self.call(method, params)
+                write_response(writer, 200, json.dumps({'ok': True, 'result': result}).encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def call(self, method, params):
+        if method == 'getMe':
+            return ME
+        if method != 'getUpdates':
+            return True
+        offset = int(params.get('offset', 0))
+        self.pending = [update for update in self.pending if update['update_id'] >= offset]
+        if not self.pending:
+            self.arrived.clear()
+            try:
+                await asyncio.wait_for(self.arrived.wait(), timeout=float(params.get('timeout', 10)))
+            except asyncio.TimeoutError:
+                return []
+        await asyncio.sleep(self.delay)  # ответ идет до бота по сети
+        return self.pending[:100]
+
+
+class FakeTelegram:
+    """Отправка вебхуков по пулу keep-alive соединений, как у Telegram (max_connections)"""
+
+    def __init__(self, port, delay, connections=40):
+        self.port = port
+        self.delay = delay
+        self.connections = connections
+        self.queue = asyncio.Queue()
+        self.workers = []
+
+    async def start(self):
+        for _ in range(self.connections):
+            reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+            self.workers.append(asyncio.create_task(self._worker(reader, writer)))
+
+    async def close(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+
+    def push(self, updates):
+        for update in updates:
+            self.queue.put_nowait(update)
+
+    async def _worker(self, reader, writer):
+        try:
+            while True:
+                update = await self.queue.get()
+                body = json.dumps(update).encode()
+                await asyncio.sleep(self.delay)  # запрос идет до сервера по сети
+                writer.write(
+                    f"POST {PATH} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                    f"X-Telegram-Bot-Api-Secret-Token: {SECRET}\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+                await read_request_status(reader)
+        finally:
+            writer.close()
+
+
+async def read_request_status(reader):
+    """Дочитать ответ сервера вебхуков (тело пустое)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    return int(head.split(b' ', 2)[1])
+
+
+async def run_bursts(application, source, bursts, burst_size, pause):
+    """Отправить пачки обновлений и вернуть задержки до обработчика в мс"""
+    produced = {}
+    latencies = []
+    done = asyncio.Event()
+    total = bursts * burst_size
+
+    async def on_update(update, context):
+        latencies.append((time.perf_counter() - produced[update.update_id]) * 1000)
+        if len(latencies) == total:
+            done.set()
+
+    application.add_handler(TypeHandler(Update, on_update))
+    update_id = 1
+    for _ in range(bursts):
+        updates = [make_update(update_id + i) for i in range(burst_size)]
+        now = time.perf_counter()
+        for update in updates:
+            produced[update['update_id']] = now
+        source.push(updates)
+        update_id += burst_size
+        await asyncio.sleep(pause)
+    await asyncio.wait_for(done.wait(), timeout=60)
+    return latencies
+
+
+async def bench_polling(args):
+    api = FakeBotApi(args.delay / 1000)
+    await api.start()
+    application = (
+        Application.builder().token(TOKEN)
+        .base_url(f"http://127.0.0.1:{api.port}/bot")
+        .get_updates_read_timeout(15)
+        .build()
+    )
+    await application.initialize()
+    await application.start()
+    await application.updater.start_polling(timeout=10)
+    try:
+        return await run_bursts(application, api, args.bursts, args.burst_size, args.pause / 1000)
+    finally:
+        await application.updater.stop()
+        await application.stop()
+        await application.shutdown()
+        await api.close()
+
+
+async def bench_webhook(args):
+    api = FakeBotApi(args.delay / 1000)
+    await api.start()
+    application = Application.builder().token(TOKEN).base_url(f"http://127.0.0.1:{api.port}/bot").build()
+    server = WebhookServer(port=0)
+    await server.start()
+    server.add_route(PATH, application, SECRET)
+    telegram = FakeTelegram(server.port, args.delay / 1000, args.connections)
+    await application.initialize()
+    await application.start()
+    await telegram.start()
+    try:
+        return await run_bursts(application, telegram, args.bursts, args.burst_size, args.pause / 1000)
+    finally:
+        await telegram.close()
+        await server.close()
+        await application.stop()
+        await application.shutdown()
+        await api.close()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bursts', type=int, default=20)
+    parser.add_argument('--burst-size', type=int, default=50)
+    parser.add_argument('--pause', type=float, default=200, help="пауза между пачками, мс")
+    parser.add_argument('--delay', type=float, default=30, help="сетевая задержка в одну сторону, мс")
+    parser.add_argument('--connections', type=int, default=40, help="соединений вебхука")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"📨 {args.bursts} пачек по {args.burst_size} обновлений, задержка сети {args.delay:.0f} мс\n")
+    for title, bench in (('Long polling', bench_polling), ('Вебхук', bench_webhook)):
+        latencies = await bench(args)
+        print(f"{title}: обработано {len(latencies)}")
+        print(
+            f"   ⏱️ p50 {statistics.median(latencies):.1f} мс, p95 {percentile(latencies, 0.95):.1f} мс, "
+            f"p99 {percentile(latencies, 0.99):.1f} мс, макс {max(latencies):.1f} мс\n"
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())